@@ -0,0 +1,394 @@
+import argparse
+import csv
+
+import numpy as np
+
+from config import Config
+from note_index import NoteIndex
+
+
+class ResultsHistory:
+    """Columnar, NumPy-backed view of the results written by CSVLogger.
+
+    Notes are stored as MIDI numbers so that every aggregate can be computed
+    with bincount/sort over integer codes. Names that are not notes (which
+    should not happen) get the code UNKNOWN_NOTE.
+    """
+
+    UNKNOWN_NOTE = NoteIndex.MIDI_SLOTS
+    NOTE_CODES = NoteIndex.MIDI_SLOTS + 1
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        session_codes: np.ndarray,
+        sessions: np.ndarray,
+        tested_notes: np.ndarray,
+        guessed_notes: np.ndarray,
+        time_taken: np.ndarray,
+    ):
+        """Initialize the history from its column arrays.
+
+        Args:
+            timestamps (np.ndarray): Result timestamps (datetime64[s]).
+            session_codes (np.ndarray): Index of each result's session in `sessions`.
+            sessions (np.ndarray): The distinct session IDs.
+            tested_notes (np.ndarray): Tested note codes (MIDI numbers).
+            guessed_notes (np.ndarray): Guessed note codes (MIDI numbers).
+            time_taken (np.ndarray): Response times in seconds.
+        """
+        self.timestamps: np.ndarray = timestamps
+        self.session_codes: np.ndarray = session_codes
+        self.sessions: np.ndarray = sessions
+        self.tested_notes: np.ndarray = tested_notes
+        self.guessed_notes: np.ndarray = guessed_notes
+        self.time_taken: np.ndarray = time_taken
+        self.correct: np.ndarray = tested_notes == guessed_notes
+
+    def __len__(self) -> int:
+        return len(self.time_taken)
+
+    @staticmethod
+    def note_codes() -> dict[str, int]:
+        """Get the mapping from every note name that can appear in the log to its code.
+
+        Returns:
+            dict[str, int]: Note name (including "Note<n>" names) to MIDI number.
+        """
+        return {name: n for n, name in enumerate(NoteIndex.DISPLAY_NAMES)}
+
+    @staticmethod
+    def load(csv_file: str) -> "ResultsHistory":
+        """Load a results CSV into column arrays.
+
+        CSVLogger never writes quoted fields, so the file is split on commas and
+        newlines in one pass and each column is sliced out of the flat field
+        list. Files that do not split evenly fall back to the csv module.
+
+        Args:
+            csv_file (str): The path to the results CSV file.
+
+        Returns:
+            ResultsHistory: The loaded history.
+        """
+        with open(csv_file, "rb") as results_file:
+            data = results_file.read()
+        header, _, body = data.partition(b"\n")
+        field_count = header.count(b",") + 1
+        body = body.replace(b"\r\n", b"\n").rstrip(b"\n")
+        if not body:
+            return ResultsHistory.empty()
+        fields = body.replace(b"\n", b",").split(b",")
+        if b'"' in body or len(fields) % field_count != 0 or field_count < 5:
+            return ResultsHistory._load_with_csv_module(csv_file)
+
+        session_codes: dict[bytes, int] = {}
+        note_codes = {
+            name.encode(): code for name, code in ResultsHistory.note_codes().items()
+        }
+        unknown = ResultsHistory.UNKNOWN_NOTE
+        rows = len(fields) // field_count
+        return ResultsHistory(
+            np.array(fields[0::field_count], dtype="S19").astype("datetime64[s]"),
+            np.fromiter(
+                (
+                    session_codes.setdefault(session_id, len(session_codes))
+                    for session_id in fields[1::field_count]
+                ),
+                dtype=np.int64,
+                count=rows,
+            ),
+            np.array([session_id.decode() for session_id in session_codes]),
+            np.fromiter(
+                (note_codes.get(name, unknown) for name in fields[2::field_count]),
+                dtype=np.int16,
+                count=rows,
+            ),
+            np.fromiter(
+                (note_codes.get(name, unknown) for name in fields[3::field_count]),
+                dtype=np.int16,
+                count=rows,
+            ),
+            np.array(fields[4::field_count]).astype(np.float64),
+        )
+
+    @staticmethod
+    def _load_with_csv_module(csv_file: str) -> "ResultsHistory":
+        """Load a results CSV row by row with the csv module.
+
+        Args:
+            csv_file (str): The path to the results CSV file.
+
+        Returns:
+            ResultsHistory: The loaded history.
+        """
+        with open(csv_file, newline="") as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader, None)  # Skip the header
+            rows = [row[:5] for row in reader if len(row) >= 5]
+        if not rows:
+            return ResultsHistory.empty()
+        timestamps, session_ids, tested, guessed, time_taken = zip(*rows)
+        return ResultsHistory.from_columns(
+            timestamps, session_ids, tested, guessed, time_taken
+        )
+
+    @staticmethod
+    def from_columns(
+        timestamps, session_ids, tested_notes, guessed_notes, time_taken
+    ) -> "ResultsHistory":
+        """Build a history from sequences of raw column values.
+
+        Args:
+            timestamps: "YYYY-MM-DD HH:MM:SS" strings.
+            session_ids: Session ID strings.
+            tested_notes: Tested note names.
+            guessed_notes: Guessed note names.
+            time_taken: Response times in seconds, as numbers or strings.
+
+        Returns:
+            ResultsHistory: The history.
+        """
+        session_codes: dict[str, int] = {}
+        codes = ResultsHistory.note_codes()
+        unknown = ResultsHistory.UNKNOWN_NOTE
+        rows = len(time_taken)
+        return ResultsHistory(
+            np.asarray(timestamps, dtype="datetime64[s]"),
+            np.fromiter(
+                (
+                    session_codes.setdefault(session_id, len(session_codes))
+                    for session_id in session_ids
+                ),
+                dtype=np.int64,
+                count=rows,
+            ),
+            np.array(list(session_codes)),
+            np.fromiter(
+                (codes.get(name, unknown) for name in tested_notes),
+                dtype=np.int16,
+                count=rows,
+            ),
+            np.fromiter(
+                (codes.get(name, unknown) for name in guessed_notes),
+                dtype=np.int16,
+                count=rows,
+            ),
+            np.asarray(time_taken, dtype=np.float64),
+        )
+
+    @staticmethod
+    def empty() -> "ResultsHistory":
+        """Create a history without any results.
+
+        Returns:
+            ResultsHistory: The empty history.
+        """
+        return ResultsHistory(
+            np.array([], dtype="datetime64[s]"),
+            np.array([], dtype=np.int64),
+            np.array([], dtype=str),
+            np.array([], dtype=np.int16),
+            np.array([], dtype=np.int16),
+            np.array([], dtype=np.float64),
+        )
+
+    @staticmethod
+    def note_label(code: int) -> str:
+        """Get the display name of a note code.
+
+        Args:
+            code (int): The note code.
+
+        Returns:
+            str: The note name.
+        """
+        if code == ResultsHistory.UNKNOWN_NOTE:
+            return "Unknown"
+        return NoteIndex.DISPLAY_NAMES[code]
+
+    def note_accuracy(self) -> dict[str, tuple[int, int, float]]:
+        """Compute the number of attempts, correct answers and accuracy per tested note.
+
+        Returns:
+            dict[str, tuple[int, int, float]]: Tested note to (attempts, correct, accuracy).
+        """
+        attempts = np.bincount(self.tested_notes, minlength=self.NOTE_CODES)
+        correct = np.bincount(
+            self.tested_notes, weights=self.correct, minlength=self.NOTE_CODES
+        )
+        return {
+            self.note_label(code): (
+                int(attempts[code]),
+                int(correct[code]),
+                float(correct[code] / attempts[code]),
+            )
+            for code in np.flatnonzero(attempts)
+        }
+
+    def latency_percentiles(
+        self, percentiles: tuple[float, ...] = (50, 90, 99), correct_only: bool = True
+    ) -> dict[str, tuple[float, ...]]:
+        """Compute response time percentiles per tested note.
+
+        All notes are handled at once: results are sorted by (note, time) and the
+        percentiles are interpolated inside each note's slice.
+
+        Args:
+            percentiles (tuple[float, ...]): The percentiles to compute, 0-100.
+            correct_only (bool): Only use the times of correct answers.
+
+        Returns:
+            dict[str, tuple[float, ...]]: Tested note to its percentile values in seconds.
+        """
+        notes = self.tested_notes
+        times = self.time_taken
+        if correct_only:
+            notes = notes[self.correct]
+            times = times[self.correct]
+        if len(times) == 0:
+            return {}
+        order = np.lexsort((times, notes))
+        sorted_times = times[order]
+        counts = np.bincount(notes, minlength=self.NOTE_CODES)
+        present = np.flatnonzero(counts)
+        starts = (np.cumsum(counts) - counts)[present]
+        sizes = counts[present]
+
+        # Linear interpolation between the closest ranks, like np.percentile
+        fractions = np.asarray(percentiles, dtype=np.float64) / 100.0
+        positions = starts[:, None] + fractions[None, :] * (sizes[:, None] - 1)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, (starts + sizes - 1)[:, None])
+        weight = positions - lower
+        values = sorted_times[lower] * (1 - weight) + sorted_times[upper] * weight
+        return {
+            self.note_label(code): tuple(float(value) for value in row)
+            for code, row in zip(present, values)
+        }
+
+    def confusion_counts(self) -> dict[tuple[str, str], int]:
+        """Count how often each tested note was answered with each guessed note.
+
+        Returns:
+            dict[tuple[str, str], int]: (tested note, guessed note) to count.
+        """
+        matrix = np.bincount(
+            self.tested_notes.astype(np.int64) * self.NOTE_CODES + self.guessed_notes,
+            minlength=self.NOTE_CODES * self.NOTE_CODES,
+        )
+        return {
+            (
+                self.note_label(index // self.NOTE_CODES),
+                self.note_label(index % self.NOTE_CODES),
+            ): int(matrix[index])
+            for index in np.flatnonzero(matrix)
+        }
+
+    def daily_trend(self) -> list[tuple[str, int, float, float]]:
+        """Compute attempts, accuracy and mean response time per day.
+
+        Returns:
+            list[tuple[str, int, float, float]]: (day, attempts, accuracy, mean time) in date order.
+        """
+        days, day_codes = np.unique(
+            self.timestamps.astype("datetime64[D]"), return_inverse=True
+        )
+        return self._trend(days.astype(str), day_codes)
+
+    def session_trend(self) -> list[tuple[str, int, float, float]]:
+        """Compute attempts, accuracy and mean response time per session.
+
+        Returns:
+            list[tuple[str, int, float, float]]: (session ID, attempts, accuracy, mean time),
+                ordered by each session's first result.
+        """
+        if len(self) == 0:
+            return []
+        first_seen = np.full(len(self.sessions), np.iinfo(np.int64).max)
+        np.minimum.at(first_seen, self.session_codes, np.arange(len(self)))
+        trend = self._trend(self.sessions, self.session_codes)
+        return [trend[i] for i in np.argsort(first_seen, kind="stable")]
+
+    def _trend(
+        self, labels: np.ndarray, codes: np.ndarray
+    ) -> list[tuple[str, int, float, float]]:
+        """Aggregate attempts, accuracy and mean time per group code.
+
+        Args:
+            labels (np.ndarray): The label of each group.
+            codes (np.ndarray): The group code of each result.
+
+        Returns:
+            list[tuple[str, int, float, float]]: (label, attempts, accuracy, mean time) per group.
+        """
+        groups = len(labels)
+        attempts = np.bincount(codes, minlength=groups)
+        correct = np.bincount(codes, weights=self.correct, minlength=groups)
+        total_time = np.bincount(codes, weights=self.time_taken, minlength=groups)
+        return [
+            (
+                str(labels[i]),
+                int(attempts[i]),
+                float(correct[i] / attempts[i]),
+                float(total_time[i] / attempts[i]),
+            )
+            for i in range(groups)
+            if attempts[i]
+        ]
+
+
+def main() -> None:
+    """Command line entry point for printing results analytics."""
+    parser = argparse.ArgumentParser(description="Analyze the note results history.")
+    parser.add_argument("csv_file", nargs="?", default=Config.OUTPUT_CSV)
+    parser.add_argument(
+        "--report",
+        choices=["accuracy", "latency", "confusion", "daily", "sessions", "all"],
+        default="all",
+    )
+    parser.add_argument(
+        "--percentiles", type=float, nargs="+", default=[50.0, 90.0, 99.0]
+    )
+    args = parser.parse_args()
+
+    history = ResultsHistory.load(args.csv_file)
+    print(f"{len(history)} results from {args.csv_file}")
+    reports = (
+        ["accuracy", "latency", "confusion", "daily", "sessions"]
+        if args.report == "all"
+        else [args.report]
+    )
+
+    if "accuracy" in reports:
+        print("\nPer-note accuracy")
+        for note_name, (attempts, correct, accuracy) in history.note_accuracy().items():
+            print(f"  {note_name:>7}  {correct:>8}/{attempts:<8}  {accuracy:7.1%}")
+    if "latency" in reports:
+        header = "  ".join(f"p{p:g}".rjust(8) for p in args.percentiles)
+        print(f"\nLatency of correct answers (s)\n  {'note':>7}  {header}")
+        for note_name, values in history.latency_percentiles(
+            tuple(args.percentiles)
+        ).items():
+            print(f"  {note_name:>7}  " + "  ".join(f"{v:8.3f}" for v in values))
+    if "confusion" in reports:
+        print("\nMost frequent confusions (tested -> guessed)")
+        confusions = [
+            (count, tested, guessed)
+            for (tested, guessed), count in history.confusion_counts().items()
+            if tested != guessed
+        ]
+        for count, tested, guessed in sorted(confusions, reverse=True)[:20]:
+            print(f"  {tested:>7} -> {guessed:<7}  {count}")
+    if "daily" in reports:
+        print("\nPer-day trend")
+        for day, attempts, accuracy, mean_time in history.daily_trend():
+            print(f"  {day}  {attempts:>8}  {accuracy:7.1%}  {mean_time:7.3f}s")
+    if "sessions" in reports:
+        print("\nPer-session trend (last 20)")
+        for session, attempts, accuracy, mean_time in history.session_trend()[-20:]:
+            print(f"  {session}  {attempts:>4}  {accuracy:7.1%}  {mean_time:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
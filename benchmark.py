@@ -0,0 +1,399 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Iterator, Optional
+from unittest.mock import MagicMock, patch
+
+from config import Config
+from logger import BackgroundCSVLogger, CSVLogger, create_logger
+from note_image import NoteImageManager
+from note_index import NoteIndex
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+
+def measure(
+    func: Callable[[], object],
+    number: int,
+    repeat: int = 5,
+    setup: Optional[Callable[[], object]] = None,
+) -> float:
+    """Time a function and return the median time per call over several runs.
+
+    The garbage collector is paused during each run so that collections
+    triggered by earlier benchmarks do not land in the measurement.
+
+    Args:
+        func (Callable[[], object]): The function to time.
+        number (int): The number of calls per run.
+        repeat (int): The number of runs.
+        setup (Optional[Callable[[], object]]): Called before each run, untimed.
+
+    Returns:
+        float: The median time per call in seconds.
+    """
+    runs: list[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start_time = time.perf_counter()
+            for _ in range(number):
+                func()
+            runs.append((time.perf_counter() - start_time) / number)
+        finally:
+            gc.enable()
+    return statistics.median(runs)
+
+
+@contextlib.contextmanager
+def scratch_note_cache() -> Iterator[str]:
+    """Point the note image cache at an empty directory and bypass the atlas.
+
+    Yields:
+        str: The scratch cache directory.
+    """
+    original_dir = NoteImageManager.TEMP_DIR
+    original_atlas = NoteImageManager._atlas, NoteImageManager._atlas_loaded
+    scratch_dir = tempfile.mkdtemp(prefix="note_cache_")
+    NoteImageManager.TEMP_DIR = scratch_dir
+    NoteImageManager._atlas, NoteImageManager._atlas_loaded = None, True
+    NoteImageManager.pixel_cache.clear()
+    try:
+        yield scratch_dir
+    finally:
+        NoteImageManager.TEMP_DIR = original_dir
+        NoteImageManager._atlas, NoteImageManager._atlas_loaded = original_atlas
+        NoteImageManager.pixel_cache.clear()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def empty_directory(directory: str) -> None:
+    """Remove every file in a directory.
+
+    Args:
+        directory (str): The directory to empty.
+    """
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+
+
+def create_tk_root():
+    """Create a hidden Tk root window, if a display is available.
+
+    Returns:
+        tk.Tk | None: The root window, or None without a display.
+    """
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    return root
+
+
+def bench_render(note_count: int) -> dict[str, float]:
+    """Time render_note_image on empty caches and on the pixel cache.
+
+    Args:
+        note_count (int): The number of notes rendered in the cold benchmark.
+
+    Returns:
+        dict[str, float]: Seconds per note for the cold and warm case.
+    """
+    root = create_tk_root()
+    if root is None:
+        print("render: skipped, no display for PhotoImage")
+        return {}
+    note_names = list(NoteIndex.TESTED_NOTES)[:note_count]
+    try:
+        with scratch_note_cache() as scratch_dir:
+
+            def clear_caches() -> None:
+                NoteImageManager.pixel_cache.clear()
+                empty_directory(scratch_dir)
+
+            def render_all() -> None:
+                for note_name in note_names:
+                    NoteImageManager.render_note_image(note_name)
+
+            cold = measure(render_all, 1, repeat=3, setup=clear_caches) / len(
+                note_names
+            )
+            warm = measure(lambda: NoteImageManager.render_note_image("C4"), 1000)
+            pixels = measure(lambda: NoteImageManager.get_note_pixels("C4"), 10000)
+    finally:
+        root.destroy()
+    return {
+        "render_note_image.cold": cold,
+        "render_note_image.warm": warm,
+        "get_note_pixels.warm": pixels,
+    }
+
+
+def bench_regenerate() -> dict[str, float]:
+    """Time regenerate_missing_notes with an empty note cache.
+
+    Returns:
+        dict[str, float]: Seconds per full regeneration.
+    """
+    with scratch_note_cache() as scratch_dir, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            elapsed = measure(
+                NoteImageManager.regenerate_missing_notes,
+                1,
+                repeat=1,
+                setup=lambda: empty_directory(scratch_dir),
+            )
+    return {"regenerate_missing_notes.empty": elapsed}
+
+
+def bench_midi_input(events: int) -> dict[str, float]:
+    """Time note-on handling from the MIDI callback to the answer, with mocked widgets.
+
+    Args:
+        events (int): The number of note-on messages per run.
+
+    Returns:
+        dict[str, float]: Seconds per note-on message.
+    """
+    from trainer import NoteTrainer
+
+    with tempfile.TemporaryDirectory() as scratch_dir, contextlib.ExitStack() as stack:
+        results_file = os.path.join(scratch_dir, "results.csv")
+        stack.enter_context(patch("trainer.tk"))
+        stack.enter_context(patch("trainer.MidiPortManager"))
+        image_manager = stack.enter_context(patch("trainer.NoteImageManager"))
+        image_manager.get_missing_notes.return_value = []
+        stack.enter_context(
+            patch("trainer.create_result_store", lambda: create_logger(results_file))
+        )
+        stack.enter_context(patch.object(Config, "METRICS_ENABLED", False))
+        app = NoteTrainer(MagicMock())
+
+        tested_note = NoteIndex.TESTED_NOTES[0]
+        # Wrong answers keep the same note on screen, so no new note is rendered
+        message = [0x90, NoteIndex.NAME_TO_MIDI[tested_note] + 1, 100]
+
+        def handle_note_on() -> None:
+            app._midi_callback((message, 0.001))
+            app._process_midi_events()
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            app.session.show_note(tested_note)
+            per_event = measure(handle_note_on, events)
+            app._on_close()
+    return {"midi_note_on": per_event}
+
+
+def bench_logging(rows: int, slow_dir: Optional[str]) -> dict[str, float]:
+    """Time log_result for the synchronous and background CSV loggers.
+
+    Args:
+        rows (int): The number of rows per run.
+        slow_dir (Optional[str]): A directory on a slow (e.g. network) file system.
+
+    Returns:
+        dict[str, float]: Seconds per row, including draining on close for the background logger.
+    """
+    results: dict[str, float] = {}
+    directories = {"local": tempfile.mkdtemp(prefix="bench_log_")}
+    if slow_dir is not None:
+        directories["slow"] = tempfile.mkdtemp(prefix="bench_log_", dir=slow_dir)
+    try:
+        for location, directory in directories.items():
+            output_file = os.path.join(directory, "results.csv")
+            for name, logger_class in (
+                ("sync", CSVLogger),
+                ("background", BackgroundCSVLogger),
+            ):
+                logger = None
+
+                def open_logger() -> None:
+                    nonlocal logger
+                    if os.path.exists(output_file):
+                        os.remove(output_file)
+                    logger = logger_class(output_file)
+
+                def log_rows() -> None:
+                    for _ in range(rows):
+                        logger.log_result(
+                            "01J0000000000000000000000",
+                            "C4",
+                            61,
+                            0.5,
+                            "2024-01-01 10:00:00",
+                        )
+                    logger.close()
+
+                results[f"log_result.{name}.{location}"] = (
+                    measure(log_rows, 1, repeat=3, setup=open_logger) / rows
+                )
+    finally:
+        for directory in directories.values():
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def bench_startup() -> dict[str, float]:
+    """Time constructing a full NoteTrainer window, up to its first drawn frame.
+
+    Returns:
+        dict[str, float]: Seconds per construction.
+    """
+    from trainer import NoteTrainer
+
+    probe = create_tk_root()
+    if probe is None:
+        print("startup: skipped, no display")
+        return {}
+    probe.destroy()
+    runs: list[float] = []
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        results_file = os.path.join(scratch_dir, "results.csv")
+        with patch(
+            "trainer.create_result_store", lambda: create_logger(results_file)
+        ), patch.object(Config, "METRICS_ENABLED", False):
+            for _ in range(3):
+                root = create_tk_root()
+                start_time = time.perf_counter()
+                app = NoteTrainer(root)
+                root.update()
+                runs.append(time.perf_counter() - start_time)
+                app._on_close()
+    return {"note_trainer.construct": statistics.median(runs)}
+
+
+def environment() -> dict[str, str]:
+    """Describe the machine the benchmarks ran on.
+
+    Returns:
+        dict[str, str]: Python version, platform and rendering backend.
+    """
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "render_backend": Config.RENDER_BACKEND,
+    }
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float
+) -> list[str]:
+    """Print the results next to the baseline and find regressions.
+
+    Args:
+        results (dict[str, float]): The current seconds per operation.
+        baseline (dict[str, float]): The baseline seconds per operation.
+        threshold (float): The allowed slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        list[str]: The names of the benchmarks that regressed.
+    """
+    regressions: list[str] = []
+    print(f"{'Benchmark':40} {'Current':>12} {'Baseline':>12} {'Change':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:40} {current * 1e6:10.1f}us {'-':>12} {'new':>8}")
+            continue
+        change = current / previous - 1 if previous > 0 else 0.0
+        status = ""
+        if change > threshold:
+            regressions.append(name)
+            status = "  REGRESSION"
+        print(
+            f"{name:40} {current * 1e6:10.1f}us {previous * 1e6:10.1f}us "
+            f"{change:+8.1%}{status}"
+        )
+    return regressions
+
+
+def main() -> None:
+    """Run the benchmarks and compare them against the stored baseline."""
+    suites = ("render", "regenerate", "midi", "logging", "startup")
+    parser = argparse.ArgumentParser(
+        description="Benchmark rendering, input handling, logging and startup."
+    )
+    parser.add_argument(
+        "--only", nargs="+", choices=suites, default=suites, help="suites to run"
+    )
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="slowdown that counts as a regression (default: 0.2 = 20%%)",
+    )
+    parser.add_argument("--notes", type=int, default=5, help="notes to cold-render")
+    parser.add_argument("--events", type=int, default=5000, help="note-ons per run")
+    parser.add_argument("--rows", type=int, default=5000, help="rows logged per run")
+    parser.add_argument(
+        "--slow-dir", help="directory on a slow file system to benchmark logging on"
+    )
+    args = parser.parse_args()
+
+    benchmarks: dict[str, Callable[[], dict[str, float]]] = {
+        "render": lambda: bench_render(args.notes),
+        "regenerate": bench_regenerate,
+        "midi": lambda: bench_midi_input(args.events),
+        "logging": lambda: bench_logging(args.rows, args.slow_dir),
+        "startup": bench_startup,
+    }
+    results: dict[str, float] = {}
+    for suite in suites:
+        if suite not in args.only:
+            continue
+        try:
+            results.update(benchmarks[suite]())
+        except Exception as e:
+            # e.g. no MuseScore for the music21 backend; the other suites still run
+            print(f"{suite}: skipped, {type(e).__name__}: {e}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(
+                {"environment": environment(), "results": results},
+                baseline_file,
+                indent=2,
+            )
+        compare(results, {}, args.threshold)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    baseline: dict[str, float] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            stored = json.load(baseline_file)
+        baseline = stored.get("results", {})
+        if stored.get("environment") != environment():
+            print(
+                "Warning: the baseline was recorded on a different environment, "
+                "comparisons may not be meaningful"
+            )
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed beyond {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
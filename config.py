@@ -3,147 +3,83 @@ class Config:
         r"\\wsl.localhost\Debian\home\genzo\system\monitoring-stack\static\results.csv"
     )
 
-    # Notes that will be tested/displayed
-    TESTED_NOTES: dict[str, int] = {
-        "C2": 36,
-        "C#2": 37,
-        "D2": 38,
-        "D#2": 39,
-        "E2": 40,
-        "F2": 41,
-        "F#2": 42,
-        "G2": 43,
-        "G#2": 44,
-        "A2": 45,
-        "A#2": 46,
-        "B2": 47,
-        "C3": 48,
-        "C#3": 49,
-        "D3": 50,
-        "D#3": 51,
-        "E3": 52,
-        "F3": 53,
-        "F#3": 54,
-        "G3": 55,
-        "G#3": 56,
-        "A3": 57,
-        "A#3": 58,
-        "B3": 59,
-        "C4": 60,
-        "C#4": 61,
-        "D4": 62,
-        "D#4": 63,
-        "E4": 64,
-        "F4": 65,
-        "F#4": 66,
-        "G4": 67,
-        "G#4": 68,
-        "A4": 69,
-        "A#4": 70,
-        "B4": 71,
-        "C5": 72,
-        "C#5": 73,
-        "D5": 74,
-        "D#5": 75,
-        "E5": 76,
-        "F5": 77,
-        "F#5": 78,
-        "G5": 79,
-        "G#5": 80,
-        "A5": 81,
-        "A#5": 82,
-        "B5": 83,
-        "C6": 84,
-    }
-
-    # All playable notes for input validation
-    NOTE_TO_MIDI: dict[str, int] = {
-        "A0": 21,
-        "A#0": 22,
-        "B0": 23,
-        "C1": 24,
-        "C#1": 25,
-        "D1": 26,
-        "D#1": 27,
-        "E1": 28,
-        "F1": 29,
-        "F#1": 30,
-        "G1": 31,
-        "G#1": 32,
-        "A1": 33,
-        "A#1": 34,
-        "B1": 35,
-        "C2": 36,
-        "C#2": 37,
-        "D2": 38,
-        "D#2": 39,
-        "E2": 40,
-        "F2": 41,
-        "F#2": 42,
-        "G2": 43,
-        "G#2": 44,
-        "A2": 45,
-        "A#2": 46,
-        "B2": 47,
-        "C3": 48,
-        "C#3": 49,
-        "D3": 50,
-        "D#3": 51,
-        "E3": 52,
-        "F3": 53,
-        "F#3": 54,
-        "G3": 55,
-        "G#3": 56,
-        "A3": 57,
-        "A#3": 58,
-        "B3": 59,
-        "C4": 60,
-        "C#4": 61,
-        "D4": 62,
-        "D#4": 63,
-        "E4": 64,
-        "F4": 65,
-        "F#4": 66,
-        "G4": 67,
-        "G#4": 68,
-        "A4": 69,
-        "A#4": 70,
-        "B4": 71,
-        "C5": 72,
-        "C#5": 73,
-        "D5": 74,
-        "D#5": 75,
-        "E5": 76,
-        "F5": 77,
-        "F#5": 78,
-        "G5": 79,
-        "G#5": 80,
-        "A5": 81,
-        "A#5": 82,
-        "B5": 83,
-        "C6": 84,
-        "C#6": 85,
-        "D6": 86,
-        "D#6": 87,
-        "E6": 88,
-        "F6": 89,
-        "F#6": 90,
-        "G6": 91,
-        "G#6": 92,
-        "A6": 93,
-        "A#6": 94,
-        "B6": 95,
-        "C7": 96,
-        "C#7": 97,
-        "D7": 98,
-        "D#7": 99,
-        "E7": 100,
-        "F7": 101,
-        "F#7": 102,
-        "G7": 103,
-        "G#7": 104,
-        "A7": 105,
-        "A#7": 106,
-        "B7": 107,
-        "C8": 108,
-    }
+    # Maximum number of UI frames per second; widget updates are applied once per frame
+    UI_FRAME_RATE: int = 60
+
+    # How often the Tk thread drains queued MIDI messages
+    MIDI_POLL_INTERVAL_MS: int = 5
+
+    # The MIDI port watcher polls at the minimum interval after a change and backs off to the maximum
+    MIDI_WATCH_MIN_INTERVAL: float = 0.5  # seconds
+    MIDI_WATCH_MAX_INTERVAL: float = 4.0  # seconds
+
+    # Per-stage latency metrics, exported next to OUTPUT_CSV as "prometheus" text or "csv" rows
+    METRICS_ENABLED: bool = True
+    METRICS_FORMAT: str = "prometheus"
+    METRICS_EXPORT_INTERVAL: float = 15.0  # seconds
+
+    # Multi-station mode (main.py --stations): ports trained at once, matched by substring;
+    # empty means every available port gets a station
+    STATION_PORTS: list[str] = []
+    STATION_COLUMNS: int = 3
+
+    # Relative error of the per-note reaction time percentiles in the stats panel
+    STATS_SKETCH_ACCURACY: float = 0.02
+
+    # scan_results.py: target size of the line-aligned chunks a large results CSV is split into
+    SCAN_CHUNK_SIZE: int = 64 * 1024 * 1024  # bytes
+
+    # tail_export.py: appended rows are read and parsed in blocks of at most this size
+    TAIL_BLOCK_SIZE: int = 8 * 1024 * 1024  # bytes
+
+    # Local HTTP endpoint with per-note aggregates and recent results (/results JSON, /metrics
+    # Prometheus), served from memory by the trainer or by results_server.py; loopback only
+    RESULTS_SERVER_ENABLED: bool = False
+    RESULTS_SERVER_HOST: str = "127.0.0.1"
+    RESULTS_SERVER_PORT: int = 8765
+    RESULTS_SERVER_RECENT: int = 100
+    # How often results_server.py reads rows appended to the results CSV
+    RESULTS_SERVER_POLL_INTERVAL: float = 1.0  # seconds
+
+    # Result storage backend: "csv" (OUTPUT_CSV) or "sqlite" (OUTPUT_DB)
+    STORAGE_BACKEND: str = "csv"
+    # SQLite's WAL mode needs a local file system, so keep the database off network shares
+    OUTPUT_DB: str = "results.db"
+
+    # Result logging: "sync" writes every row inline, "background" batches rows on a writer thread
+    LOG_MODE: str = "background"
+    LOG_BATCH_SIZE: int = 32
+    LOG_FLUSH_INTERVAL: float = 1.0  # seconds
+    # After each batch: "none" (leave buffered), "flush" (hand to the OS) or "fsync" (force to disk)
+    LOG_DURABILITY: str = "flush"
+    LOG_QUEUE_SIZE: int = 10000
+
+    # Note rendering backend: "music21" (MuseScore) or "pillow" (built-in, no MuseScore)
+    RENDER_BACKEND: str = "music21"
+
+    # Decoded note images kept in memory (any thread), as palette bytes within this budget
+    PIXEL_CACHE_BYTES: int = 16 * 1024 * 1024
+    # Tk PhotoImages kept per window (Tk thread only)
+    PHOTO_CACHE_SIZE: int = 128
+
+    # Notes picked and prepared ahead of time, so a new note is shown as soon as one is answered
+    PREFETCH_DEPTH: int = 2
+
+    # Concurrent MuseScore runs for notes missing from the cache; notes about to be shown go first
+    RENDER_WORKERS: int = 2
+
+    # Render all missing note images with a single engraver run
+    BATCH_RENDER: bool = True
+
+    # Notes that will be tested/displayed, as an inclusive MIDI range (C2-C6)
+    TESTED_NOTE_RANGE: tuple[int, int] = (36, 84)
+
+    # All playable notes for input validation, as an inclusive MIDI range (A0-C8)
+    PLAYABLE_NOTE_RANGE: tuple[int, int] = (21, 108)
+
+    # Adaptive note scheduling: notes with recent errors and slow answers are shown more often
+    # Weight of the newest answer in the running averages
+    SCHEDULER_SMOOTHING: float = 0.2
+    SCHEDULER_ERROR_WEIGHT: float = 4.0
+    SCHEDULER_TIME_WEIGHT: float = 1.0
+    SCHEDULER_TARGET_TIME: float = 2.0  # seconds
@@ -0,0 +1,82 @@
+import threading
+import tkinter as tk
+from typing import Any, Callable, Optional
+
+from config import Config
+
+
+class FrameScheduler:
+    """Apply widget updates on the Tk thread, at most once per frame.
+
+    Any thread may post an update under a key. Updates are collected until the
+    next frame, where each key is applied once: a later update replaces a
+    pending update with the same key, so a burst of changes to one widget
+    costs a single redraw. Frame callbacks run after the updates on every frame.
+    A single `after` timer drives all of it.
+    """
+
+    def __init__(self, master: tk.Misc, frame_rate: int = Config.UI_FRAME_RATE):
+        """Initialize the scheduler. Call start() to begin running frames.
+
+        Args:
+            master (tk.Misc): The widget whose event loop runs the frames.
+            frame_rate (int): The maximum number of frames per second.
+        """
+        self.master: tk.Misc = master
+        self.frame_interval_ms: int = max(1, round(1000 / frame_rate))
+        self._pending: dict[str, tuple[Callable[..., Any], tuple, dict]] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._frame_callbacks: list[Callable[[], None]] = []
+        self._after_id: Optional[str] = None
+
+    def post(self, key: str, callback: Callable[..., Any], *args, **kwargs) -> None:
+        """Queue a widget update for the next frame. Safe to call from any thread.
+
+        Args:
+            key (str): Identifies what is updated; replaces a pending update with the same key.
+            callback (Callable[..., Any]): The update, called on the Tk thread.
+            *args: Positional arguments for the callback.
+            **kwargs: Keyword arguments for the callback.
+        """
+        with self._lock:
+            # Re-insert so that updates are applied in the order they were last posted
+            self._pending.pop(key, None)
+            self._pending[key] = (callback, args, kwargs)
+
+    def every_frame(self, callback: Callable[[], None]) -> None:
+        """Run a callback on every frame, after the posted updates.
+
+        Args:
+            callback (Callable[[], None]): The callback.
+        """
+        self._frame_callbacks.append(callback)
+
+    def start(self) -> None:
+        """Start running frames."""
+        if self._after_id is None:
+            self._tick()
+
+    def stop(self) -> None:
+        """Stop running frames. Pending updates are discarded."""
+        if self._after_id is not None:
+            self.master.after_cancel(self._after_id)
+            self._after_id = None
+        with self._lock:
+            self._pending.clear()
+
+    def run_frame(self) -> None:
+        """Apply all pending updates and run the frame callbacks."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for key, (callback, args, kwargs) in pending.items():
+            try:
+                callback(*args, **kwargs)
+            except Exception as e:
+                print(f"Failed to apply UI update '{key}': {e}")
+        for callback in self._frame_callbacks:
+            callback()
+
+    def _tick(self) -> None:
+        """Run a frame and schedule the next one."""
+        self.run_frame()
+        self._after_id = self.master.after(self.frame_interval_ms, self._tick)
@@ -0,0 +1,216 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+from PIL import Image, ImageTk
+
+from config import Config
+
+
+class PixelCache:
+    """Byte-budgeted LRU cache of decoded note images. Safe to use from any thread.
+
+    Images are stored as palette bytes: one byte per pixel plus an RGBA palette
+    of the colors in use, a quarter of the size of RGBA pixels. Note images use
+    far fewer than 256 colors, so the palette is exact; images with more colors
+    are quantized.
+    """
+
+    def __init__(self, max_bytes: int = Config.PIXEL_CACHE_BYTES):
+        """Initialize an empty cache.
+
+        Args:
+            max_bytes (int): The budget for the stored pixel and palette bytes.
+        """
+        self.max_bytes: int = max_bytes
+        self.resident_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        # note name -> (mode, size, pixel bytes, RGBA palette bytes)
+        self._entries: OrderedDict[str, tuple[str, tuple[int, int], bytes, bytes]] = (
+            OrderedDict()
+        )
+        self._lock: threading.Lock = threading.Lock()
+
+    def __contains__(self, note_name: str) -> bool:
+        """Check whether a note is cached, without counting a hit or miss."""
+        with self._lock:
+            return note_name in self._entries
+
+    def get(self, note_name: str) -> Optional[Image.Image]:
+        """Get a cached image.
+
+        Args:
+            note_name (str): The name of the note.
+
+        Returns:
+            Optional[Image.Image]: A new image in the mode it was stored with, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(note_name)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(note_name)
+            self.hits += 1
+        mode, size, pixels, palette = entry
+        image = Image.frombytes("P", size, pixels)
+        image.putpalette(palette, rawmode="RGBA")
+        return image.convert(mode)
+
+    def put(self, note_name: str, image: Image.Image) -> None:
+        """Store an image, evicting the least recently used ones beyond the budget.
+
+        Args:
+            note_name (str): The name of the note.
+            image (Image.Image): The image to store.
+        """
+        pixels, palette = self.compact(image)
+        size = len(pixels) + len(palette)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(note_name, None)
+            if previous is not None:
+                self.resident_bytes -= len(previous[2]) + len(previous[3])
+            self._entries[note_name] = (image.mode, image.size, pixels, palette)
+            self.resident_bytes += size
+            while self.resident_bytes > self.max_bytes:
+                _, (_, _, old_pixels, old_palette) = self._entries.popitem(last=False)
+                self.resident_bytes -= len(old_pixels) + len(old_palette)
+                self.evictions += 1
+
+    @staticmethod
+    def compact(image: Image.Image) -> tuple[bytes, bytes]:
+        """Convert an image to palette indices and an RGBA palette.
+
+        Args:
+            image (Image.Image): The image.
+
+        Returns:
+            tuple[bytes, bytes]: One index byte per pixel and the RGBA palette bytes.
+        """
+        rgba = np.asarray(image.convert("RGBA"))
+        colors, indices = np.unique(
+            rgba.reshape(-1, 4).view(np.uint32), return_inverse=True
+        )
+        if len(colors) <= 256:
+            return indices.astype(np.uint8).tobytes(), colors.tobytes()
+        quantized = image.convert("RGBA").quantize(
+            256, method=Image.Quantize.FASTOCTREE
+        )
+        return quantized.tobytes(), bytes(quantized.getpalette(rawmode="RGBA"))
+
+    def clear(self) -> None:
+        """Remove every image. The counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+
+    def stats(self) -> dict[str, float]:
+        """Get the cache counters.
+
+        Returns:
+            dict[str, float]: Entries, resident bytes, hits, misses and evictions.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "resident_bytes": self.resident_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class PhotoImageCache:
+    """LRU cache of Tk PhotoImages, used only on the thread that runs Tk.
+
+    PhotoImages belong to a Tk interpreter and must not be created or touched
+    from other threads, so the cache refuses to be used from any thread other
+    than the first one that used it.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], ImageTk.PhotoImage],
+        max_entries: int = Config.PHOTO_CACHE_SIZE,
+    ):
+        """Initialize an empty cache.
+
+        Args:
+            loader (Callable[[str], ImageTk.PhotoImage]): Creates the PhotoImage of a note on a miss.
+            max_entries (int): The maximum number of PhotoImages kept.
+        """
+        self.loader: Callable[[str], ImageTk.PhotoImage] = loader
+        self.max_entries: int = max_entries
+        self.resident_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict[str, ImageTk.PhotoImage] = OrderedDict()
+        self._owner: Optional[int] = None
+
+    def get(self, note_name: str) -> ImageTk.PhotoImage:
+        """Get the PhotoImage of a note, creating it on a miss.
+
+        Args:
+            note_name (str): The name of the note.
+
+        Returns:
+            ImageTk.PhotoImage: The PhotoImage.
+
+        Raises:
+            RuntimeError: If called from a thread other than the Tk thread.
+        """
+        thread = threading.get_ident()
+        if self._owner is None:
+            self._owner = thread
+        elif thread != self._owner:
+            raise RuntimeError("PhotoImageCache used outside the Tk thread")
+
+        photo_image = self._entries.get(note_name)
+        if photo_image is not None:
+            self._entries.move_to_end(note_name)
+            self.hits += 1
+            return photo_image
+        self.misses += 1
+        photo_image = self.loader(note_name)
+        self._entries[note_name] = photo_image
+        self.resident_bytes += self._photo_bytes(photo_image)
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.resident_bytes -= self._photo_bytes(evicted)
+            self.evictions += 1
+        return photo_image
+
+    @staticmethod
+    def _photo_bytes(photo_image: ImageTk.PhotoImage) -> int:
+        """Estimate the memory Tk holds for a PhotoImage (32 bits per pixel).
+
+        Args:
+            photo_image (ImageTk.PhotoImage): The PhotoImage.
+
+        Returns:
+            int: The estimated size in bytes.
+        """
+        try:
+            return photo_image.width() * photo_image.height() * 4
+        except Exception:
+            return 0
+
+    def stats(self) -> dict[str, float]:
+        """Get the cache counters.
+
+        Returns:
+            dict[str, float]: Entries, estimated resident bytes, hits, misses and evictions.
+        """
+        return {
+            "entries": len(self._entries),
+            "resident_bytes": self.resident_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,8 +1,60 @@
 import csv
 import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import IO, Iterator, Optional
 
+from config import Config
+from metrics import metrics
+from note_index import NoteIndex
 
-class CSVLogger:
+
+class ResultStore(ABC):
+    """Destination for note test results.
+
+    Every store keeps the same fields: timestamp, session ID, tested note,
+    guessed note, time taken (reaction time) and display latency.
+    """
+
+    @abstractmethod
+    def log_result(
+        self,
+        session_id: str,
+        tested_note: str,
+        guessed_note: str | int,
+        time_taken: float,
+        timestamp: str,
+        display_latency: Optional[float] = None,
+    ) -> None:
+        """Store the result of a note test.
+
+        Args:
+            session_id (str): The session ID.
+            tested_note (str): The tested note.
+            guessed_note (str | int): The guessed note, as a name or MIDI number.
+            time_taken (float): The time taken to guess the note, from the moment it was displayed.
+            timestamp (str): The timestamp of the result.
+            display_latency (Optional[float]): The time between requesting and displaying the note.
+        """
+
+    def read_results(self) -> Iterator[tuple[str, str, float]]:
+        """Stream the results stored so far, oldest first.
+
+        Only results stored before the call are returned, even if the iterator
+        is consumed later, so they can be combined with results recorded since.
+
+        Returns:
+            Iterator[tuple[str, str, float]]: Tested note, guessed note and time taken.
+        """
+        return iter(())
+
+    def close(self) -> None:
+        """Write any pending results and release the store's resources."""
+
+
+class CSVLogger(ResultStore):
     def __init__(self, output_file: str):
         """Initialize the CSV logger with the specified output file.
 
@@ -16,16 +68,57 @@ class CSVLogger:
             "Tested Note",
             "Guessed Note",
             "Time Taken (s)",
+            "Display Latency (s)",
         ]
         self.setup_csv()
 
     def setup_csv(self) -> None:
-        """Set up the CSV file by writing headers if the file is empty or doesn't exist."""
+        """Set up the CSV file by writing headers if the file is empty or doesn't exist.
+
+        A file written before a column was added gets its header upgraded.
+        """
         if (
             not os.path.isfile(self.output_file)
             or os.path.getsize(self.output_file) == 0
         ):
             self._write_headers()
+            return
+        with open(self.output_file, newline="") as csvfile:
+            existing_headers = next(csv.reader(csvfile), [])
+        if (
+            len(existing_headers) < len(self.headers)
+            and existing_headers == self.headers[: len(existing_headers)]
+        ):
+            self._upgrade_headers(len(existing_headers))
+
+    def _upgrade_headers(self, existing_columns: int) -> None:
+        """Rewrite an older CSV file with the current headers, padding old rows.
+
+        The file is copied row by row to a temporary file which then replaces it.
+        This reads the whole history once, so its duration is reported.
+
+        Args:
+            existing_columns (int): The number of columns in the existing file.
+        """
+        start_time = time.perf_counter()
+        rows = 0
+        padding = [""] * (len(self.headers) - existing_columns)
+        temporary_file = f"{self.output_file}.upgrade"
+        with open(self.output_file, newline="") as source, open(
+            temporary_file, mode="w", newline=""
+        ) as target:
+            reader = csv.reader(source)
+            writer = csv.writer(target)
+            next(reader, None)
+            writer.writerow(self.headers)
+            for row in reader:
+                writer.writerow(row + padding if row else row)
+                rows += 1
+        os.replace(temporary_file, self.output_file)
+        print(
+            f"Upgraded the headers of {self.output_file} ({rows} rows) in "
+            f"{(time.perf_counter() - start_time) * 1000:.0f} ms"
+        )
 
     def _write_headers(self) -> None:
         """Write the headers to the CSV file."""
@@ -37,19 +130,29 @@ class CSVLogger:
         self,
         session_id: str,
         tested_note: str,
-        guessed_note: str,
+        guessed_note: str | int,
         time_taken: float,
         timestamp: str,
+        display_latency: Optional[float] = None,
     ) -> None:
         """Log the result of a note test to the CSV file.
 
         Args:
             session_id (str): The session ID.
             tested_note (str): The tested note.
-            guessed_note (str): The guessed note.
-            time_taken (float): The time taken to guess the note.
+            guessed_note (str | int): The guessed note, as a name or MIDI number.
+            time_taken (float): The time taken to guess the note, from the moment it was displayed.
             timestamp (str): The timestamp of the result.
+            display_latency (Optional[float]): The time between requesting and displaying the note.
         """
+        row = self.format_row(
+            session_id,
+            tested_note,
+            guessed_note,
+            time_taken,
+            timestamp,
+            display_latency,
+        )
         if (
             not os.path.isfile(self.output_file)
             or os.path.getsize(self.output_file) == 0
@@ -58,14 +161,314 @@ class CSVLogger:
         try:
             with open(self.output_file, mode="a", newline="") as csvfile:
                 writer = csv.writer(csvfile)
-                writer.writerow(
-                    [
-                        timestamp,
-                        session_id,
-                        tested_note,
-                        guessed_note,
-                        f"{time_taken:.3f}",
-                    ]
-                )
+                writer.writerow(row)
         except Exception as e:
             raise RuntimeError(f"Failed to log result to {self.output_file}") from e
+
+    def read_results(self) -> Iterator[tuple[str, str, float]]:
+        """Stream the results in the CSV file up to its current end, row by row.
+
+        Returns:
+            Iterator[tuple[str, str, float]]: Tested note, guessed note and time taken.
+        """
+        end = (
+            os.path.getsize(self.output_file) if os.path.isfile(self.output_file) else 0
+        )
+        return self._read_rows(end)
+
+    def _read_rows(self, end: int) -> Iterator[tuple[str, str, float]]:
+        """Parse the rows in the first `end` bytes of the CSV file.
+
+        Args:
+            end (int): The file size when the read was requested.
+
+        Yields:
+            tuple[str, str, float]: Tested note, guessed note and time taken.
+        """
+        if end == 0:
+            return
+
+        def lines(csvfile: IO[bytes]) -> Iterator[str]:
+            position = 0
+            for line in csvfile:
+                position += len(line)
+                if position > end:
+                    return
+                yield line.decode()
+
+        with open(self.output_file, "rb") as csvfile:
+            reader = csv.reader(lines(csvfile))
+            next(reader, None)  # Skip the header
+            for row in reader:
+                if len(row) < 5:
+                    continue
+                try:
+                    yield row[2], row[3], float(row[4])
+                except ValueError:
+                    continue
+
+    @staticmethod
+    def format_row(
+        session_id: str,
+        tested_note: str,
+        guessed_note: str | int,
+        time_taken: float,
+        timestamp: str,
+        display_latency: Optional[float] = None,
+    ) -> list[str]:
+        """Format a note test result as a CSV row.
+
+        Args:
+            session_id (str): The session ID.
+            tested_note (str): The tested note.
+            guessed_note (str | int): The guessed note, as a name or MIDI number.
+            time_taken (float): The time taken to guess the note, from the moment it was displayed.
+            timestamp (str): The timestamp of the result.
+            display_latency (Optional[float]): The time between requesting and displaying the note.
+
+        Returns:
+            list[str]: The CSV row.
+        """
+        if isinstance(guessed_note, int):
+            guessed_note = NoteIndex.display_name(guessed_note)
+        return [
+            timestamp,
+            session_id,
+            tested_note,
+            guessed_note,
+            f"{time_taken:.3f}",
+            "" if display_latency is None else f"{display_latency:.3f}",
+        ]
+
+
+class BackgroundCSVLogger(CSVLogger):
+    """CSV logger that hands rows to a writer thread instead of writing them inline.
+
+    Rows go onto a bounded queue. The writer thread keeps the file open and
+    writes them in batches once `batch_size` rows are pending or
+    `flush_interval` seconds have passed since the first pending row.
+
+    The file is set up on the writer thread, so upgrading the headers of a
+    large older file does not delay startup; rows logged meanwhile wait in
+    the queue. A failed write is retried after another `flush_interval`. While writes
+    fail, at most `queue_size` rows are kept pending; further rows are dropped
+    and counted in `dropped_rows`. Rows that could not be written by close()
+    are counted in `unwritten_rows`.
+    """
+
+    DURABILITY_POLICIES: tuple[str, ...] = ("none", "flush", "fsync")
+
+    def __init__(
+        self,
+        output_file: str,
+        batch_size: int = Config.LOG_BATCH_SIZE,
+        flush_interval: float = Config.LOG_FLUSH_INTERVAL,
+        durability: str = Config.LOG_DURABILITY,
+        queue_size: int = Config.LOG_QUEUE_SIZE,
+    ):
+        """Initialize the logger and start its writer thread.
+
+        Args:
+            output_file (str): The path to the output CSV file.
+            batch_size (int): The number of rows that triggers a write.
+            flush_interval (float): The maximum time in seconds a row waits before being written.
+            durability (str): What happens after each batch is written: "none" leaves
+                it in the file buffer, "flush" hands it to the OS and "fsync" also
+                forces it to disk.
+            queue_size (int): The maximum number of rows waiting to be written, both
+                in the queue and in the writer's pending batch.
+        """
+        if durability not in self.DURABILITY_POLICIES:
+            raise ValueError(
+                f"Unknown durability policy '{durability}', "
+                f"expected one of {', '.join(self.DURABILITY_POLICIES)}"
+            )
+        super().__init__(output_file)
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.durability: str = durability
+        self.max_pending: int = queue_size
+        self.dropped_rows: int = 0
+        self.unwritten_rows: int = 0
+        # Rows are dropped by both the logging and the writer thread
+        self._dropped_lock: threading.Lock = threading.Lock()
+        self._queue: queue.Queue[Optional[list[str]]] = queue.Queue(maxsize=queue_size)
+        self._file: Optional[IO[str]] = None
+        self._writer_thread: threading.Thread = threading.Thread(
+            target=self._run_writer, name="csv-writer", daemon=True
+        )
+        self._writer_thread.start()
+
+    def setup_csv(self) -> None:
+        """Leave the file untouched; the writer thread sets it up before its first write."""
+
+    def log_result(
+        self,
+        session_id: str,
+        tested_note: str,
+        guessed_note: str | int,
+        time_taken: float,
+        timestamp: str,
+        display_latency: Optional[float] = None,
+    ) -> None:
+        """Queue the result of a note test for the writer thread. Never blocks.
+
+        Args:
+            session_id (str): The session ID.
+            tested_note (str): The tested note.
+            guessed_note (str | int): The guessed note, as a name or MIDI number.
+            time_taken (float): The time taken to guess the note, from the moment it was displayed.
+            timestamp (str): The timestamp of the result.
+            display_latency (Optional[float]): The time between requesting and displaying the note.
+        """
+        row = self.format_row(
+            session_id,
+            tested_note,
+            guessed_note,
+            time_taken,
+            timestamp,
+            display_latency,
+        )
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._drop_row("Result queue full")
+
+    def _drop_row(self, reason: str) -> None:
+        """Count and report a row that will not be written.
+
+        Args:
+            reason (str): Why the row is dropped.
+        """
+        with self._dropped_lock:
+            self.dropped_rows += 1
+            dropped_rows = self.dropped_rows
+        print(
+            f"{reason}, dropped a row for {self.output_file} "
+            f"({dropped_rows} dropped so far)"
+        )
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write all queued rows and stop the writer thread.
+
+        Args:
+            timeout (float): The maximum time in seconds to wait for the queue to drain.
+        """
+        if not self._writer_thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._writer_thread.join(timeout)
+        if self._writer_thread.is_alive():
+            print(
+                f"Timed out writing results to {self.output_file}, "
+                f"about {self._queue.qsize()} queued rows were not written"
+            )
+
+    def _run_writer(self) -> None:
+        """Set up the file, then collect queued rows into batches and write them until closed."""
+        try:
+            CSVLogger.setup_csv(self)
+        except OSError as e:
+            print(f"Failed to set up {self.output_file}: {e}")
+        pending: list[list[str]] = []
+        deadline: Optional[float] = None
+        # After a failed write, wait for the deadline even if a full batch is pending
+        retrying = False
+        closing = False
+        while not closing:
+            try:
+                timeout = (
+                    None if deadline is None else max(0.0, deadline - time.monotonic())
+                )
+                row = self._queue.get(timeout=timeout)
+                if row is None:
+                    closing = True
+                elif len(pending) >= self.max_pending:
+                    self._drop_row("Results cannot be written")
+                else:
+                    pending.append(row)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+            if pending and (
+                closing
+                or (len(pending) >= self.batch_size and not retrying)
+                or time.monotonic() >= deadline
+            ):
+                if self._write_rows(pending):
+                    pending = []
+                    deadline = None
+                    retrying = False
+                else:
+                    # Retry the batch after another flush interval
+                    deadline = time.monotonic() + self.flush_interval
+                    retrying = True
+        if pending:
+            self.unwritten_rows = len(pending)
+            print(f"{len(pending)} results were not written to {self.output_file}")
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_rows(self, rows: list[list[str]]) -> bool:
+        """Write a batch of rows through the open file handle.
+
+        Args:
+            rows (list[list[str]]): The rows to write.
+
+        Returns:
+            bool: True if the rows were written, False if the write failed.
+        """
+        start_ns = time.perf_counter_ns()
+        try:
+            if self._file is None:
+                self._file = open(self.output_file, mode="a", newline="")
+                if self._file.tell() == 0:
+                    csv.writer(self._file).writerow(self.headers)
+            csv.writer(self._file).writerows(rows)
+            if self.durability != "none":
+                self._file.flush()
+            if self.durability == "fsync":
+                os.fsync(self._file.fileno())
+            metrics.observe_since("log_batch_write", start_ns)
+            return True
+        except OSError as e:
+            print(f"Failed to log {len(rows)} results to {self.output_file}: {e}")
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                self._file = None
+            return False
+
+
+def create_logger(output_file: str) -> CSVLogger:
+    """Create the CSV logger selected by Config.LOG_MODE.
+
+    Args:
+        output_file (str): The path to the output CSV file.
+
+    Returns:
+        CSVLogger: A synchronous or background logger.
+    """
+    if Config.LOG_MODE == "background":
+        return BackgroundCSVLogger(output_file)
+    return CSVLogger(output_file)
+
+
+def create_result_store() -> ResultStore:
+    """Create the result store selected by Config.STORAGE_BACKEND.
+
+    Returns:
+        ResultStore: The CSV logger or the SQLite store.
+    """
+    if Config.STORAGE_BACKEND == "sqlite":
+        from sqlite_store import SQLiteResultStore
+
+        return SQLiteResultStore(Config.OUTPUT_DB)
+    return create_logger(Config.OUTPUT_CSV)
@@ -1,7 +1,23 @@
+import argparse
 import tkinter as tk
 from trainer import NoteTrainer
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MIDI note reading trainer.")
+    parser.add_argument(
+        "--stations",
+        nargs="*",
+        metavar="PORT",
+        help="train several keyboards at once, one station per MIDI port "
+        "(default: Config.STATION_PORTS, or every available port)",
+    )
+    args = parser.parse_args()
+
     root: tk.Tk = tk.Tk()
-    app: NoteTrainer = NoteTrainer(root)
+    if args.stations is not None:
+        from multi_station import MultiStationTrainer
+
+        app = MultiStationTrainer(root, args.stations)
+    else:
+        app = NoteTrainer(root)
     root.mainloop()
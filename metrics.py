@@ -0,0 +1,346 @@
+import bisect
+import csv
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+from config import Config
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram, cheap enough to update on the input path."""
+
+    # Upper bounds in seconds, Prometheus style; the last bucket is +Inf
+    BUCKETS: tuple[float, ...] = (
+        0.00001,
+        0.000025,
+        0.00005,
+        0.0001,
+        0.00025,
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+    )
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.counts: list[int] = [0] * (len(self.BUCKETS) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.max: float = 0.0
+        self._lock: threading.Lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record one measurement.
+
+        Args:
+            seconds (float): The measured duration in seconds.
+        """
+        index = bisect.bisect_left(self.BUCKETS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that contains it.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            float: The estimated value in seconds, or 0.0 without measurements.
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+            maximum = self.max
+        if total == 0:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.BUCKETS[index - 1] if index > 0 else 0.0
+                upper = self.BUCKETS[index] if index < len(self.BUCKETS) else maximum
+                fraction = (rank - cumulative) / bucket_count
+                return min(lower + (upper - lower) * fraction, maximum)
+            cumulative += bucket_count
+        return maximum
+
+    def snapshot(self) -> tuple[list[int], int, float, float]:
+        """Get a consistent copy of the histogram state.
+
+        Returns:
+            tuple[list[int], int, float, float]: Bucket counts, count, sum and max.
+        """
+        with self._lock:
+            return list(self.counts), self.count, self.sum, self.max
+
+
+class Metrics:
+    """Registry of per-stage latency histograms and cache counters."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.stages: dict[str, LatencyHistogram] = {}
+        # cache name -> function returning its counters, read at export time
+        self.caches: dict[str, Callable[[], dict[str, float]]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        """Get the histogram of a stage, creating it on first use.
+
+        Args:
+            stage (str): The name of the stage.
+
+        Returns:
+            LatencyHistogram: The stage's histogram.
+        """
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record a duration for a stage.
+
+        Args:
+            stage (str): The name of the stage.
+            seconds (float): The duration in seconds.
+        """
+        self.histogram(stage).observe(seconds)
+
+    def observe_since(self, stage: str, start_ns: int) -> None:
+        """Record the time elapsed since a perf_counter_ns() reading.
+
+        Args:
+            stage (str): The name of the stage.
+            start_ns (int): The start time from time.perf_counter_ns().
+        """
+        self.histogram(stage).observe((time.perf_counter_ns() - start_ns) / 1e9)
+
+    def register_cache(self, name: str, stats: Callable[[], dict[str, float]]) -> None:
+        """Export the counters of a cache.
+
+        Args:
+            name (str): The name of the cache.
+            stats (Callable[[], dict[str, float]]): Returns the entries, resident bytes,
+                hits, misses and evictions of the cache.
+        """
+        with self._lock:
+            self.caches[name] = stats
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Time the body of a with-block as a stage.
+
+        Args:
+            stage (str): The name of the stage.
+        """
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.observe_since(stage, start_ns)
+
+    def to_prometheus(self) -> str:
+        """Render all histograms in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text.
+        """
+        lines = [
+            "# HELP trainer_stage_seconds Latency of note trainer hot-path stages.",
+            "# TYPE trainer_stage_seconds histogram",
+        ]
+        # Other threads add stages and caches while this runs
+        with self._lock:
+            stages = sorted(self.stages.items())
+            caches = sorted(self.caches.items())
+        for stage, histogram in stages:
+            counts, count, total, _ = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'trainer_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}'
+                )
+            lines.append(
+                f'trainer_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}'
+            )
+            lines.append(f'trainer_stage_seconds_sum{{stage="{stage}"}} {total:.9f}')
+            lines.append(f'trainer_stage_seconds_count{{stage="{stage}"}} {count}')
+        cache_stats = {name: stats() for name, stats in caches}
+        cache_keys = ("entries", "resident_bytes", "hits", "misses", "evictions")
+        for key in cache_keys if cache_stats else ():
+            metric = f"trainer_image_cache_{key}"
+            if key in ("hits", "misses", "evictions"):
+                metric += "_total"
+                lines.append(f"# TYPE {metric} counter")
+            else:
+                lines.append(f"# TYPE {metric} gauge")
+            for name, stats in cache_stats.items():
+                lines.append(f'{metric}{{cache="{name}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+    def to_rows(self, timestamp: str) -> list[list[str]]:
+        """Summarize all histograms as metrics CSV rows.
+
+        Args:
+            timestamp (str): The timestamp to put on every row.
+
+        Returns:
+            list[list[str]]: One row per stage with count, mean and percentiles.
+        """
+        rows = []
+        with self._lock:
+            stages = sorted(self.stages.items())
+        for stage, histogram in stages:
+            _, count, total, maximum = histogram.snapshot()
+            rows.append(
+                [
+                    timestamp,
+                    stage,
+                    str(count),
+                    f"{(total / count if count else 0.0) * 1000:.3f}",
+                    f"{histogram.quantile(0.5) * 1000:.3f}",
+                    f"{histogram.quantile(0.9) * 1000:.3f}",
+                    f"{histogram.quantile(0.99) * 1000:.3f}",
+                    f"{maximum * 1000:.3f}",
+                ]
+            )
+        return rows
+
+
+class MetricsExporter:
+    """Periodically write the metrics next to the results file.
+
+    The "prometheus" format rewrites a text file for a textfile collector; the
+    "csv" format appends one summary row per stage on every export.
+    """
+
+    CSV_HEADERS: list[str] = [
+        "Timestamp",
+        "Stage",
+        "Count",
+        "Mean (ms)",
+        "P50 (ms)",
+        "P90 (ms)",
+        "P99 (ms)",
+        "Max (ms)",
+    ]
+
+    def __init__(
+        self,
+        registry: Metrics,
+        output_file: Optional[str] = None,
+        export_format: str = Config.METRICS_FORMAT,
+        interval: float = Config.METRICS_EXPORT_INTERVAL,
+    ):
+        """Initialize the exporter.
+
+        Args:
+            registry (Metrics): The metrics to export.
+            output_file (Optional[str]): The file to write; defaults to a file next to Config.OUTPUT_CSV.
+            export_format (str): "prometheus" or "csv".
+            interval (float): The time between exports in seconds.
+        """
+        if export_format not in ("prometheus", "csv"):
+            raise ValueError(f"Unknown metrics format '{export_format}'")
+        self.registry: Metrics = registry
+        self.export_format: str = export_format
+        self.output_file: str = output_file or self.default_output_file(export_format)
+        self.interval: float = interval
+        self._stopped: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def default_output_file(export_format: str) -> str:
+        """Get the metrics file path next to the results CSV.
+
+        Args:
+            export_format (str): "prometheus" or "csv".
+
+        Returns:
+            str: The path of the metrics file.
+        """
+        name = (
+            "trainer_metrics.prom"
+            if export_format == "prometheus"
+            else "trainer_metrics.csv"
+        )
+        return os.path.join(os.path.dirname(Config.OUTPUT_CSV), name)
+
+    def start(self) -> None:
+        """Start exporting in a background thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write a final export."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.export()
+
+    def _run(self) -> None:
+        """Export every interval until stopped."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.export()
+            except Exception as e:
+                # Keep exporting; an error here would otherwise end the thread silently
+                print(
+                    f"Unexpected error exporting metrics to {self.output_file}: {e!r}"
+                )
+
+    def export(self) -> None:
+        """Write the current metrics. Failures are reported but never raised."""
+        try:
+            if self.export_format == "prometheus":
+                # Write to a temporary file and rename, so readers never see half a file
+                temporary_file = f"{self.output_file}.tmp"
+                with open(temporary_file, "w", newline="\n") as metrics_file:
+                    metrics_file.write(self.registry.to_prometheus())
+                os.replace(temporary_file, self.output_file)
+            else:
+                write_headers = (
+                    not os.path.isfile(self.output_file)
+                    or os.path.getsize(self.output_file) == 0
+                )
+                with open(self.output_file, mode="a", newline="") as metrics_file:
+                    writer = csv.writer(metrics_file)
+                    if write_headers:
+                        writer.writerow(self.CSV_HEADERS)
+                    writer.writerows(
+                        self.registry.to_rows(
+                            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        )
+                    )
+        except OSError as e:
+            print(f"Failed to export metrics to {self.output_file}: {e}")
+
+
+# Shared registry for all instrumented stages
+metrics: Metrics = Metrics()
@@ -0,0 +1,200 @@
+import struct
+
+
+class StandardMidiFile:
+    """Minimal Standard MIDI File (format 0 and 1) reader.
+
+    Only channel messages are returned; meta events are used for the tempo map
+    and system exclusive messages are skipped.
+    """
+
+    DEFAULT_TEMPO: int = 500000  # microseconds per quarter note (120 BPM)
+
+    @staticmethod
+    def read(path: str) -> list[tuple[float, list[int]]]:
+        """Read the channel messages of a MIDI file.
+
+        Args:
+            path (str): The path to the .mid file.
+
+        Returns:
+            list[tuple[float, list[int]]]: (time in seconds from the start, message bytes)
+                for every channel message of all tracks, in time order.
+        """
+        with open(path, "rb") as midi_file:
+            return StandardMidiFile.parse(midi_file.read())
+
+    @staticmethod
+    def parse(data: bytes) -> list[tuple[float, list[int]]]:
+        """Parse the contents of a MIDI file.
+
+        Args:
+            data (bytes): The file contents.
+
+        Returns:
+            list[tuple[float, list[int]]]: The channel messages with their times in seconds.
+
+        Raises:
+            ValueError: If the data is not a Standard MIDI File.
+        """
+        if data[:4] != b"MThd":
+            raise ValueError("Not a Standard MIDI File: missing MThd header")
+        header_length = struct.unpack(">I", data[4:8])[0]
+        _, track_count, division = struct.unpack(">HHH", data[8:14])
+        position = 8 + header_length
+
+        # (tick, track, order, tempo or None, message or None)
+        events: list[tuple[int, int, int, int | None, list[int] | None]] = []
+        track = 0
+        while position + 8 <= len(data) and track < track_count:
+            chunk_type = data[position : position + 4]
+            chunk_length = struct.unpack(">I", data[position + 4 : position + 8])[0]
+            chunk = data[position + 8 : position + 8 + chunk_length]
+            position += 8 + chunk_length
+            if chunk_type != b"MTrk":
+                continue  # Unknown chunks must be skipped
+            StandardMidiFile._parse_track(chunk, track, events)
+            track += 1
+        events.sort(key=lambda event: (event[0], event[1], event[2]))
+
+        if division & 0x8000:
+            # SMPTE time: negative frames per second in the high byte, ticks per frame in the low byte
+            frames_per_second = 256 - (division >> 8)
+            seconds_per_tick = 1.0 / (frames_per_second * (division & 0xFF))
+            return [
+                (tick * seconds_per_tick, message)
+                for tick, _, _, _, message in events
+                if message is not None
+            ]
+
+        ticks_per_quarter = division or 1
+        tempo = StandardMidiFile.DEFAULT_TEMPO
+        last_tick = 0
+        seconds = 0.0
+        messages: list[tuple[float, list[int]]] = []
+        for tick, _, _, new_tempo, message in events:
+            seconds += (tick - last_tick) * tempo / 1e6 / ticks_per_quarter
+            last_tick = tick
+            if new_tempo is not None:
+                tempo = new_tempo
+            else:
+                messages.append((seconds, message))
+        return messages
+
+    @staticmethod
+    def _parse_track(
+        chunk: bytes,
+        track: int,
+        events: list[tuple[int, int, int, int | None, list[int] | None]],
+    ) -> None:
+        """Append the tempo changes and channel messages of one track chunk.
+
+        Args:
+            chunk (bytes): The MTrk chunk data.
+            track (int): The index of the track.
+            events (list): The list to append (tick, track, order, tempo, message) to.
+        """
+        position = 0
+        tick = 0
+        running_status = 0
+        order = 0
+        while position < len(chunk):
+            delta, position = StandardMidiFile._read_variable_length(chunk, position)
+            tick += delta
+            status = chunk[position]
+            if status == 0xFF:
+                meta_type = chunk[position + 1]
+                length, position = StandardMidiFile._read_variable_length(
+                    chunk, position + 2
+                )
+                if meta_type == 0x51 and length == 3:
+                    tempo = int.from_bytes(chunk[position : position + 3], "big")
+                    events.append((tick, track, order, tempo, None))
+                    order += 1
+                position += length
+                running_status = 0
+                if meta_type == 0x2F:  # End of track
+                    break
+                continue
+            if status in (0xF0, 0xF7):
+                length, position = StandardMidiFile._read_variable_length(
+                    chunk, position + 1
+                )
+                position += length
+                running_status = 0
+                continue
+            if status & 0x80:
+                running_status = status
+                position += 1
+            elif not running_status:
+                raise ValueError(f"Data byte without status in track {track}")
+            data_length = 1 if running_status & 0xF0 in (0xC0, 0xD0) else 2
+            message = [running_status, *chunk[position : position + data_length]]
+            position += data_length
+            events.append((tick, track, order, None, message))
+            order += 1
+
+    @staticmethod
+    def _read_variable_length(data: bytes, position: int) -> tuple[int, int]:
+        """Read a variable-length quantity.
+
+        Args:
+            data (bytes): The data to read from.
+            position (int): The position of the first byte.
+
+        Returns:
+            tuple[int, int]: The value and the position after it.
+        """
+        value = 0
+        while True:
+            byte = data[position]
+            position += 1
+            value = (value << 7) | (byte & 0x7F)
+            if not byte & 0x80:
+                return value, position
+
+    @staticmethod
+    def write(
+        path: str, notes: list[tuple[float, int]], tempo: int = DEFAULT_TEMPO
+    ) -> None:
+        """Write a single-track file of note-ons and note-offs, e.g. for replay tests.
+
+        Args:
+            path (str): The path to the .mid file.
+            notes (list[tuple[float, int]]): (time in seconds, MIDI note) of each note-on.
+            tempo (int): The tempo in microseconds per quarter note.
+        """
+        ticks_per_quarter = 480
+        ticks_per_second = ticks_per_quarter * 1e6 / tempo
+        events: list[tuple[int, bytes]] = []
+        for seconds, midi_note in notes:
+            tick = round(seconds * ticks_per_second)
+            events.append((tick, bytes([0x90, midi_note, 100])))
+            events.append((tick + 1, bytes([0x80, midi_note, 0])))
+        events.sort(key=lambda event: event[0])
+        track = bytearray(b"\x00\xff\x51\x03" + tempo.to_bytes(3, "big"))
+        last_tick = 0
+        for tick, message in events:
+            track += StandardMidiFile._variable_length(tick - last_tick) + message
+            last_tick = tick
+        track += b"\x00\xff\x2f\x00"
+        with open(path, "wb") as midi_file:
+            midi_file.write(b"MThd" + struct.pack(">IHHH", 6, 0, 1, ticks_per_quarter))
+            midi_file.write(b"MTrk" + struct.pack(">I", len(track)) + track)
+
+    @staticmethod
+    def _variable_length(value: int) -> bytes:
+        """Encode a variable-length quantity.
+
+        Args:
+            value (int): The value to encode.
+
+        Returns:
+            bytes: The encoded value.
+        """
+        encoded = bytearray([value & 0x7F])
+        value >>= 7
+        while value:
+            encoded.insert(0, (value & 0x7F) | 0x80)
+            value >>= 7
+        return bytes(encoded)
@@ -1,11 +1,81 @@
+import threading
+from typing import Callable, Optional
+
 import rtmidi
 
+from config import Config
+
+
+class MidiClock:
+    """Convert rtmidi's per-message delta times into local monotonic timestamps.
+
+    The deltas are summed into a driver timeline. The offset to the local clock
+    is the smallest observed (arrival - driver time), i.e. the message that
+    reached Python with the least delay, so later queueing or UI stalls do not
+    leak into the timestamps.
+
+    rtmidi starts a new timeline (delta 0) whenever a port is opened, so the
+    clock must be reset then; otherwise the old offset would stamp every later
+    message in the past by the time the port was closed.
+    """
 
-class MidiPortManager:
     def __init__(self):
-        """Initialize the MIDI port manager."""
+        """Initialize the clock with an empty driver timeline."""
+        self.midi_time_ns: int = 0
+        self.offset_ns: int | None = None
+        # Ports are opened on the Tk or watcher thread, messages are stamped on the Tk thread
+        self._lock: threading.Lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Start a new driver timeline, e.g. after a port was opened or reconnected."""
+        with self._lock:
+            self.midi_time_ns = 0
+            self.offset_ns = None
+
+    def stamp(self, delta_time: float, arrival_ns: int) -> int:
+        """Get the local time at which the driver received a message.
+
+        Args:
+            delta_time (float): The seconds since the previous message, as reported by rtmidi.
+            arrival_ns (int): When the message reached the callback, from time.perf_counter_ns().
+
+        Returns:
+            int: The estimated time the message was played, in perf_counter nanoseconds.
+        """
+        with self._lock:
+            self.midi_time_ns += round(delta_time * 1e9)
+            offset_ns = arrival_ns - self.midi_time_ns
+            if self.offset_ns is None or offset_ns < self.offset_ns:
+                self.offset_ns = offset_ns
+            return self.midi_time_ns + self.offset_ns
+
+
+class MidiPortManager:
+    """Own the MIDI input and watch the system for added and removed ports.
+
+    The watcher thread enumerates the ports once per cycle and compares them
+    with the last snapshot. Only the differences are reported, as
+    ("added" | "removed" | "connected" | "disconnected", port name) events.
+    The poll interval doubles while nothing changes, up to a maximum, and
+    drops back to the minimum after every change.
+    """
+
+    def __init__(self, clock: Optional[MidiClock] = None):
+        """Initialize the MIDI port manager.
+
+        Args:
+            clock (Optional[MidiClock]): The clock that stamps the port's messages; it is
+                reset whenever a port is opened.
+        """
         self.rtmidi_in: rtmidi.MidiIn = rtmidi.MidiIn()
+        self.clock: Optional[MidiClock] = clock
+        # rtmidi objects are not thread-safe, so the Tk and watcher threads share a lock
+        self._lock: threading.RLock = threading.RLock()
         self.current_ports: list[str] = self.get_ports()
+        self.selected_port: Optional[str] = None
+        self._callback: Optional[Callable] = None
+        self._stop_watching: threading.Event = threading.Event()
+        self._watch_thread: Optional[threading.Thread] = None
 
     def get_ports(self) -> list[str]:
         """Get the list of available MIDI ports.
@@ -13,19 +83,41 @@ class MidiPortManager:
         Returns:
             list[str]: The list of available MIDI ports.
         """
-        return self.rtmidi_in.get_ports()
+        with self._lock:
+            return self.rtmidi_in.get_ports()
 
-    def open_port(self, port_index: int, callback: callable) -> None:
+    def open_port(self, port_index: int, callback: Callable) -> None:
         """Open the specified MIDI port and set the callback for incoming messages.
 
+        Used by select_port() and by the watcher when it reconnects the selected
+        port; either way the driver starts a new timeline, so the clock is reset.
+
         Args:
             port_index (int): The index of the MIDI port to open.
-            callback (callable): The callback function for incoming MIDI messages.
+            callback (Callable): The callback function for incoming MIDI messages.
         """
-        if self.rtmidi_in.is_port_open():
-            self.rtmidi_in.close_port()
-        self.rtmidi_in.open_port(port_index)
-        self.rtmidi_in.set_callback(callback)
+        with self._lock:
+            if self.rtmidi_in.is_port_open():
+                self.rtmidi_in.close_port()
+            if self.clock is not None:
+                self.clock.reset()
+            self.rtmidi_in.open_port(port_index)
+            self.rtmidi_in.set_callback(callback)
+
+    def select_port(self, port: str, callback: Callable) -> None:
+        """Open a port by name and keep it selected, so the watcher reconnects it.
+
+        Args:
+            port (str): The name of the MIDI port.
+            callback (Callable): The callback function for incoming MIDI messages.
+
+        Raises:
+            ValueError: If the port is not in the last snapshot of available ports.
+        """
+        with self._lock:
+            self.open_port(self.current_ports.index(port), callback)
+            self.selected_port = port
+            self._callback = callback
 
     def is_port_open(self) -> bool:
         """Check if a MIDI port is currently open.
@@ -33,16 +125,138 @@ class MidiPortManager:
         Returns:
             bool: True if a MIDI port is open, False otherwise.
         """
-        return self.rtmidi_in.is_port_open()
+        with self._lock:
+            return self.rtmidi_in.is_port_open()
 
-    def has_ports_changed(self) -> bool:
-        """Check if the list of available MIDI ports has changed.
+    def poll_ports(self) -> list[tuple[str, str]]:
+        """Enumerate the ports once, update the snapshot and reconnect the selected port.
 
         Returns:
-            bool: True if the list of available MIDI ports has changed, False otherwise.
+            list[tuple[str, str]]: The port events since the previous poll.
         """
-        new_ports = self.get_ports()
-        if new_ports != self.current_ports:
-            self.current_ports = new_ports
-            return True
-        return False
+        ports = self.get_ports()
+        events: list[tuple[str, str]] = []
+        with self._lock:
+            previous = self.current_ports
+            self.current_ports = ports
+            events.extend(("removed", port) for port in previous if port not in ports)
+            events.extend(("added", port) for port in ports if port not in previous)
+            selected = self.selected_port
+            if selected is None:
+                return events
+            if selected not in ports:
+                # rtmidi keeps a vanished port "open", so close it explicitly
+                if self.rtmidi_in.is_port_open():
+                    self.rtmidi_in.close_port()
+                    events.append(("disconnected", selected))
+            elif not self.rtmidi_in.is_port_open() and self._callback is not None:
+                try:
+                    self.open_port(ports.index(selected), self._callback)
+                    events.append(("connected", selected))
+                except rtmidi.RtMidiError as e:
+                    print(f"Failed to reconnect MIDI port {selected}: {e}")
+        return events
+
+    def watch(
+        self,
+        on_events: Callable[[list[tuple[str, str]]], None],
+        min_interval: float = Config.MIDI_WATCH_MIN_INTERVAL,
+        max_interval: float = Config.MIDI_WATCH_MAX_INTERVAL,
+    ) -> None:
+        """Start watching the ports in a background thread.
+
+        Args:
+            on_events (Callable[[list[tuple[str, str]]], None]): Receives the events of
+                each poll that found changes. Runs on the watcher thread.
+            min_interval (float): The poll interval in seconds right after a change.
+            max_interval (float): The longest poll interval in seconds.
+        """
+        self._stop_watching.clear()
+        self._watch_thread = threading.Thread(
+            target=self._watch,
+            args=(on_events, min_interval, max_interval),
+            name="midi-port-watcher",
+            daemon=True,
+        )
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        """Stop the watcher thread."""
+        self._stop_watching.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=1.0)
+            self._watch_thread = None
+
+    def _watch(
+        self,
+        on_events: Callable[[list[tuple[str, str]]], None],
+        min_interval: float,
+        max_interval: float,
+    ) -> None:
+        """Poll the ports with adaptive back-off until stopped."""
+        interval = min_interval
+        while not self._stop_watching.wait(interval):
+            try:
+                events = self.poll_ports()
+            except Exception as e:
+                print(f"Failed to enumerate MIDI ports: {e}")
+                events = []
+            if events:
+                on_events(events)
+                interval = min_interval
+            else:
+                interval = min(interval * 2, max_interval)
+
+
+class MidiInputPool:
+    """One rtmidi.MidiIn per open port, for training several keyboards at once.
+
+    rtmidi delivers each input's messages from its own native thread. The
+    callbacks only append to a queue, so no Python thread is started per input.
+    """
+
+    def __init__(self):
+        """Initialize the pool with no open inputs."""
+        self._probe: rtmidi.MidiIn = rtmidi.MidiIn()
+        self.inputs: dict[str, rtmidi.MidiIn] = {}
+
+    def get_ports(self) -> list[str]:
+        """Get the list of available MIDI ports.
+
+        Returns:
+            list[str]: The list of available MIDI ports.
+        """
+        return self._probe.get_ports()
+
+    def open_port(
+        self,
+        port: str,
+        callback: Callable,
+        data: object = None,
+        clock: Optional[MidiClock] = None,
+    ) -> None:
+        """Open a port on its own MidiIn.
+
+        Args:
+            port (str): The name of the MIDI port.
+            callback (Callable): Called with (message and delta time, data) for every message.
+            data (object): Passed to the callback, e.g. to tell the inputs apart.
+            clock (Optional[MidiClock]): The clock that stamps the port's messages; it is reset.
+
+        Raises:
+            ValueError: If the port is not available.
+        """
+        index = self.get_ports().index(port)
+        midi_in = rtmidi.MidiIn()
+        if clock is not None:
+            clock.reset()
+        midi_in.open_port(index)
+        midi_in.set_callback(callback, data)
+        self.inputs[port] = midi_in
+
+    def close_all(self) -> None:
+        """Close every open input."""
+        for midi_in in self.inputs.values():
+            midi_in.cancel_callback()
+            midi_in.close_port()
+        self.inputs.clear()
@@ -0,0 +1,311 @@
+import os
+import threading
+import tkinter as tk
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from PIL import ImageTk
+
+from config import Config
+from frame_scheduler import FrameScheduler
+from image_cache import PhotoImageCache
+from logger import ResultStore, create_result_store
+from metrics import metrics
+from midi_manager import MidiInputPool
+from note_image import NoteImageManager
+from practice_engine import PracticeEngine
+from practice_session import PracticeSession
+from prefetch import NotePrefetcher
+
+
+class Station:
+    """One keyboard: its practice engine, note prefetcher and widgets."""
+
+    def __init__(
+        self,
+        port: str,
+        engine: PracticeEngine,
+        prefetcher: NotePrefetcher,
+        frame: tk.Frame,
+    ):
+        """Initialize the station and build its widgets.
+
+        Args:
+            port (str): The name of the station's MIDI port.
+            engine (PracticeEngine): The station's practice logic and MIDI clock.
+            prefetcher (NotePrefetcher): Prepares the station's next notes.
+            frame (tk.Frame): The frame to put the station's widgets in.
+        """
+        self.port: str = port
+        self.engine: PracticeEngine = engine
+        self.session: PracticeSession = engine.session
+        self.prefetcher: NotePrefetcher = prefetcher
+        self.waiting_for_note: bool = False
+        self.time_text: str = ""
+        tk.Label(frame, text=port).pack()
+        self.note_label: tk.Label = tk.Label(frame)
+        self.note_label.pack(expand=True)
+        self.time_label: tk.Label = tk.Label(frame, text="Time Taken: 0.000s")
+        self.time_label.pack()
+        self.result_label: tk.Label = tk.Label(frame, text="")
+        self.result_label.pack()
+
+
+class MultiStationTrainer:
+    """Train several keyboards at once, one station per MIDI port.
+
+    Every station has its own session (current note, timer, attempts, session
+    ID and note scheduler). The stations share the note image cache, a small
+    render pool, one result store with its single writer, one MIDI queue and
+    one frame scheduler, so the number of threads does not grow with the
+    number of stations.
+    """
+
+    def __init__(self, master: tk.Tk, ports: Optional[list[str]] = None):
+        """Open a station for every selected port and show the first notes.
+
+        Args:
+            master (tk.Tk): The root window.
+            ports (Optional[list[str]]): Port names (or parts of them) to open;
+                defaults to Config.STATION_PORTS, and to all ports if that is empty.
+        """
+        self.master: tk.Tk = master
+        self.master.title("Note Reading Trainer (stations)")
+        self.master.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.midi_inputs: MidiInputPool = MidiInputPool()
+        self.logger: ResultStore = create_result_store()
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1)
+        )
+        # Filled by the rtmidi threads of all inputs, drained on the Tk thread
+        self.midi_queue: deque[tuple[int, list[int], float, int]] = deque()
+        self.frame_scheduler: FrameScheduler = FrameScheduler(self.master)
+        self.frame_scheduler.every_frame(self._update_time_labels)
+        # Stations showing the same note share its PhotoImage
+        self.photo_cache: PhotoImageCache = PhotoImageCache(
+            lambda note_name: NoteImageManager.render_note_image(note_name, self.master)
+        )
+        metrics.register_cache("photos", self.photo_cache.stats)
+        self.warm_up_done: threading.Event = threading.Event()
+        self.stations: list[Station] = []
+        self._open_stations(ports if ports else Config.STATION_PORTS)
+        self._start_cache_warm_up()
+        self._drain_midi_queue()
+        self.frame_scheduler.start()
+
+    def _open_stations(self, ports: list[str]) -> None:
+        """Create a station for every available port that matches.
+
+        Args:
+            ports (list[str]): Port names or parts of them; empty selects all ports.
+        """
+        available_ports = self.midi_inputs.get_ports()
+        selected_ports = [
+            port
+            for port in available_ports
+            if not ports or any(name in port for name in ports)
+        ]
+        if not selected_ports:
+            tk.Label(self.master, text="No matching MIDI ports available").pack()
+            return
+        for index, port in enumerate(selected_ports):
+            frame = tk.Frame(self.master, borderwidth=1, relief="groove")
+            frame.grid(
+                row=index // Config.STATION_COLUMNS,
+                column=index % Config.STATION_COLUMNS,
+                padx=5,
+                pady=5,
+                sticky="nsew",
+            )
+            engine = PracticeEngine(
+                PracticeSession(self.logger),
+                on_answer=lambda *answer, index=index: self._show_answer(
+                    index, *answer
+                ),
+                advance=False,  # The next note comes from the prefetcher
+            )
+            session = engine.session
+            prefetcher = NotePrefetcher(
+                session,
+                self.executor,
+                self.frame_scheduler.post,
+                self.photo_cache.get,
+                lambda index=index: self._on_note_prefetched(index),
+                key=f"prefetch:{index}",
+            )
+            station = Station(port, engine, prefetcher, frame)
+            self.stations.append(station)
+            self.midi_inputs.open_port(
+                port, self._midi_callback, index, engine.midi_clock
+            )
+
+    def _on_close(self) -> None:
+        """Close the inputs, drain pending results and close the window."""
+        self.midi_inputs.close_all()
+        self.frame_scheduler.stop()
+        self.logger.close()
+        self.executor.shutdown(wait=False)
+        self.master.destroy()
+
+    def _start_cache_warm_up(self) -> None:
+        """Render missing note images in the background, then show the first notes."""
+        if not NoteImageManager.get_missing_notes():
+            self._finish_cache_warm_up()
+            return
+        threading.Thread(target=self._regenerate_notes, daemon=True).start()
+
+    def _regenerate_notes(self) -> None:
+        """Regenerate missing note images. Runs on the warm-up thread."""
+        try:
+            NoteImageManager.clean_up_musicxml_files()
+            NoteImageManager.regenerate_missing_notes()
+        except Exception as e:
+            print(f"Failed to regenerate note images: {e}")
+        finally:
+            self.frame_scheduler.post("warm_up", self._finish_cache_warm_up)
+
+    def _finish_cache_warm_up(self) -> None:
+        """Show the first note on every station."""
+        self.warm_up_done.set()
+        for index in range(len(self.stations)):
+            self._show_next_note(index)
+
+    def _midi_callback(self, event: list, station_index: int) -> None:
+        """Queue an incoming MIDI message for the Tk thread. Runs on an rtmidi thread.
+
+        Args:
+            event (list): The MIDI message and the driver's delta time in seconds.
+            station_index (int): The station whose input received the message.
+        """
+        if not event:
+            return
+        # deque.append is atomic, so no lock is needed between the threads
+        self.midi_queue.append(
+            (
+                station_index,
+                event[0],
+                event[1] if len(event) > 1 else 0.0,
+                self.stations[station_index].engine.clock(),
+            )
+        )
+
+    def _drain_midi_queue(self) -> None:
+        """Process queued MIDI messages and schedule the next drain."""
+        self._process_midi_events()
+        self.master.after(Config.MIDI_POLL_INTERVAL_MS, self._drain_midi_queue)
+
+    def _process_midi_events(self) -> None:
+        """Process the MIDI messages of all stations, in arrival order."""
+        while self.midi_queue:
+            station_index, message, delta_time, arrival_time = self.midi_queue.popleft()
+            engine = self.stations[station_index].engine
+            engine.receive(message, delta_time, arrival_time)
+            engine.process_events()
+
+    def _show_answer(
+        self,
+        station_index: int,
+        midi_note: int,
+        tested_note: str,
+        is_correct: bool,
+        time_taken: float,
+    ) -> None:
+        """Show the outcome of a station's answer and move on after a correct one.
+
+        Args:
+            station_index (int): The station.
+            midi_note (int): The MIDI number of the played note.
+            tested_note (str): The note that was on screen.
+            is_correct (bool): Whether the played note was correct.
+            time_taken (float): The reaction time in seconds.
+        """
+        self.frame_scheduler.post(
+            f"result:{station_index}",
+            self.stations[station_index].result_label.config,
+            text=f"Correct: {tested_note} in {time_taken:.3f}s" if is_correct else "",
+            fg="green",
+        )
+        if is_correct:
+            self._show_next_note(station_index)
+
+    def _show_next_note(self, station_index: int) -> None:
+        """Request a new note for a station; its timer starts once it is displayed.
+
+        Args:
+            station_index (int): The station.
+        """
+        if not self.warm_up_done.is_set():
+            return
+        station = self.stations[station_index]
+        station.session.request_note()
+        station.waiting_for_note = True
+        self._show_prefetched_note(station_index)
+
+    def _on_note_prefetched(self, station_index: int) -> None:
+        """Show a station's prepared note if it is waiting for one.
+
+        Args:
+            station_index (int): The station.
+        """
+        if self.stations[station_index].waiting_for_note:
+            self._show_prefetched_note(station_index)
+
+    def _show_prefetched_note(self, station_index: int) -> None:
+        """Swap in a station's next prepared note, or wait until one has been prepared.
+
+        Args:
+            station_index (int): The station.
+        """
+        station = self.stations[station_index]
+        prepared = station.prefetcher.take()
+        if prepared is None:
+            return
+        note_name, _, error = prepared
+        if note_name is None:
+            # No note could be selected; show why and keep waiting for the next one
+            station.note_label.config(image="", text=f"Error selecting note: {error}")
+            return
+        station.waiting_for_note = False
+        self._display_note(station_index, *prepared)
+
+    def _display_note(
+        self,
+        station_index: int,
+        note_name: str,
+        image: Optional[ImageTk.PhotoImage],
+        error: Optional[Exception] = None,
+    ) -> None:
+        """Show a station's prepared note and start its reaction timer once it has been drawn.
+
+        Args:
+            station_index (int): The station.
+            note_name (str): The name of the note.
+            image (Optional[ImageTk.PhotoImage]): The note image.
+            error (Optional[Exception]): The error raised while preparing the image, if any.
+        """
+        station = self.stations[station_index]
+        if error is not None:
+            station.note_label.config(
+                text=f"Error displaying note: {note_name} because {error}"
+            )
+        else:
+            station.note_label.config(
+                image=image, text="" if image else f"No image for {note_name}"
+            )
+            station.note_label.image = image
+        # Let Tk finish drawing before the reaction time starts
+        self.master.update_idletasks()
+        station.engine.show_note(note_name)
+
+    def _update_time_labels(self) -> None:
+        """Update the time label of every running station. Runs every frame."""
+        for station in self.stations:
+            timer = station.session.timer
+            if not timer.is_running():
+                continue
+            time_text = f"Time Taken: {timer.stop():.2f}s"
+            # With many stations, skip the Tk call when the text has not changed
+            if time_text != station.time_text:
+                station.time_label.config(text=time_text)
+                station.time_text = time_text
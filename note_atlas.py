@@ -0,0 +1,199 @@
+import json
+import mmap
+import os
+from typing import Optional
+
+from PIL import Image
+
+
+class NoteAtlas:
+    """All note images packed into one image, stored as raw pixels plus a JSON index.
+
+    The atlas files live in the note image cache directory next to the per-note
+    PNG files they are built from. Loading memory-maps the pixels, so note images
+    are cut from a shared buffer without opening a file per note.
+    """
+
+    PIXELS_NAME = "note_atlas.raw"
+    INDEX_NAME = "note_atlas.json"
+    MODE = "RGBA"
+    MAX_ROW_WIDTH = 2048
+
+    def __init__(self, image: Image.Image, boxes: dict[str, tuple[int, int, int, int]]):
+        """Initialize the atlas from its packed image and bounding boxes.
+
+        Args:
+            image (Image.Image): The packed atlas image.
+            boxes (dict[str, tuple[int, int, int, int]]): Note name to (x, y, width, height).
+        """
+        self.image: Image.Image = image
+        self.boxes: dict[str, tuple[int, int, int, int]] = boxes
+        self._mapped: Optional[mmap.mmap] = None
+
+    def __contains__(self, note_name: str) -> bool:
+        return note_name in self.boxes
+
+    def get_note_image(self, note_name: str) -> Image.Image:
+        """Cut a note's image out of the shared atlas buffer.
+
+        Args:
+            note_name (str): The name of the note.
+
+        Returns:
+            Image.Image: The note image.
+        """
+        x, y, width, height = self.boxes[note_name]
+        return self.image.crop((x, y, x + width, y + height))
+
+    @staticmethod
+    def get_paths(cache_dir: str) -> tuple[str, str]:
+        """Get the paths of the atlas files in a note image cache directory.
+
+        Args:
+            cache_dir (str): The directory containing the per-note PNG files.
+
+        Returns:
+            tuple[str, str]: The paths of the raw pixel file and the index file.
+        """
+        return (
+            os.path.join(cache_dir, NoteAtlas.PIXELS_NAME),
+            os.path.join(cache_dir, NoteAtlas.INDEX_NAME),
+        )
+
+    def close(self) -> None:
+        """Release the memory-mapped atlas file."""
+        if self._mapped is not None:
+            self.image = None
+            self._mapped.close()
+            self._mapped = None
+
+    @staticmethod
+    def pack(images: dict[str, Image.Image]) -> "NoteAtlas":
+        """Pack note images into a single atlas using row (shelf) packing.
+
+        Args:
+            images (dict[str, Image.Image]): Note name to note image.
+
+        Returns:
+            NoteAtlas: The packed atlas.
+        """
+        boxes: dict[str, tuple[int, int, int, int]] = {}
+        x = y = row_height = atlas_width = 0
+        # Tallest first keeps the rows tight
+        for note_name, image in sorted(
+            images.items(), key=lambda item: item[1].height, reverse=True
+        ):
+            width, height = image.size
+            if x > 0 and x + width > NoteAtlas.MAX_ROW_WIDTH:
+                x = 0
+                y += row_height
+                row_height = 0
+            boxes[note_name] = (x, y, width, height)
+            x += width
+            row_height = max(row_height, height)
+            atlas_width = max(atlas_width, x)
+
+        atlas = Image.new(NoteAtlas.MODE, (max(atlas_width, 1), max(y + row_height, 1)))
+        for note_name, (x, y, _, _) in boxes.items():
+            atlas.paste(images[note_name].convert(NoteAtlas.MODE), (x, y))
+        return NoteAtlas(atlas, boxes)
+
+    @staticmethod
+    def build(
+        cache_dir: str,
+        note_names: list[str],
+        pixels_path: Optional[str] = None,
+        index_path: Optional[str] = None,
+    ) -> "NoteAtlas":
+        """Build an atlas from the cached note images and save it.
+
+        Args:
+            cache_dir (str): The directory containing the per-note PNG files.
+            note_names (list[str]): The notes to include; notes without a cached image are skipped.
+            pixels_path (Optional[str]): The path of the raw pixel file to write; defaults to cache_dir.
+            index_path (Optional[str]): The path of the index file to write; defaults to cache_dir.
+
+        Returns:
+            NoteAtlas: The built atlas.
+        """
+        images: dict[str, Image.Image] = {}
+        for note_name in note_names:
+            image_path = os.path.join(cache_dir, f"{note_name}.png")
+            if os.path.isfile(image_path):
+                with Image.open(image_path) as image:
+                    images[note_name] = image.convert(NoteAtlas.MODE)
+        atlas = NoteAtlas.pack(images)
+        default_pixels_path, default_index_path = NoteAtlas.get_paths(cache_dir)
+        atlas.save(pixels_path or default_pixels_path, index_path or default_index_path)
+        return atlas
+
+    def save(self, pixels_path: str, index_path: str) -> None:
+        """Save the atlas as raw pixels plus a JSON index.
+
+        The pixels are stored uncompressed so that they can be memory-mapped
+        when loading.
+
+        Args:
+            pixels_path (str): The path of the raw pixel file.
+            index_path (str): The path of the index file.
+        """
+        with open(pixels_path, "wb") as pixels_file:
+            pixels_file.write(self.image.tobytes())
+        with open(index_path, "w") as index_file:
+            json.dump(
+                {
+                    "mode": self.image.mode,
+                    "size": list(self.image.size),
+                    "notes": {name: list(box) for name, box in self.boxes.items()},
+                },
+                index_file,
+                separators=(",", ":"),
+            )
+
+    @staticmethod
+    def load(pixels_path: str, index_path: str) -> Optional["NoteAtlas"]:
+        """Load an atlas, memory-mapping its pixels where possible.
+
+        Args:
+            pixels_path (str): The path of the raw pixel file.
+            index_path (str): The path of the index file.
+
+        Returns:
+            Optional[NoteAtlas]: The atlas, or None if no valid atlas exists.
+        """
+        if not (os.path.isfile(pixels_path) and os.path.isfile(index_path)):
+            return None
+        try:
+            with open(index_path) as index_file:
+                index = json.load(index_file)
+            mode = index["mode"]
+            size = tuple(index["size"])
+            boxes = {name: tuple(box) for name, box in index["notes"].items()}
+
+            with open(pixels_path, "rb") as pixels_file:
+                try:
+                    mapped = mmap.mmap(pixels_file.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    mapped = None
+                    data = pixels_file.read()
+            if mapped is not None:
+                # Shares memory with the mapping instead of copying it
+                image = Image.frombuffer(mode, size, mapped, "raw", mode, 0, 1)
+            else:
+                image = Image.frombytes(mode, size, data)
+            atlas = NoteAtlas(image, boxes)
+            atlas._mapped = mapped
+            return atlas
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable note atlas {pixels_path}: {e}")
+            return None
+
+
+if __name__ == "__main__":
+    from note_image import NoteImageManager
+    from note_index import NoteIndex
+
+    atlas = NoteAtlas.build(NoteImageManager.TEMP_DIR, list(NoteIndex.PLAYABLE_NOTES))
+    print(
+        f"Packed {len(atlas.boxes)} notes into a {atlas.image.size[0]}x{atlas.image.size[1]} atlas"
+    )
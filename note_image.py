@@ -1,13 +1,52 @@
-from functools import lru_cache
-from music21 import stream, note, environment
 from PIL import Image, ImageTk
+from concurrent.futures import as_completed
+from typing import Callable, Optional
 import os
+import re
+import shutil
+import tempfile
+import time
 
 from config import Config
+from image_cache import PixelCache
+from metrics import metrics
+from note_atlas import NoteAtlas
+from note_index import NoteIndex
+from render_scheduler import RenderScheduler
+from staff_engraver import StaffEngraver
 
 
 class NoteImageManager:
     TEMP_DIR = "note_cache"
+    BATCH_NAME = "_batch"
+    # Every engraver run writes into its own directory with this prefix inside TEMP_DIR
+    RENDER_DIR_PREFIX = ".render_"
+    _atlas: NoteAtlas | None = None
+    _atlas_loaded: bool = False
+    _engraver: StaffEngraver = StaffEngraver()
+    # Decoded images shared by all threads; PhotoImages are cached per window (PhotoImageCache)
+    pixel_cache: PixelCache = PixelCache()
+    # Renders notes missing from TEMP_DIR, one job per note at a time
+    render_scheduler: RenderScheduler = RenderScheduler(
+        lambda note_name: NoteImageManager._render_to_file(
+            note_name, NoteImageManager.get_image_path(note_name)
+        ),
+        lambda note_name: os.path.exists(NoteImageManager.get_image_path(note_name)),
+    )
+
+    @staticmethod
+    def get_atlas() -> NoteAtlas | None:
+        """Get the prebuilt note atlas in TEMP_DIR, loading it on first use.
+
+        Returns:
+            NoteAtlas | None: The atlas, or None if no atlas is available.
+        """
+        if not NoteImageManager._atlas_loaded:
+            NoteImageManager._atlas = NoteAtlas.load(
+                *NoteAtlas.get_paths(NoteImageManager.TEMP_DIR)
+            )
+            NoteImageManager._atlas_loaded = True
+        return NoteImageManager._atlas
 
     @staticmethod
     def get_image_path(note_name: str) -> str:
@@ -20,55 +59,290 @@ class NoteImageManager:
             str: The file path for the note image.
         """
         if not os.path.exists(NoteImageManager.TEMP_DIR):
-            os.makedirs(NoteImageManager.TEMP_DIR)
+            os.makedirs(NoteImageManager.TEMP_DIR, exist_ok=True)
         return os.path.join(NoteImageManager.TEMP_DIR, f"{note_name}.png")
 
     @staticmethod
-    @lru_cache(maxsize=128)
-    def render_note_image(note_name: str) -> ImageTk.PhotoImage:
+    def get_note_pixels(note_name: str) -> Image.Image:
+        """Get the decoded note image from the pixel cache, loading it on a miss.
+
+        Safe to call from any thread.
+
+        Args:
+            note_name (str): The name of the note.
+
+        Returns:
+            Image.Image: The note image.
+        """
+        start_time = time.perf_counter_ns()
+        image = NoteImageManager.pixel_cache.get(note_name)
+        if image is not None:
+            metrics.observe_since("pixels_hit", start_time)
+            return image
+        with metrics.time("image_load"):
+            image = NoteImageManager.load_note_image(note_name)
+        NoteImageManager.pixel_cache.put(note_name, image)
+        metrics.observe_since("pixels_miss", start_time)
+        return image
+
+    @staticmethod
+    def render_note_image(
+        note_name: str, master: Optional[object] = None
+    ) -> ImageTk.PhotoImage:
         """Render the note image and return it as a PhotoImage.
 
+        Must be called on the Tk thread; cache the result with a PhotoImageCache.
+
         Args:
             note_name (str): The name of the note.
+            master (Optional[object]): The Tk widget the PhotoImage belongs to.
 
         Returns:
             ImageTk.PhotoImage: The rendered note image.
         """
         try:
-            image_path = NoteImageManager.get_image_path(note_name)
-
-            if not os.path.exists(image_path):
-                s = stream.Stream()
-                n = note.Note(note_name)
-                s.append(n)
-                s.write(fmt="musicxml.png", fp=image_path)
-
-                # Rename the generated file to the desired name
-                generated_image_path = image_path.replace(".png", "-1.png")
-                if os.path.exists(generated_image_path):
-                    os.rename(generated_image_path, image_path)
-
-                # Delete the musicxml file
-                musicxml_path = image_path.replace(".png", ".musicxml")
-                if os.path.exists(musicxml_path):
-                    os.remove(musicxml_path)
-
-            image = Image.open(image_path)
-            return ImageTk.PhotoImage(image)
+            image = NoteImageManager.get_note_pixels(note_name)
+            with metrics.time("photoimage_create"):
+                return ImageTk.PhotoImage(image, master=master)
         except Exception as e:
             raise ValueError(f"The note '{note_name}' could not be rendered: {e}")
 
+    @staticmethod
+    def load_note_image(note_name: str) -> Image.Image:
+        """Load the note image with the configured rendering backend.
+
+        The "pillow" backend engraves the note in-process. The "music21" backend
+        uses the note atlas, then the per-note cache, and engraves with MuseScore
+        only when neither has the note.
+
+        Args:
+            note_name (str): The name of the note.
+
+        Returns:
+            Image.Image: The note image.
+        """
+        if Config.RENDER_BACKEND == "pillow":
+            return NoteImageManager._engraver.render(note_name)
+
+        atlas = NoteImageManager.get_atlas()
+        if atlas is not None and note_name in atlas:
+            return atlas.get_note_image(note_name)
+
+        image_path = NoteImageManager.get_image_path(note_name)
+
+        if not os.path.exists(image_path):
+            NoteImageManager.render_scheduler.request(note_name).result()
+
+        return Image.open(image_path)
+
+    @staticmethod
+    def _create_render_dir() -> str:
+        """Create a private directory for one engraver run.
+
+        The engraver writes fixed names next to its output (`-1.png` pages and a
+        `.musicxml` file), so concurrent runs must not share a directory. The
+        directory is inside TEMP_DIR, so its results can be renamed into the
+        cache atomically.
+
+        Returns:
+            str: The path of the new directory.
+        """
+        if not os.path.exists(NoteImageManager.TEMP_DIR):
+            os.makedirs(NoteImageManager.TEMP_DIR, exist_ok=True)
+        return tempfile.mkdtemp(
+            prefix=NoteImageManager.RENDER_DIR_PREFIX, dir=NoteImageManager.TEMP_DIR
+        )
+
+    @staticmethod
+    def _render_to_file(note_name: str, image_path: str) -> None:
+        """Render a single note to a PNG file with one MuseScore run.
+
+        Args:
+            note_name (str): The name of the note.
+            image_path (str): The destination path of the PNG file.
+
+        Raises:
+            FileNotFoundError: If the engraver did not produce an image.
+        """
+        # music21 is slow to import, so only load it once a render is needed
+        from music21 import stream, note
+
+        render_dir = NoteImageManager._create_render_dir()
+        try:
+            s = stream.Stream()
+            n = note.Note(note_name)
+            s.append(n)
+            render_path = os.path.join(render_dir, os.path.basename(image_path))
+            s.write(fmt="musicxml.png", fp=render_path)
+
+            # Move the generated page into place in a single rename
+            generated_image_path = render_path.replace(".png", "-1.png")
+            if os.path.exists(generated_image_path):
+                os.replace(generated_image_path, image_path)
+            elif os.path.exists(render_path):
+                os.replace(render_path, image_path)
+            else:
+                raise FileNotFoundError(
+                    f"The engraver produced no image for {note_name}"
+                )
+        finally:
+            shutil.rmtree(render_dir, ignore_errors=True)
+
+    @staticmethod
+    def render_batch(note_names: list[str]) -> None:
+        """Render several notes with a single MuseScore run.
+
+        Every note is placed in its own measure on its own page, so the engraver
+        emits one numbered PNG per note. The pages are then moved to the per-note
+        cache paths. If the page count does not match, the remaining notes are
+        rendered one by one.
+
+        Args:
+            note_names (list[str]): The names of the notes to render.
+        """
+        if not note_names:
+            return
+        from music21 import stream, note, clef, layout
+
+        render_dir = NoteImageManager._create_render_dir()
+        try:
+            batch_path = os.path.join(render_dir, f"{NoteImageManager.BATCH_NAME}.png")
+
+            part = stream.Part()
+            for index, note_name in enumerate(note_names):
+                measure = stream.Measure(number=index + 1)
+                if index > 0:
+                    measure.insert(0, layout.PageLayout(isNew=True))
+                measure.append(note.Note(note_name))
+                measure.insert(0, clef.bestClef(measure, recurse=True))
+                part.append(measure)
+            score = stream.Score()
+            score.insert(0, part)
+            score.write(fmt="musicxml.png", fp=batch_path)
+
+            pages = NoteImageManager._find_batch_pages(render_dir)
+            if len(pages) == len(note_names):
+                for note_name, page in zip(note_names, pages):
+                    os.replace(page, NoteImageManager.get_image_path(note_name))
+                return
+        finally:
+            shutil.rmtree(render_dir, ignore_errors=True)
+
+        print(
+            f"Batch render produced {len(pages)} pages for {len(note_names)} notes, "
+            "falling back to per-note rendering"
+        )
+        for note_name in note_names:
+            image_path = NoteImageManager.get_image_path(note_name)
+            if not os.path.exists(image_path):
+                NoteImageManager._render_to_file(note_name, image_path)
+
+    @staticmethod
+    def _find_batch_pages(directory: Optional[str] = None) -> list[str]:
+        """Find the numbered pages of a batch render, in page order.
+
+        MuseScore zero-pads the page number once a score has ten or more pages,
+        so the pages are sorted by their numeric suffix.
+
+        Args:
+            directory (Optional[str]): The directory of the batch render; defaults to TEMP_DIR.
+
+        Returns:
+            list[str]: The paths of the generated page images.
+        """
+        directory = directory or NoteImageManager.TEMP_DIR
+        pattern = re.compile(rf"^{NoteImageManager.BATCH_NAME}-(\d+)\.png$")
+        pages = []
+        for file in os.listdir(directory):
+            match = pattern.match(file)
+            if match:
+                pages.append((int(match.group(1)), file))
+        return [os.path.join(directory, file) for _, file in sorted(pages)]
+
     @staticmethod
     def clean_up_musicxml_files() -> None:
-        """Clean up old MusicXML files and temporary images."""
+        """Clean up old MusicXML files, temporary images and interrupted render directories."""
         for file in os.listdir(NoteImageManager.TEMP_DIR):
-            if file.endswith(".musicxml") or file.endswith("-1.png"):
-                os.remove(os.path.join(NoteImageManager.TEMP_DIR, file))
+            path = os.path.join(NoteImageManager.TEMP_DIR, file)
+            if file.startswith(NoteImageManager.RENDER_DIR_PREFIX):
+                shutil.rmtree(path, ignore_errors=True)
+            elif (
+                file.endswith(".musicxml")
+                or file.endswith("-1.png")
+                or file.startswith(f"{NoteImageManager.BATCH_NAME}-")
+            ):
+                os.remove(path)
 
     @staticmethod
-    def regenerate_missing_notes() -> None:
-        """Regenerate missing note images."""
-        for note in Config.NOTE_TO_MIDI.keys():
-            image_path = NoteImageManager.get_image_path(note)
-            if not os.path.exists(image_path):
-                NoteImageManager.render_note_image(note)
+    def get_missing_notes() -> list[str]:
+        """Get the notes that have neither an atlas entry nor a cached image.
+
+        The "pillow" backend renders on demand, so it never has missing notes.
+
+        Returns:
+            list[str]: The names of the notes without an image.
+        """
+        if Config.RENDER_BACKEND == "pillow":
+            return []
+        atlas = NoteImageManager.get_atlas()
+        return [
+            note
+            for note in NoteIndex.PLAYABLE_NOTES
+            if (atlas is None or note not in atlas)
+            and not os.path.exists(NoteImageManager.get_image_path(note))
+        ]
+
+    @staticmethod
+    def regenerate_missing_notes(
+        batch: bool | None = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> float:
+        """Regenerate missing note images.
+
+        Args:
+            batch (bool | None): Render all missing notes with a single engraver
+                run instead of one run per note. Defaults to Config.BATCH_RENDER.
+            progress (Optional[Callable[[int, int], None]]): Called with the number
+                of rendered notes and the total number of missing notes.
+
+        Returns:
+            float: The time spent rendering, in seconds.
+        """
+        missing_notes = NoteImageManager.get_missing_notes()
+        if not missing_notes:
+            return 0.0
+        if batch is None:
+            batch = Config.BATCH_RENDER
+        total = len(missing_notes)
+        if progress is not None:
+            progress(0, total)
+        start_time = time.perf_counter()
+        scheduler = NoteImageManager.render_scheduler
+        if batch:
+            scheduler.request_batch(
+                missing_notes, NoteImageManager.render_batch
+            ).result()
+            # Notes that were already rendering for display were left out of the batch
+            for note in missing_notes:
+                scheduler.request(note, RenderScheduler.WARM_UP).result()
+            if progress is not None:
+                progress(total, total)
+        else:
+            # Notes requested for display in the meantime are rendered first
+            futures = [
+                scheduler.request(note, RenderScheduler.WARM_UP)
+                for note in missing_notes
+            ]
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                if progress is not None:
+                    progress(done, total)
+        elapsed_time = time.perf_counter() - start_time
+        print(
+            f"Rendered {len(missing_notes)} notes in {elapsed_time:.2f}s "
+            f"({'batch' if batch else 'per-note'})"
+        )
+        return elapsed_time
+
+
+metrics.register_cache("pixels", NoteImageManager.pixel_cache.stats)
@@ -0,0 +1,113 @@
+from typing import Optional
+
+from config import Config
+
+
+class NoteIndex:
+    """Constant-time lookups between MIDI numbers and note names.
+
+    All tables are generated once from the ranges in Config, so lookups on the
+    MIDI input path are plain indexing into precomputed tuples and bytes.
+    """
+
+    PITCH_CLASSES: tuple[str, ...] = (
+        "C",
+        "C#",
+        "D",
+        "D#",
+        "E",
+        "F",
+        "F#",
+        "G",
+        "G#",
+        "A",
+        "A#",
+        "B",
+    )
+    MIDI_SLOTS: int = 128
+
+    # MIDI number -> note name, None outside the playable range
+    MIDI_TO_NAME: tuple[Optional[str], ...] = ()
+    # MIDI number -> name shown for any played note, including unplayable ones
+    DISPLAY_NAMES: tuple[str, ...] = ()
+    # Note name -> MIDI number, playable notes only
+    NAME_TO_MIDI: dict[str, int] = {}
+    # Bit n is set when MIDI note n is tested
+    TESTED_MASK: int = 0
+    PLAYABLE_NOTES: tuple[str, ...] = ()
+    TESTED_NOTES: tuple[str, ...] = ()
+    _TESTED_FLAGS: bytes = b""
+
+    @staticmethod
+    def note_name(midi_number: int) -> str:
+        """Get the scientific pitch name of a MIDI number, e.g. 60 -> "C4".
+
+        Args:
+            midi_number (int): The MIDI note number.
+
+        Returns:
+            str: The note name.
+        """
+        return f"{NoteIndex.PITCH_CLASSES[midi_number % 12]}{midi_number // 12 - 1}"
+
+    @staticmethod
+    def build(playable_range: tuple[int, int], tested_range: tuple[int, int]) -> None:
+        """Generate all lookup tables from the playable and tested MIDI ranges.
+
+        Args:
+            playable_range (tuple[int, int]): The inclusive range of playable MIDI numbers.
+            tested_range (tuple[int, int]): The inclusive range of tested MIDI numbers.
+        """
+        playable_low, playable_high = playable_range
+        tested_low, tested_high = tested_range
+        if not 0 <= playable_low <= tested_low <= tested_high <= playable_high < 128:
+            raise ValueError(
+                f"Tested range {tested_range} must lie within playable range {playable_range}"
+            )
+
+        NoteIndex.MIDI_TO_NAME = tuple(
+            NoteIndex.note_name(n) if playable_low <= n <= playable_high else None
+            for n in range(NoteIndex.MIDI_SLOTS)
+        )
+        NoteIndex.DISPLAY_NAMES = tuple(
+            name if name is not None else f"Note{n}"
+            for n, name in enumerate(NoteIndex.MIDI_TO_NAME)
+        )
+        NoteIndex.NAME_TO_MIDI = {
+            name: n for n, name in enumerate(NoteIndex.MIDI_TO_NAME) if name is not None
+        }
+        NoteIndex.TESTED_MASK = sum(1 << n for n in range(tested_low, tested_high + 1))
+        NoteIndex._TESTED_FLAGS = bytes(
+            (NoteIndex.TESTED_MASK >> n) & 1 for n in range(NoteIndex.MIDI_SLOTS)
+        )
+        NoteIndex.PLAYABLE_NOTES = tuple(NoteIndex.NAME_TO_MIDI)
+        NoteIndex.TESTED_NOTES = tuple(
+            NoteIndex.MIDI_TO_NAME[n] for n in range(tested_low, tested_high + 1)
+        )
+
+    @staticmethod
+    def display_name(midi_number: int) -> str:
+        """Get the name shown for a played MIDI number.
+
+        Args:
+            midi_number (int): The MIDI note number (0-127).
+
+        Returns:
+            str: The note name, or "Note<n>" outside the playable range.
+        """
+        return NoteIndex.DISPLAY_NAMES[midi_number]
+
+    @staticmethod
+    def is_tested(midi_number: int) -> bool:
+        """Check whether a MIDI number is in the tested range.
+
+        Args:
+            midi_number (int): The MIDI note number (0-127).
+
+        Returns:
+            bool: True if the note is tested, False otherwise.
+        """
+        return NoteIndex._TESTED_FLAGS[midi_number] == 1
+
+
+NoteIndex.build(Config.PLAYABLE_NOTE_RANGE, Config.TESTED_NOTE_RANGE)
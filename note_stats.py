@@ -0,0 +1,337 @@
+import math
+import threading
+from typing import Callable, Iterable, Optional
+
+from config import Config
+
+
+class LatencySketch:
+    """Quantile sketch with log-spaced buckets and a bounded relative error.
+
+    A value falls into bucket ceil(log_gamma(value)), so every estimate is
+    within `relative_accuracy` of a value that was actually recorded. Adding a
+    value and merging two sketches only touch bucket counts, and reaction
+    times from 1 ms to an hour need fewer than 400 buckets at 2% accuracy.
+    """
+
+    # Values below this (in seconds) share a single bucket
+    MIN_VALUE: float = 0.001
+
+    def __init__(self, relative_accuracy: float = Config.STATS_SKETCH_ACCURACY):
+        """Initialize an empty sketch.
+
+        Args:
+            relative_accuracy (float): The relative error of quantile estimates (0-1).
+        """
+        self.gamma: float = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma: float = math.log(self.gamma)
+        self.buckets: dict[int, int] = {}
+        self.low_count: int = 0
+        self.count: int = 0
+
+    def add(self, seconds: float) -> None:
+        """Record a value.
+
+        Args:
+            seconds (float): The value in seconds.
+        """
+        self.count += 1
+        if seconds <= self.MIN_VALUE:
+            self.low_count += 1
+            return
+        key = math.ceil(math.log(seconds) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other: "LatencySketch") -> None:
+        """Add the values of a sketch with the same accuracy.
+
+        Args:
+            other (LatencySketch): The sketch to add.
+        """
+        self.count += other.count
+        self.low_count += other.low_count
+        for key, bucket_count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + bucket_count
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            float: The estimated value in seconds, or 0.0 without values.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        cumulative = self.low_count
+        if cumulative > rank:
+            return self.MIN_VALUE
+        for key in sorted(self.buckets):
+            cumulative += self.buckets[key]
+            if cumulative > rank:
+                # The middle of the bucket (gamma^(key-1), gamma^key] in relative terms
+                return 2 * self.gamma**key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class NoteStats:
+    """Running statistics of one tested note.
+
+    Accuracy counts every attempt. The mean, variance and sketch describe the
+    reaction times of correct answers, like ResultsHistory.latency_percentiles.
+    """
+
+    def __init__(self):
+        """Initialize the statistics without attempts."""
+        self.attempts: int = 0
+        self.correct: int = 0
+        # Welford's running mean and sum of squared differences
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+        self.sketch: LatencySketch = LatencySketch()
+
+    def add(self, is_correct: bool, time_taken: float) -> None:
+        """Record an attempt in O(1).
+
+        Args:
+            is_correct (bool): Whether the answer was correct.
+            time_taken (float): The reaction time in seconds.
+        """
+        self.attempts += 1
+        if not is_correct:
+            return
+        self.correct += 1
+        delta = time_taken - self.mean
+        self.mean += delta / self.correct
+        self.m2 += delta * (time_taken - self.mean)
+        self.sketch.add(time_taken)
+
+    def merge(self, other: "NoteStats") -> None:
+        """Add the attempts of another NoteStats (Chan et al.'s parallel update).
+
+        Args:
+            other (NoteStats): The statistics to add.
+        """
+        if other.correct:
+            total = self.correct + other.correct
+            delta = other.mean - self.mean
+            self.mean += delta * other.correct / total
+            self.m2 += other.m2 + delta * delta * self.correct * other.correct / total
+        self.attempts += other.attempts
+        self.correct += other.correct
+        self.sketch.merge(other.sketch)
+
+    def to_dict(self) -> dict:
+        """Get the statistics as JSON-serializable values.
+
+        Returns:
+            dict: The counts, Welford state and sketch buckets.
+        """
+        return {
+            "attempts": self.attempts,
+            "correct": self.correct,
+            "mean": self.mean,
+            "m2": self.m2,
+            "low_count": self.sketch.low_count,
+            "buckets": {str(key): count for key, count in self.sketch.buckets.items()},
+        }
+
+    @staticmethod
+    def from_dict(values: dict) -> "NoteStats":
+        """Restore statistics saved with to_dict().
+
+        Args:
+            values (dict): The saved values.
+
+        Returns:
+            NoteStats: The statistics.
+        """
+        stats = NoteStats()
+        stats.attempts = values["attempts"]
+        stats.correct = values["correct"]
+        stats.mean = values["mean"]
+        stats.m2 = values["m2"]
+        stats.sketch.low_count = values["low_count"]
+        stats.sketch.buckets = {
+            int(key): count for key, count in values["buckets"].items()
+        }
+        stats.sketch.count = stats.sketch.low_count + sum(stats.sketch.buckets.values())
+        return stats
+
+    @property
+    def accuracy(self) -> float:
+        """The share of correct attempts, 0.0 without attempts."""
+        return self.correct / self.attempts if self.attempts else 0.0
+
+    @property
+    def variance(self) -> float:
+        """The sample variance of correct reaction times, 0.0 with fewer than two."""
+        return self.m2 / (self.correct - 1) if self.correct > 1 else 0.0
+
+
+class NoteStatistics:
+    """In-memory per-note statistics, updated with every answer.
+
+    The history is read once, on a background thread, into a separate
+    instance that is then merged in, so answers recorded in the meantime
+    are neither blocked nor lost.
+    """
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.notes: dict[str, NoteStats] = {}
+        self.loaded: bool = False
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, tested_note: str, is_correct: bool, time_taken: float) -> None:
+        """Record an answer.
+
+        Args:
+            tested_note (str): The tested note.
+            is_correct (bool): Whether the answer was correct.
+            time_taken (float): The reaction time in seconds.
+        """
+        with self._lock:
+            stats = self.notes.get(tested_note)
+            if stats is None:
+                stats = self.notes[tested_note] = NoteStats()
+            stats.add(is_correct, time_taken)
+
+    def summary(self, note_name: str) -> Optional[tuple[int, int, float, float, float]]:
+        """Get the figures shown for a note.
+
+        Args:
+            note_name (str): The note.
+
+        Returns:
+            Optional[tuple[int, int, float, float, float]]: Attempts, correct answers,
+                accuracy and the p50 and p90 reaction times in seconds, or None
+                without attempts.
+        """
+        with self._lock:
+            stats = self.notes.get(note_name)
+            if stats is None:
+                return None
+            return (
+                stats.attempts,
+                stats.correct,
+                stats.accuracy,
+                stats.sketch.quantile(0.5),
+                stats.sketch.quantile(0.9),
+            )
+
+    def describe(
+        self, quantiles: tuple[float, ...] = (0.5, 0.9, 0.99)
+    ) -> dict[str, dict]:
+        """Get the figures of every note, in O(notes) regardless of the history size.
+
+        Args:
+            quantiles (tuple[float, ...]): The reaction time quantiles to estimate (0-1).
+
+        Returns:
+            dict[str, dict]: Note name to attempts, correct answers, accuracy, mean
+                reaction time and the quantiles, keyed by "p" and the percentile.
+        """
+        with self._lock:
+            return {
+                note_name: {
+                    "attempts": stats.attempts,
+                    "correct": stats.correct,
+                    "accuracy": stats.accuracy,
+                    "mean": stats.mean,
+                    **{f"p{q * 100:g}": stats.sketch.quantile(q) for q in quantiles},
+                }
+                for note_name, stats in self.notes.items()
+            }
+
+    def to_dict(self) -> dict[str, dict]:
+        """Get the statistics of every note as JSON-serializable values.
+
+        Returns:
+            dict[str, dict]: Note name to NoteStats.to_dict().
+        """
+        with self._lock:
+            return {
+                note_name: stats.to_dict() for note_name, stats in self.notes.items()
+            }
+
+    @staticmethod
+    def from_dict(values: dict[str, dict]) -> "NoteStatistics":
+        """Restore statistics saved with to_dict().
+
+        Args:
+            values (dict[str, dict]): The saved values.
+
+        Returns:
+            NoteStatistics: The statistics.
+        """
+        statistics = NoteStatistics()
+        statistics.notes = {
+            note_name: NoteStats.from_dict(note_values)
+            for note_name, note_values in values.items()
+        }
+        return statistics
+
+    def merge(self, other: "NoteStatistics") -> None:
+        """Add the statistics of another instance.
+
+        Args:
+            other (NoteStatistics): The statistics to add.
+        """
+        with self._lock:
+            for note_name, other_stats in other.notes.items():
+                stats = self.notes.get(note_name)
+                if stats is None:
+                    stats = self.notes[note_name] = NoteStats()
+                stats.merge(other_stats)
+
+    def load(self, results: Iterable[tuple[str, str, float]]) -> int:
+        """Add stored results, streamed one at a time.
+
+        Args:
+            results (Iterable[tuple[str, str, float]]): Tested note, guessed note
+                and time taken of every stored result.
+
+        Returns:
+            int: The number of results read.
+        """
+        history = NoteStatistics()
+        count = 0
+        for tested_note, guessed_note, time_taken in results:
+            stats = history.notes.get(tested_note)
+            if stats is None:
+                stats = history.notes[tested_note] = NoteStats()
+            stats.add(tested_note == guessed_note, time_taken)
+            count += 1
+        self.merge(history)
+        self.loaded = True
+        return count
+
+    def load_in_background(
+        self,
+        results: Iterable[tuple[str, str, float]],
+        on_loaded: Optional[Callable[[], None]] = None,
+    ) -> threading.Thread:
+        """Add stored results on a background thread.
+
+        Args:
+            results (Iterable[tuple[str, str, float]]): The stored results, see load().
+            on_loaded (Optional[Callable[[], None]]): Called on that thread once they are added.
+
+        Returns:
+            threading.Thread: The loading thread.
+        """
+
+        def run() -> None:
+            try:
+                self.load(results)
+            except Exception as e:
+                print(f"Failed to load the results history: {e}")
+            if on_loaded is not None:
+                on_loaded()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
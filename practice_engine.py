@@ -0,0 +1,171 @@
+import time
+from collections import deque
+from typing import Any, Callable, Iterable, Optional
+
+from midi_manager import MidiClock
+from practice_session import PracticeSession
+
+
+class PracticeEngine:
+    """The trainer's practice loop without Tk: MIDI input, answers and note changes.
+
+    Everything around the loop is injected, so the same engine runs behind the
+    trainer window, in the headless simulator and in tests:
+
+    - MIDI source: a driver callback pushes messages with receive() (from any
+      thread) and the view drains them with process_events(), or run() pulls
+      them from an iterable of (delta time, message) pairs.
+    - Clock: the session's Timer clock. Arrival times, event times and
+      reaction times are all taken from it.
+    - Log sink: the session's ResultStore.
+    - Renderer: prepares the image of a note before it is shown.
+    - View: on_note draws a note, on_answer shows the outcome of an answer.
+    """
+
+    def __init__(
+        self,
+        session: PracticeSession,
+        renderer: Optional[Callable[[str], Any]] = None,
+        on_note: Optional[Callable[[str, Any], None]] = None,
+        on_answer: Optional[Callable[[int, str, bool, float], None]] = None,
+        advance: bool = True,
+    ):
+        """Initialize the engine with an empty MIDI queue.
+
+        Args:
+            session (PracticeSession): Selects notes, evaluates answers and logs results.
+            renderer (Optional[Callable[[str], Any]]): Returns the image of a note.
+            on_note (Optional[Callable[[str, Any], None]]): Draws a note and its image.
+            on_answer (Optional[Callable[[int, str, bool, float], None]]): Called with the
+                played MIDI note, the tested note, whether the answer was correct and
+                the reaction time.
+            advance (bool): Show the next note after a correct answer; views that
+                prepare notes themselves turn this off.
+        """
+        self.session: PracticeSession = session
+        self.clock: Callable[[], int] = session.timer.clock
+        self.renderer: Optional[Callable[[str], Any]] = renderer
+        self.on_note: Optional[Callable[[str, Any], None]] = on_note
+        self.on_answer: Optional[Callable[[int, str, bool, float], None]] = on_answer
+        self.advance: bool = advance
+        # Filled by the MIDI source, drained by process_events()
+        self.midi_queue: deque[tuple[list[int], float, int]] = deque()
+        self.midi_clock: MidiClock = MidiClock()
+        self.event_count: int = 0
+        self.answer_count: int = 0
+        self.correct_count: int = 0
+
+    def receive(
+        self,
+        message: list[int],
+        delta_time: float = 0.0,
+        arrival_time: Optional[int] = None,
+    ) -> None:
+        """Queue a MIDI message with its arrival time. Safe to call from the driver's thread.
+
+        Args:
+            message (list[int]): The MIDI message bytes.
+            delta_time (float): The seconds since the previous message, as reported by the driver.
+            arrival_time (Optional[int]): When the message arrived, on the engine's clock;
+                defaults to now. Set by views that queue messages themselves first.
+        """
+        if arrival_time is None:
+            arrival_time = self.clock()
+        # deque.append is atomic, so no lock is needed between the two threads
+        self.midi_queue.append((message, delta_time, arrival_time))
+
+    def process_events(self) -> int:
+        """Evaluate all queued messages, in arrival order.
+
+        Returns:
+            int: The number of messages processed.
+        """
+        processed = 0
+        while self.midi_queue:
+            self._process(*self.midi_queue.popleft())
+            processed += 1
+        return processed
+
+    def _process(
+        self, message: list[int], delta_time: float, arrival_time: int
+    ) -> None:
+        """Evaluate one message and react to the answer, if it is one.
+
+        Args:
+            message (list[int]): The MIDI message bytes.
+            delta_time (float): The driver's delta time in seconds.
+            arrival_time (int): When the message was received, on the engine's clock.
+        """
+        event_time = self.midi_clock.stamp(delta_time, arrival_time)
+        result = self.session.handle_message(message, event_time)
+        self.event_count += 1
+        if result is None:
+            return
+        tested_note, is_correct, time_taken = result
+        self.answer_count += 1
+        if is_correct:
+            self.correct_count += 1
+        if self.on_answer is not None:
+            self.on_answer(message[1], tested_note, is_correct, time_taken)
+        if is_correct and self.advance:
+            self.show_next_note()
+
+    def show_next_note(self) -> str:
+        """Select the next note, prepare its image and show it.
+
+        Returns:
+            str: The name of the shown note.
+        """
+        self.session.request_note()
+        note_name = self.session.next_note()
+        image = self.renderer(note_name) if self.renderer is not None else None
+        self.show_note(note_name, image)
+        return note_name
+
+    def show_note(self, note_name: str, image: Any = None) -> None:
+        """Draw a note and start the reaction timer once it is on screen.
+
+        Args:
+            note_name (str): The name of the note.
+            image (Any): The note's image, passed on to on_note.
+        """
+        if self.on_note is not None:
+            self.on_note(note_name, image)
+        self.session.show_note(note_name)
+
+    def run(
+        self, events: Iterable[tuple[float, list[int]]], realtime: bool = False
+    ) -> float:
+        """Feed messages from a MIDI source through the input path until it is exhausted.
+
+        A note is shown first if none is on screen.
+
+        Args:
+            events (Iterable[tuple[float, list[int]]]): Delta times and MIDI messages.
+            realtime (bool): Deliver messages at their delta times instead of as fast as possible.
+
+        Returns:
+            float: The elapsed wall-clock time in seconds.
+        """
+        if self.session.current_note is None:
+            self.show_next_note()
+        start = time.perf_counter()
+        due = start
+        previous_arrival: Optional[int] = None
+        for delta_time, message in events:
+            if realtime:
+                due += delta_time
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                self.receive(message, delta_time)
+            else:
+                # Without the delays the source's deltas do not match the arrivals; a
+                # message would seem to be played before the note it answers was shown
+                arrival_time = self.clock()
+                if previous_arrival is not None:
+                    delta_time = (arrival_time - previous_arrival) / 1e9
+                previous_arrival = arrival_time
+                self.receive(message, delta_time, arrival_time)
+            self.process_events()
+        return time.perf_counter() - start
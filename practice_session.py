@@ -0,0 +1,148 @@
+import time
+from datetime import datetime
+from typing import Optional
+
+from logger import ResultStore
+from metrics import metrics
+from note_index import NoteIndex
+from note_stats import NoteStatistics
+from scheduler import AdaptiveNoteScheduler
+from timer import Timer
+from ulid import ulid
+
+
+class PracticeSession:
+    """Note selection, answer evaluation and result logging, without any UI.
+
+    The trainer window and the headless simulator both drive a session: they
+    ask it for the next note, tell it when that note is on screen and hand it
+    every played MIDI message.
+    """
+
+    def __init__(
+        self,
+        logger: ResultStore,
+        scheduler: Optional[AdaptiveNoteScheduler] = None,
+        timer: Optional[Timer] = None,
+        stats: Optional[NoteStatistics] = None,
+    ):
+        """Initialize the session with no note on screen.
+
+        Args:
+            logger (ResultStore): Where results are stored.
+            scheduler (Optional[AdaptiveNoteScheduler]): Picks the notes; defaults to all tested notes.
+            timer (Optional[Timer]): Measures reaction times.
+            stats (Optional[NoteStatistics]): Per-note statistics to record every answer in.
+        """
+        self.logger: ResultStore = logger
+        self.scheduler: AdaptiveNoteScheduler = scheduler or AdaptiveNoteScheduler(
+            NoteIndex.TESTED_NOTES
+        )
+        self.timer: Timer = timer or Timer()
+        self.stats: Optional[NoteStatistics] = stats
+        self.current_note: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.total_time: float = 0.0
+        self.attempts: int = 0
+
+    def request_note(self) -> None:
+        """Start measuring the display latency of a new note."""
+        self.timer.request()
+
+    def next_note(self) -> str:
+        """Pick the next note, favouring notes that need practice.
+
+        Returns:
+            str: The name of the next note.
+        """
+        with metrics.time("note_selection"):
+            return self.scheduler.next_note()
+
+    def show_note(self, note_name: str) -> None:
+        """Record that a note is on screen and start the reaction timer.
+
+        Args:
+            note_name (str): The name of the displayed note.
+        """
+        self.current_note = note_name
+        self.timer.start()
+        if self.timer.requested_ns is not None:
+            # From the request after an answer until the next note is on screen
+            metrics.observe("transition", self.timer.display_latency())
+
+    def handle_message(
+        self, message: list[int], event_time: int
+    ) -> Optional[tuple[str, bool, float]]:
+        """Evaluate a MIDI message. Only note-on messages are answers.
+
+        Args:
+            message (list[int]): The MIDI message bytes.
+            event_time (int): When the message was played, in perf_counter nanoseconds.
+
+        Returns:
+            Optional[tuple[str, bool, float]]: The tested note, whether the answer was
+                correct and the reaction time in seconds, or None if the message was
+                not an answer.
+        """
+        if len(message) < 3 or (message[0] & 0xF0) != 0x90 or message[2] == 0:
+            return None
+        return self.answer(message[1], event_time)
+
+    def answer(
+        self, midi_note: int, event_time: int
+    ) -> Optional[tuple[str, bool, float]]:
+        """Evaluate a played note against the current note and log the result.
+
+        A correct answer ends the note: the session ID is reset and there is no
+        current note until the next one is shown.
+
+        Args:
+            midi_note (int): The MIDI number of the played note.
+            event_time (int): When the note was played in perf_counter nanoseconds,
+                from the MIDI driver's timestamps.
+
+        Returns:
+            Optional[tuple[str, bool, float]]: The tested note, whether the answer was
+                correct and the reaction time in seconds, or None without a current note
+                or if the note was played before the current note was shown.
+        """
+        tested_note = self.current_note
+        if tested_note is None:
+            return None
+        if self.timer.start_ns is not None and event_time < self.timer.start_ns:
+            # E.g. the rest of a chord whose first key answered the previous note
+            return None
+        time_taken = self.timer.elapsed_until(event_time)
+        self.total_time += time_taken
+        self.attempts += 1
+        lookup_start = time.perf_counter_ns()
+        # Validate against tested range
+        is_correct = (
+            NoteIndex.is_tested(midi_note)
+            and NoteIndex.MIDI_TO_NAME[midi_note] == tested_note
+        )
+        metrics.observe_since("note_lookup", lookup_start)
+        self.scheduler.record(tested_note, is_correct, time_taken)
+        if self.stats is not None:
+            self.stats.record(tested_note, is_correct, time_taken)
+
+        if self.session_id is None:
+            self.session_id = str(ulid())
+
+        # Log the result; the logger resolves the guessed note's name
+        with metrics.time("log_result"):
+            self.logger.log_result(
+                self.session_id,
+                tested_note,
+                midi_note,
+                time_taken,  # Log time_taken in seconds
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                self.timer.display_latency(),
+            )
+
+        if is_correct:
+            self.total_time = 0.0  # Reset total time for the next note
+            self.attempts = 0
+            self.session_id = None  # Reset session ID for the next note
+            self.current_note = None
+        return tested_note, is_correct, time_taken
@@ -0,0 +1,110 @@
+import itertools
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterator, Optional
+
+from config import Config
+from note_image import NoteImageManager
+from practice_session import PracticeSession
+
+
+class NotePrefetcher:
+    """Keep the next notes of a session selected and their images prepared.
+
+    Worker threads pick the upcoming notes and decode their images into the
+    pixel cache while the current note is being answered. Each decoded note is
+    posted back to the Tk thread, where `prepare` creates what is displayed
+    (the PhotoImage) before the note is queued. Showing the next note then only
+    swaps in an image that is already there.
+
+    Notes are picked up to `depth` answers ahead, so the scheduler's weights
+    lag behind by as many answers.
+    """
+
+    def __init__(
+        self,
+        session: PracticeSession,
+        executor: Executor,
+        post: Callable[..., None],
+        prepare: Callable[[str], Any],
+        on_ready: Callable[[], None],
+        depth: int = Config.PREFETCH_DEPTH,
+        key: str = "prefetch",
+    ):
+        """Initialize the prefetcher. Call fill() to start preparing notes.
+
+        Args:
+            session (PracticeSession): The session whose notes are picked.
+            executor (Executor): Runs the note selection and image decoding.
+            post (Callable[..., None]): Hands a callback to the Tk thread, like FrameScheduler.post.
+            prepare (Callable[[str], Any]): Creates the displayed image of a note, on the Tk thread.
+            on_ready (Callable[[], None]): Called on the Tk thread when a note has been prepared.
+            depth (int): The number of notes to keep prepared.
+            key (str): The prefix of the posted updates' keys.
+        """
+        self.session: PracticeSession = session
+        self.executor: Executor = executor
+        self.post: Callable[..., None] = post
+        self.prepare: Callable[[str], Any] = prepare
+        self.on_ready: Callable[[], None] = on_ready
+        self.depth: int = max(1, depth)
+        self.key: str = key
+        # (note name, prepared image, error) in the order the notes will be shown;
+        # the name is None if no note could be selected
+        self.ready: deque[tuple[Optional[str], Any, Optional[Exception]]] = deque()
+        self.in_flight: int = 0
+        # Every prepared note is posted under its own key, so none is coalesced away
+        self._sequence: Iterator[int] = itertools.count()
+
+    def fill(self) -> None:
+        """Start preparing notes until `depth` are ready or in flight. Runs on the Tk thread."""
+        while len(self.ready) + self.in_flight < self.depth:
+            self.in_flight += 1
+            self.executor.submit(self._select_and_decode)
+
+    def take(self) -> Optional[tuple[Optional[str], Any, Optional[Exception]]]:
+        """Take the next prepared note and start preparing another. Runs on the Tk thread.
+
+        Returns:
+            Optional[tuple[Optional[str], Any, Optional[Exception]]]: The note name (None if
+                selecting it failed), its prepared image and the error raised while
+                preparing it, or None if no note is ready yet.
+        """
+        prepared = self.ready.popleft() if self.ready else None
+        self.fill()
+        return prepared
+
+    def _select_and_decode(self) -> None:
+        """Pick a note and decode its image. Runs on a worker thread.
+
+        The outcome is always posted, also if no note could be picked, so that
+        the note is no longer counted as in flight.
+        """
+        note_name = None
+        try:
+            note_name = self.session.next_note()
+            NoteImageManager.get_note_pixels(note_name)
+            error = None
+        except Exception as e:
+            error = e
+        self.post(
+            f"{self.key}:{next(self._sequence)}", self._add_ready, note_name, error
+        )
+
+    def _add_ready(self, note_name: Optional[str], error: Optional[Exception]) -> None:
+        """Prepare a decoded note for display and queue it. Runs on the Tk thread.
+
+        Args:
+            note_name (Optional[str]): The name of the note, or None if selecting it failed.
+            error (Optional[Exception]): The error raised while selecting the note or
+                decoding its image, if any.
+        """
+        self.in_flight -= 1
+        image = None
+        if error is None and note_name is not None:
+            try:
+                image = self.prepare(note_name)
+            except Exception as e:
+                error = e
+        self.ready.append((note_name, image, error))
+        self.on_ready()
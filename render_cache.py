@@ -0,0 +1,83 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from note_image import NoteImageManager
+from note_index import NoteIndex
+
+
+def time_render(batch: bool, note_names: list[str]) -> float:
+    """Render the given notes into a scratch cache directory and time it.
+
+    Args:
+        batch (bool): Whether to render all notes with a single engraver run.
+        note_names (list[str]): The names of the notes to render.
+
+    Returns:
+        float: The time taken in seconds.
+    """
+    original_dir = NoteImageManager.TEMP_DIR
+    scratch_dir = tempfile.mkdtemp(prefix="note_cache_")
+    NoteImageManager.TEMP_DIR = scratch_dir
+    try:
+        start_time = time.perf_counter()
+        if batch:
+            NoteImageManager.render_batch(note_names)
+        else:
+            for note_name in note_names:
+                NoteImageManager._render_to_file(
+                    note_name, NoteImageManager.get_image_path(note_name)
+                )
+        return time.perf_counter() - start_time
+    finally:
+        NoteImageManager.TEMP_DIR = original_dir
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def main() -> None:
+    """Fill the note cache, or compare batch and per-note rendering times."""
+    parser = argparse.ArgumentParser(description="Render the note image cache.")
+    parser.add_argument(
+        "--per-note",
+        action="store_true",
+        help="render with one engraver run per note instead of a single batch",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="time batch and per-note rendering in a scratch directory",
+    )
+    parser.add_argument(
+        "--notes",
+        type=int,
+        default=len(NoteIndex.PLAYABLE_NOTES),
+        help="number of notes to render when comparing (default: all)",
+    )
+    args = parser.parse_args()
+
+    if not args.compare:
+        if not os.path.exists(NoteImageManager.TEMP_DIR):
+            os.makedirs(NoteImageManager.TEMP_DIR)
+        NoteImageManager.clean_up_musicxml_files()
+        NoteImageManager.regenerate_missing_notes(batch=not args.per_note)
+        return
+
+    note_names = list(NoteIndex.PLAYABLE_NOTES)[: args.notes]
+    batch_time = time_render(True, note_names)
+    per_note_time = time_render(False, note_names)
+    print(f"Notes rendered: {len(note_names)}")
+    print(
+        f"Batch:    {batch_time:.2f}s ({batch_time / len(note_names) * 1000:.1f} ms/note)"
+    )
+    print(
+        f"Per-note: {per_note_time:.2f}s "
+        f"({per_note_time / len(note_names) * 1000:.1f} ms/note)"
+    )
+    if batch_time > 0:
+        print(f"Speedup:  {per_note_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Callable, Iterator, Optional
+
+from config import Config
+
+
+class RenderJob:
+    """One engraver run that renders one or more notes."""
+
+    def __init__(
+        self,
+        note_names: list[str],
+        render: Callable[[], None],
+        priority: int,
+    ):
+        """Initialize a queued job.
+
+        Args:
+            note_names (list[str]): The notes the run renders.
+            render (Callable[[], None]): Runs the engraver.
+            priority (int): The job's priority; lower runs first.
+        """
+        self.note_names: list[str] = note_names
+        self.render: Callable[[], None] = render
+        self.priority: int = priority
+        self.future: Future = Future()
+        self.started: bool = False
+
+
+class RenderScheduler:
+    """Run note renders on a few worker threads, one job per note at a time.
+
+    A request for a note that is already queued or rendering returns the
+    existing job's future instead of starting another engraver run on the same
+    files. Requests for notes that are about to be displayed run before
+    background warm-up; a display request for a note that is still queued for
+    warm-up moves that job up. The number of workers is limited, since every
+    job starts a MuseScore process.
+    """
+
+    DISPLAY: int = 0
+    WARM_UP: int = 1
+
+    def __init__(
+        self,
+        render: Callable[[str], None],
+        is_rendered: Callable[[str], bool],
+        max_workers: int = Config.RENDER_WORKERS,
+    ):
+        """Initialize the scheduler. Workers are started on the first request.
+
+        Args:
+            render (Callable[[str], None]): Renders one note into the cache.
+            is_rendered (Callable[[str], bool]): Checks whether a note is already cached.
+            max_workers (int): The maximum number of concurrent renders.
+        """
+        self.render: Callable[[str], None] = render
+        self.is_rendered: Callable[[str], bool] = is_rendered
+        self.max_workers: int = max(1, max_workers)
+        # note name -> the queued or running job that renders it
+        self._jobs: dict[str, RenderJob] = {}
+        # (priority, sequence, job); a job moved up is pushed again, stale entries are skipped
+        self._queue: list[tuple[int, int, RenderJob]] = []
+        self._sequence: Iterator[int] = itertools.count()
+        self._condition: threading.Condition = threading.Condition()
+        self._workers: list[threading.Thread] = []
+        self._shutdown: bool = False
+
+    def request(self, note_name: str, priority: int = DISPLAY) -> Future:
+        """Request a note to be rendered.
+
+        Args:
+            note_name (str): The name of the note.
+            priority (int): DISPLAY or WARM_UP.
+
+        Returns:
+            Future: Completes when the note is in the cache.
+        """
+        with self._condition:
+            job = self._jobs.get(note_name)
+            if job is not None:
+                if priority < job.priority and not job.started:
+                    job.priority = priority
+                    self._push(job)
+                return job.future
+            if self.is_rendered(note_name):
+                future: Future = Future()
+                future.set_result(None)
+                return future
+            job = RenderJob([note_name], lambda: self.render(note_name), priority)
+            self._add(job)
+            return job.future
+
+    def request_batch(
+        self,
+        note_names: list[str],
+        render_batch: Callable[[list[str]], None],
+        priority: int = WARM_UP,
+    ) -> Future:
+        """Request several notes to be rendered with a single engraver run.
+
+        Notes that are already queued or rendering are left to their jobs.
+
+        Args:
+            note_names (list[str]): The names of the notes.
+            render_batch (Callable[[list[str]], None]): Renders a list of notes in one run.
+            priority (int): DISPLAY or WARM_UP.
+
+        Returns:
+            Future: Completes when the batch run has finished; the notes that were
+                already in flight may still be rendering.
+        """
+        with self._condition:
+            batch_notes = [
+                note_name
+                for note_name in note_names
+                if note_name not in self._jobs and not self.is_rendered(note_name)
+            ]
+            if not batch_notes:
+                future: Future = Future()
+                future.set_result(None)
+                return future
+            job = RenderJob(batch_notes, lambda: render_batch(batch_notes), priority)
+            self._add(job)
+            return job.future
+
+    def _add(self, job: RenderJob) -> None:
+        """Register and queue a job, starting a worker if needed. Call with the lock held.
+
+        Args:
+            job (RenderJob): The job.
+        """
+        for note_name in job.note_names:
+            self._jobs[note_name] = job
+        self._push(job)
+        if len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._run_worker, daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _push(self, job: RenderJob) -> None:
+        """Queue a job at its current priority. Call with the lock held.
+
+        Args:
+            job (RenderJob): The job.
+        """
+        heapq.heappush(self._queue, (job.priority, next(self._sequence), job))
+        self._condition.notify()
+
+    def _next_job(self) -> Optional[RenderJob]:
+        """Wait for the highest-priority queued job.
+
+        Returns:
+            Optional[RenderJob]: The job, or None after shutdown.
+        """
+        with self._condition:
+            while True:
+                while self._queue:
+                    priority, _, job = heapq.heappop(self._queue)
+                    if job.started or priority != job.priority:
+                        continue  # Already taken at a higher priority
+                    job.started = True
+                    return job
+                if self._shutdown:
+                    return None
+                self._condition.wait()
+
+    def _run_worker(self) -> None:
+        """Run jobs until shutdown. Runs on a worker thread."""
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            if not job.future.set_running_or_notify_cancel():
+                self._finish(job)
+                continue
+            try:
+                job.render()
+            except Exception as e:
+                self._finish(job)
+                job.future.set_exception(e)
+            else:
+                self._finish(job)
+                job.future.set_result(None)
+
+    def _finish(self, job: RenderJob) -> None:
+        """Forget a job, so that later requests check the cache again.
+
+        Args:
+            job (RenderJob): The finished job.
+        """
+        with self._condition:
+            for note_name in job.note_names:
+                if self._jobs.get(note_name) is job:
+                    del self._jobs[note_name]
+
+    def shutdown(self) -> None:
+        """Stop the workers once the queued jobs are done."""
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
@@ -0,0 +1,363 @@
+import argparse
+import ipaddress
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from config import Config
+from logger import ResultStore
+from metrics import Metrics, metrics
+from note_index import NoteIndex
+from note_stats import NoteStatistics
+from tail_export import ResultsTail
+
+
+class RecentResults:
+    """The latest results, kept in a bounded ring buffer."""
+
+    def __init__(self, max_results: int = Config.RESULTS_SERVER_RECENT):
+        """Initialize an empty buffer.
+
+        Args:
+            max_results (int): The number of results kept.
+        """
+        self.results: deque[dict] = deque(maxlen=max_results)
+        self._lock: threading.Lock = threading.Lock()
+
+    def add(
+        self,
+        session_id: str,
+        tested_note: str,
+        guessed_note: str | int,
+        time_taken: float,
+        timestamp: str,
+    ) -> None:
+        """Add a result, dropping the oldest one if the buffer is full.
+
+        Args:
+            session_id (str): The session ID.
+            tested_note (str): The tested note.
+            guessed_note (str | int): The guessed note, as a name or MIDI number.
+            time_taken (float): The reaction time in seconds.
+            timestamp (str): The timestamp of the result.
+        """
+        if isinstance(guessed_note, int):
+            guessed_note = NoteIndex.display_name(guessed_note)
+        result = {
+            "timestamp": timestamp,
+            "session_id": session_id,
+            "tested_note": tested_note,
+            "guessed_note": guessed_note,
+            "correct": tested_note == guessed_note,
+            "time_taken": round(time_taken, 3),
+        }
+        with self._lock:
+            self.results.append(result)
+
+    def snapshot(self, limit: Optional[int] = None) -> list[dict]:
+        """Get the latest results, newest first.
+
+        Args:
+            limit (Optional[int]): The maximum number of results; defaults to all kept.
+
+        Returns:
+            list[dict]: The results.
+        """
+        with self._lock:
+            results = list(self.results)
+        results.reverse()
+        return results if limit is None else results[:limit]
+
+    def clear(self) -> None:
+        """Forget all results."""
+        with self._lock:
+            self.results.clear()
+
+
+class RecordingStore(ResultStore):
+    """Result store that also keeps every logged result in RecentResults."""
+
+    def __init__(self, store: ResultStore, recent: RecentResults):
+        """Initialize the wrapper.
+
+        Args:
+            store (ResultStore): The store results are written to.
+            recent (RecentResults): Where the latest results are kept.
+        """
+        self.store: ResultStore = store
+        self.recent: RecentResults = recent
+
+    def log_result(
+        self,
+        session_id: str,
+        tested_note: str,
+        guessed_note: str | int,
+        time_taken: float,
+        timestamp: str,
+        display_latency: Optional[float] = None,
+    ) -> None:
+        """Store the result of a note test and keep it as a recent result.
+
+        Args:
+            session_id (str): The session ID.
+            tested_note (str): The tested note.
+            guessed_note (str | int): The guessed note, as a name or MIDI number.
+            time_taken (float): The time taken to guess the note, from the moment it was displayed.
+            timestamp (str): The timestamp of the result.
+            display_latency (Optional[float]): The time between requesting and displaying the note.
+        """
+        self.store.log_result(
+            session_id,
+            tested_note,
+            guessed_note,
+            time_taken,
+            timestamp,
+            display_latency,
+        )
+        self.recent.add(session_id, tested_note, guessed_note, time_taken, timestamp)
+
+    def read_results(self) -> Iterator[tuple[str, str, float]]:
+        """Stream the results of the wrapped store, see ResultStore.read_results().
+
+        Returns:
+            Iterator[tuple[str, str, float]]: Tested note, guessed note and time taken.
+        """
+        return self.store.read_results()
+
+    def close(self) -> None:
+        """Close the wrapped store."""
+        self.store.close()
+
+
+class ResultsRequestHandler(BaseHTTPRequestHandler):
+    """Answer GET requests from the ResultsServer's in-memory aggregates."""
+
+    server: "ResultsHTTPServer"
+
+    def do_GET(self) -> None:
+        """Send the requested aggregates."""
+        status, content_type, body = self.server.results_server.respond(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        """Do not log every request; dashboards poll frequently."""
+
+
+class ResultsHTTPServer(ThreadingHTTPServer):
+    """HTTP server that hands requests to its ResultsServer."""
+
+    daemon_threads = True
+    results_server: "ResultsServer"
+
+
+class ResultsServer:
+    """Local HTTP endpoint for per-note aggregates and recent results.
+
+    Every response is built from in-memory state that is updated as results
+    are logged, so it takes the same few milliseconds however long the
+    history is, and dashboards no longer need to pull the results CSV. The
+    server only binds to loopback addresses and needs no network access.
+
+    Endpoints:
+        /results: JSON with per-note attempts, accuracy and reaction time
+            quantiles and the latest results (?recent=N limits them).
+        /metrics: The same aggregates and the stage latency histograms in the
+            Prometheus text format.
+    """
+
+    QUANTILES: tuple[float, ...] = (0.5, 0.9, 0.99)
+
+    def __init__(
+        self,
+        stats: NoteStatistics,
+        recent: RecentResults,
+        registry: Metrics = metrics,
+        host: str = Config.RESULTS_SERVER_HOST,
+        port: int = Config.RESULTS_SERVER_PORT,
+    ):
+        """Initialize the server. It is bound and started with start().
+
+        Args:
+            stats (NoteStatistics): The per-note statistics to serve.
+            recent (RecentResults): The latest results to serve.
+            registry (Metrics): The stage metrics added to /metrics.
+            host (str): A loopback address or "localhost".
+            port (int): The port; 0 picks a free one.
+        """
+        if host != "localhost" and not ipaddress.ip_address(host).is_loopback:
+            raise ValueError(f"The results server only binds to localhost, not {host}")
+        self.stats: NoteStatistics = stats
+        self.recent: RecentResults = recent
+        self.registry: Metrics = registry
+        self.host: str = host
+        self.port: int = port
+        self._server: Optional[ResultsHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Bind the port and serve requests on a background thread.
+
+        Raises:
+            OSError: If the port cannot be bound.
+        """
+        self._server = ResultsHTTPServer((self.host, self.port), ResultsRequestHandler)
+        self._server.results_server = self
+        self.port = self._server.server_address[1]
+        # A short poll interval, so that stop() returns quickly
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            args=(0.05,),
+            name="results-server",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
+    def respond(self, path: str) -> tuple[int, str, bytes]:
+        """Build the response to a GET request.
+
+        Args:
+            path (str): The request path, with an optional query.
+
+        Returns:
+            tuple[int, str, bytes]: The status code, content type and body.
+        """
+        url = urlsplit(path)
+        if url.path in ("/", "/results"):
+            try:
+                limit = int(parse_qs(url.query).get("recent", ["-1"])[0])
+            except ValueError:
+                limit = -1
+            body = json.dumps(self.to_json(None if limit < 0 else limit))
+            return 200, "application/json", body.encode()
+        if url.path == "/metrics":
+            return 200, "text/plain; version=0.0.4", self.to_prometheus().encode()
+        body = json.dumps({"error": f"Unknown path {url.path}"})
+        return 404, "application/json", body.encode()
+
+    def to_json(self, recent_limit: Optional[int] = None) -> dict:
+        """Get the aggregates as JSON-serializable values.
+
+        Args:
+            recent_limit (Optional[int]): The maximum number of recent results.
+
+        Returns:
+            dict: The per-note figures, totals and recent results.
+        """
+        notes = self.stats.describe(self.QUANTILES)
+        return {
+            "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "attempts": sum(note["attempts"] for note in notes.values()),
+            "correct": sum(note["correct"] for note in notes.values()),
+            "notes": notes,
+            "recent": self.recent.snapshot(recent_limit),
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the aggregates in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text.
+        """
+        notes = self.stats.describe(self.QUANTILES)
+        lines = [
+            "# HELP trainer_note_attempts_total Answers given per tested note.",
+            "# TYPE trainer_note_attempts_total counter",
+        ]
+        for note_name, note in notes.items():
+            lines.append(
+                f'trainer_note_attempts_total{{note="{note_name}"}} {note["attempts"]}'
+            )
+        lines.append(
+            "# HELP trainer_note_correct_total Correct answers per tested note."
+        )
+        lines.append("# TYPE trainer_note_correct_total counter")
+        for note_name, note in notes.items():
+            lines.append(
+                f'trainer_note_correct_total{{note="{note_name}"}} {note["correct"]}'
+            )
+        lines.append(
+            "# HELP trainer_note_reaction_seconds Reaction time of correct answers."
+        )
+        lines.append("# TYPE trainer_note_reaction_seconds summary")
+        for note_name, note in notes.items():
+            for q in self.QUANTILES:
+                lines.append(
+                    f'trainer_note_reaction_seconds{{note="{note_name}",quantile="{q:g}"}} '
+                    f'{note[f"p{q * 100:g}"]:.6f}'
+                )
+            lines.append(
+                f'trainer_note_reaction_seconds_sum{{note="{note_name}"}} '
+                f'{note["mean"] * note["correct"]:.6f}'
+            )
+            lines.append(
+                f'trainer_note_reaction_seconds_count{{note="{note_name}"}} {note["correct"]}'
+            )
+        return "\n".join(lines) + "\n" + self.registry.to_prometheus()
+
+
+def main() -> None:
+    """Command line entry point: serve the aggregates of a results CSV."""
+    parser = argparse.ArgumentParser(
+        description="Serve per-note aggregates of the results CSV on localhost."
+    )
+    parser.add_argument("csv_file", nargs="?", default=Config.OUTPUT_CSV)
+    parser.add_argument("--port", type=int, default=Config.RESULTS_SERVER_PORT)
+    parser.add_argument(
+        "--checkpoint", help="checkpoint file (default: next to the CSV)"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=Config.RESULTS_SERVER_POLL_INTERVAL,
+        metavar="SECONDS",
+        help="how often appended rows are read",
+    )
+    args = parser.parse_args()
+
+    # Only rows appended since the last run are parsed, see tail_export.py
+    tail = ResultsTail(
+        args.csv_file,
+        args.checkpoint
+        or os.path.join(os.path.dirname(args.csv_file), "results_server.json"),
+    )
+    recent = RecentResults()
+    server = ResultsServer(tail.stats, recent, port=args.port)
+    server.start()
+    print(f"Serving http://{server.host}:{server.port}/results and /metrics")
+    try:
+        while True:
+            # Only the latest rows are kept, however many were appended
+            new_rows: deque[list[str]] = deque(maxlen=Config.RESULTS_SERVER_RECENT)
+            tail.update(new_rows.append)
+            if tail.restarted:
+                recent.clear()
+            for row in new_rows:
+                recent.add(row[1], row[2], row[3], float(row[4]), row[0])
+            server.stats = tail.stats
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+import argparse
+import csv
+import math
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from analytics import ResultsHistory
+from config import Config
+from note_stats import LatencySketch, NoteStatistics, NoteStats
+
+# Partial aggregates of a chunk, all indexed by note code:
+# (rows, attempts, correct, mean time, Welford M2, sketch low count, sketch bucket counts)
+Partial = tuple[
+    int, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray
+]
+
+
+class ResultsScanner:
+    """Aggregate a large results CSV in parallel, per tested note.
+
+    The file is memory-mapped and split into line-aligned chunks. Each chunk
+    is parsed by a worker process, which maps the file itself, so only chunk
+    offsets and the small per-note aggregates cross process boundaries:
+    attempts, correct answers, the mean and M2 of correct reaction times and
+    the bucket counts of a LatencySketch. The partials are merged exactly
+    (counts and buckets add up, means and M2 combine with Chan's formula) into
+    a NoteStatistics, the same aggregates the trainer keeps live.
+    """
+
+    NOTE_CODES: int = ResultsHistory.NOTE_CODES
+    # Sketch buckets from LatencySketch.MIN_VALUE up to an hour; slower answers share the last
+    MAX_VALUE: float = 3600.0
+
+    def __init__(
+        self,
+        csv_file: str,
+        workers: Optional[int] = None,
+        chunk_size: int = Config.SCAN_CHUNK_SIZE,
+    ):
+        """Initialize the scanner.
+
+        Args:
+            csv_file (str): The results CSV written by CSVLogger.
+            workers (Optional[int]): The number of worker processes; defaults to the CPU count.
+            chunk_size (int): The target chunk size in bytes.
+        """
+        self.csv_file: str = csv_file
+        self.workers: int = workers or os.cpu_count() or 1
+        self.chunk_size: int = chunk_size
+        # The number of rows aggregated by the last scan
+        self.rows: int = 0
+
+    @staticmethod
+    def sketch_keys() -> tuple[float, int, int]:
+        """Get the sketch's log base and the range of bucket keys used.
+
+        Returns:
+            tuple[float, int, int]: ln(gamma) and the first and last bucket key.
+        """
+        log_gamma = math.log(LatencySketch().gamma)
+        first_key = math.ceil(math.log(LatencySketch.MIN_VALUE) / log_gamma)
+        last_key = math.ceil(math.log(ResultsScanner.MAX_VALUE) / log_gamma)
+        return log_gamma, first_key, last_key
+
+    def chunks(self) -> tuple[int, list[tuple[int, int]]]:
+        """Split the rows of the file into line-aligned byte ranges.
+
+        Returns:
+            tuple[int, list[tuple[int, int]]]: The number of header fields and the
+                (start, end) byte range of every chunk.
+        """
+        size = os.path.getsize(self.csv_file)
+        if size == 0:
+            return 0, []
+        with open(self.csv_file, "rb") as csv_file, mmap.mmap(
+            csv_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            header_end = mapped.find(b"\n") + 1 or size
+            field_count = mapped[:header_end].count(b",") + 1
+            # At least a few chunks per worker, so that uneven chunks balance out
+            count = max(
+                self.workers * 4, math.ceil((size - header_end) / self.chunk_size)
+            )
+            step = max(1, (size - header_end) // count)
+            ranges: list[tuple[int, int]] = []
+            start = header_end
+            while start < size:
+                end = mapped.find(b"\n", min(start + step, size - 1)) + 1 or size
+                ranges.append((start, end))
+                start = end
+        return field_count, ranges
+
+    def scan(self) -> NoteStatistics:
+        """Aggregate every row of the file.
+
+        Returns:
+            NoteStatistics: The per-note statistics.
+        """
+        field_count, ranges = self.chunks()
+        if not ranges:
+            return NoteStatistics()
+        arguments = [(self.csv_file, start, end, field_count) for start, end in ranges]
+        if self.workers == 1:
+            partials = [scan_chunk(*argument) for argument in arguments]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                partials = list(executor.map(scan_chunk, *zip(*arguments)))
+        merged = partials[0]
+        for partial in partials[1:]:
+            merged = merge_partials(merged, partial)
+        self.rows = merged[0]
+        return to_statistics(merged)
+
+
+def scan_chunk(csv_file: str, start: int, end: int, field_count: int) -> Partial:
+    """Aggregate one chunk of rows. Runs in a worker process.
+
+    Args:
+        csv_file (str): The results CSV.
+        start (int): The offset of the chunk's first row.
+        end (int): The offset after the chunk's last row.
+        field_count (int): The number of fields in the header.
+
+    Returns:
+        Partial: The chunk's aggregates.
+    """
+    with open(csv_file, "rb") as results_file, mmap.mmap(
+        results_file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        data = mapped[start:end]
+    tested, guessed, times = parse_chunk(data, field_count)
+    return aggregate(tested, guessed, times)
+
+
+def parse_chunk(
+    data: bytes, field_count: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split a chunk into its tested note, guessed note and time columns.
+
+    CSVLogger never quotes fields, so rows are split on commas and newlines in
+    one pass, like ResultsHistory.load. Chunks that do not split evenly are
+    parsed with the csv module.
+
+    Args:
+        data (bytes): Complete CSV rows.
+        field_count (int): The number of fields per row.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Tested and guessed note names (bytes) and times.
+    """
+    body = data.replace(b"\r\n", b"\n").strip(b"\n")
+    if not body:
+        empty = np.array([], dtype="S1")
+        return empty, empty, np.array([], dtype=np.float64)
+    fields = body.replace(b"\n", b",").split(b",")
+    if b'"' not in body and len(fields) % field_count == 0 and field_count >= 5:
+        try:
+            return (
+                np.array(fields[2::field_count]),
+                np.array(fields[3::field_count]),
+                np.array(fields[4::field_count]).astype(np.float64),
+            )
+        except ValueError:
+            pass  # A malformed time; skip such rows below
+    rows = []
+    for row in csv.reader(body.decode().split("\n")):
+        if len(row) < 5:
+            continue
+        try:
+            rows.append((row[2].encode(), row[3].encode(), float(row[4])))
+        except ValueError:
+            continue
+    if not rows:
+        empty = np.array([], dtype="S1")
+        return empty, empty, np.array([], dtype=np.float64)
+    tested, guessed, times = zip(*rows)
+    return np.array(tested), np.array(guessed), np.array(times, dtype=np.float64)
+
+
+def aggregate(tested: np.ndarray, guessed: np.ndarray, times: np.ndarray) -> Partial:
+    """Compute the per-note aggregates of parsed rows.
+
+    Args:
+        tested (np.ndarray): Tested note names (bytes).
+        guessed (np.ndarray): Guessed note names (bytes).
+        times (np.ndarray): Reaction times in seconds.
+
+    Returns:
+        Partial: The aggregates.
+    """
+    note_codes = ResultsScanner.NOTE_CODES
+    log_gamma, first_key, last_key = ResultsScanner.sketch_keys()
+    bucket_count = last_key - first_key + 1
+    codes_by_name = {
+        name.encode(): code for name, code in ResultsHistory.note_codes().items()
+    }
+    # Map the few distinct names instead of every row
+    names, inverse = np.unique(tested, return_inverse=True)
+    codes = np.array(
+        [codes_by_name.get(name, ResultsHistory.UNKNOWN_NOTE) for name in names],
+        dtype=np.int64,
+    )[inverse.reshape(-1)]
+    correct = tested == guessed
+
+    attempts = np.bincount(codes, minlength=note_codes)
+    correct_codes = codes[correct]
+    correct_times = times[correct]
+    counts = np.bincount(correct_codes, minlength=note_codes)
+    sums = np.bincount(correct_codes, weights=correct_times, minlength=note_codes)
+    means = np.divide(sums, counts, out=np.zeros(note_codes), where=counts > 0)
+    m2 = np.bincount(
+        correct_codes,
+        weights=(correct_times - means[correct_codes]) ** 2,
+        minlength=note_codes,
+    )
+
+    low = correct_times <= LatencySketch.MIN_VALUE
+    low_counts = np.bincount(correct_codes[low], minlength=note_codes)
+    keys = np.ceil(np.log(correct_times[~low]) / log_gamma).astype(np.int64)
+    keys = np.clip(keys, first_key, last_key) - first_key
+    buckets = np.bincount(
+        correct_codes[~low] * bucket_count + keys,
+        minlength=note_codes * bucket_count,
+    ).reshape(note_codes, bucket_count)
+    return len(times), attempts, counts, means, m2, low_counts, buckets
+
+
+def merge_partials(first: Partial, second: Partial) -> Partial:
+    """Merge the aggregates of two chunks.
+
+    Args:
+        first (Partial): The aggregates of one chunk.
+        second (Partial): The aggregates of another chunk.
+
+    Returns:
+        Partial: The aggregates of both.
+    """
+    rows_a, attempts_a, counts_a, means_a, m2_a, low_a, buckets_a = first
+    rows_b, attempts_b, counts_b, means_b, m2_b, low_b, buckets_b = second
+    counts = counts_a + counts_b
+    safe_counts = np.maximum(counts, 1)
+    delta = means_b - means_a
+    means = means_a + delta * counts_b / safe_counts
+    m2 = m2_a + m2_b + delta**2 * counts_a * counts_b / safe_counts
+    return (
+        rows_a + rows_b,
+        attempts_a + attempts_b,
+        counts,
+        means,
+        m2,
+        low_a + low_b,
+        buckets_a + buckets_b,
+    )
+
+
+def to_statistics(partial: Partial) -> NoteStatistics:
+    """Convert merged aggregates to per-note statistics.
+
+    Args:
+        partial (Partial): The merged aggregates.
+
+    Returns:
+        NoteStatistics: The statistics of every note with attempts.
+    """
+    _, attempts, counts, means, m2, low_counts, buckets = partial
+    _, first_key, _ = ResultsScanner.sketch_keys()
+    statistics = NoteStatistics()
+    for code in np.flatnonzero(attempts):
+        stats = NoteStats()
+        stats.attempts = int(attempts[code])
+        stats.correct = int(counts[code])
+        stats.mean = float(means[code])
+        stats.m2 = float(m2[code])
+        stats.sketch.low_count = int(low_counts[code])
+        stats.sketch.buckets = {
+            int(index) + first_key: int(buckets[code, index])
+            for index in np.flatnonzero(buckets[code])
+        }
+        stats.sketch.count = stats.correct
+        statistics.notes[ResultsHistory.note_label(int(code))] = stats
+    return statistics
+
+
+def main() -> None:
+    """Command line entry point for scanning a large results file."""
+    parser = argparse.ArgumentParser(
+        description="Aggregate a large results CSV per tested note, in parallel."
+    )
+    parser.add_argument("csv_file", nargs="?", default=Config.OUTPUT_CSV)
+    parser.add_argument(
+        "--workers", type=int, help="worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=Config.SCAN_CHUNK_SIZE,
+        help="target chunk size in bytes",
+    )
+    args = parser.parse_args()
+
+    scanner = ResultsScanner(args.csv_file, args.workers, args.chunk_size)
+    start_time = time.perf_counter()
+    statistics = scanner.scan()
+    elapsed = time.perf_counter() - start_time
+    size_mb = os.path.getsize(args.csv_file) / (1024 * 1024)
+    print(
+        f"{scanner.rows} rows ({size_mb:.1f} MiB) in {elapsed:.2f}s "
+        f"with {scanner.workers} workers: {size_mb / max(elapsed, 1e-9):.1f} MiB/s"
+    )
+    print(f"  {'note':>7}  {'correct':>17}  {'accuracy':>8}  {'p50':>7}  {'p90':>7}")
+    for note_name in statistics.notes:
+        attempts, correct, accuracy, p50, p90 = statistics.summary(note_name)
+        print(
+            f"  {note_name:>7}  {correct:>8}/{attempts:<8}  {accuracy:8.1%}  "
+            f"{p50:6.3f}s  {p90:6.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import random
+import threading
+from typing import Optional
+
+from config import Config
+
+
+class FenwickTree:
+    """Binary indexed tree over non-negative weights.
+
+    Supports setting a weight and finding the index that a cumulative weight
+    falls into, both in O(log n).
+    """
+
+    def __init__(self, size: int):
+        """Initialize the tree with all weights set to zero.
+
+        Args:
+            size (int): The number of weights.
+        """
+        self.size: int = size
+        self.values: list[float] = [0.0] * size
+        self._tree: list[float] = [0.0] * (size + 1)
+        self._top_bit: int = 1 << (size.bit_length() - 1) if size else 0
+
+    def set(self, index: int, value: float) -> None:
+        """Set the weight at an index.
+
+        Args:
+            index (int): The index of the weight.
+            value (float): The new weight, must not be negative.
+        """
+        delta = value - self.values[index]
+        self.values[index] = value
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count: int) -> float:
+        """Get the sum of the first `count` weights.
+
+        Args:
+            count (int): The number of weights to sum.
+
+        Returns:
+            float: The sum.
+        """
+        total = 0.0
+        i = count
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def total(self) -> float:
+        """Get the sum of all weights.
+
+        Returns:
+            float: The sum.
+        """
+        return self.prefix_sum(self.size)
+
+    def find(self, target: float) -> int:
+        """Find the index whose cumulative weight range contains `target`.
+
+        Args:
+            target (float): A value in [0, total()).
+
+        Returns:
+            int: The smallest index whose prefix sum (inclusive) exceeds `target`.
+        """
+        position = 0
+        bit = self._top_bit
+        while bit:
+            next_position = position + bit
+            if next_position <= self.size and self._tree[next_position] <= target:
+                position = next_position
+                target -= self._tree[next_position]
+            bit >>= 1
+        # Rounding can push the target past the last weight
+        return min(position, self.size - 1)
+
+
+class AdaptiveNoteScheduler:
+    """Pick notes with a probability that grows with recent errors and slow answers.
+
+    Each note keeps an exponentially weighted error rate and response time.
+    Its sampling weight is kept in a Fenwick tree, so recording a result and
+    drawing the next note are both O(log n) in the number of notes.
+    """
+
+    def __init__(
+        self,
+        notes: tuple[str, ...],
+        rng: Optional[random.Random] = None,
+        smoothing: float = Config.SCHEDULER_SMOOTHING,
+        error_weight: float = Config.SCHEDULER_ERROR_WEIGHT,
+        time_weight: float = Config.SCHEDULER_TIME_WEIGHT,
+        target_time: float = Config.SCHEDULER_TARGET_TIME,
+    ):
+        """Initialize the scheduler with every note equally likely.
+
+        Args:
+            notes (tuple[str, ...]): The notes to schedule.
+            rng (Optional[random.Random]): The random number generator to draw with.
+            smoothing (float): How strongly a new result moves a note's averages (0-1).
+            error_weight (float): Extra weight for a note that is always answered wrong.
+            time_weight (float): Extra weight per `target_time` of average response time.
+            target_time (float): The response time in seconds considered fluent.
+        """
+        self.notes: tuple[str, ...] = notes
+        self.rng: random.Random = rng or random.Random()
+        self.smoothing: float = smoothing
+        self.error_weight: float = error_weight
+        self.time_weight: float = time_weight
+        self.target_time: float = target_time
+        self._positions: dict[str, int] = {note: i for i, note in enumerate(notes)}
+        self._error_rates: list[float] = [0.0] * len(notes)
+        self._response_times: list[float] = [target_time] * len(notes)
+        self._weights: FenwickTree = FenwickTree(len(notes))
+        self._lock: threading.Lock = threading.Lock()
+        for i in range(len(notes)):
+            self._weights.set(i, self._weight(i))
+
+    def _weight(self, index: int) -> float:
+        """Compute a note's sampling weight from its averages.
+
+        Args:
+            index (int): The position of the note.
+
+        Returns:
+            float: The weight.
+        """
+        # Cap the time term so that one very slow answer does not dominate
+        slowness = min(self._response_times[index] / self.target_time, 3.0)
+        return (
+            1.0
+            + self.error_weight * self._error_rates[index]
+            + self.time_weight * slowness
+        )
+
+    def record(self, note: str, correct: bool, time_taken: float) -> None:
+        """Update a note's averages and weight with an answer.
+
+        Args:
+            note (str): The tested note.
+            correct (bool): Whether the answer was correct.
+            time_taken (float): The response time in seconds.
+        """
+        index = self._positions.get(note)
+        if index is None:
+            return
+        with self._lock:
+            alpha = self.smoothing
+            self._error_rates[index] += alpha * (
+                (0.0 if correct else 1.0) - self._error_rates[index]
+            )
+            self._response_times[index] += alpha * (
+                time_taken - self._response_times[index]
+            )
+            self._weights.set(index, self._weight(index))
+
+    def next_note(self) -> str:
+        """Draw the next note in proportion to the note weights.
+
+        Returns:
+            str: The next note.
+        """
+        with self._lock:
+            target = self.rng.random() * self._weights.total()
+            return self.notes[self._weights.find(target)]
+
+    def weight(self, note: str) -> float:
+        """Get a note's current sampling weight.
+
+        Args:
+            note (str): The note.
+
+        Returns:
+            float: The weight.
+        """
+        return self._weights.values[self._positions[note]]
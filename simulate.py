@@ -0,0 +1,285 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Iterator, Optional
+
+import numpy as np
+
+from config import Config
+from logger import BackgroundCSVLogger, CSVLogger, ResultStore
+from metrics import metrics
+from midi_file import StandardMidiFile
+from note_index import NoteIndex
+from practice_engine import PracticeEngine
+from practice_session import PracticeSession
+
+
+class SyntheticPlayer:
+    """Generate note-on messages like a player answering the notes on screen."""
+
+    def __init__(
+        self,
+        rate: float,
+        accuracy: float,
+        jitter: float,
+        rng: Optional[random.Random] = None,
+    ):
+        """Initialize the player.
+
+        Args:
+            rate (float): The average number of notes played per second.
+            accuracy (float): The probability that a played note is correct (0-1).
+            jitter (float): The standard deviation of the time between notes in seconds.
+            rng (Optional[random.Random]): The random number generator to use.
+        """
+        self.interval: float = 1.0 / rate
+        self.accuracy: float = accuracy
+        self.jitter: float = jitter
+        self.rng: random.Random = rng or random.Random()
+
+    def events(
+        self, session: PracticeSession, count: int
+    ) -> Iterator[tuple[float, list[int]]]:
+        """Play `count` notes against a session.
+
+        Args:
+            session (PracticeSession): The session whose current note is answered.
+            count (int): The number of notes to play.
+
+        Yields:
+            tuple[float, list[int]]: The delta time in seconds and the note-on message.
+        """
+        for _ in range(count):
+            delta_time = max(0.0, self.rng.gauss(self.interval, self.jitter))
+            tested_midi = NoteIndex.NAME_TO_MIDI.get(session.current_note or "", 60)
+            if self.rng.random() < self.accuracy:
+                midi_note = tested_midi
+            else:
+                # A near miss, as a real player would make
+                midi_note = tested_midi + self.rng.choice((-2, -1, 1, 2))
+            yield delta_time, [0x90, midi_note, 100]
+
+
+def replay_events(path: str) -> Iterator[tuple[float, list[int]]]:
+    """Replay the messages of a Standard MIDI File with their delta times.
+
+    Args:
+        path (str): The path to the .mid file.
+
+    Yields:
+        tuple[float, list[int]]: The delta time in seconds and the message.
+    """
+    last_time = 0.0
+    for seconds, message in StandardMidiFile.read(path):
+        yield seconds - last_time, message
+        last_time = seconds
+
+
+class Simulation(PracticeEngine):
+    """Drive a PracticeSession headlessly through the trainer's input path.
+
+    Every message goes through the same PracticeEngine steps as in the
+    trainer: it is queued with its arrival time as in the rtmidi callback,
+    stamped by a MidiClock and evaluated by the session, which logs the
+    result. After a correct answer the next note is selected (and rendered
+    without Tk, if enabled) and shown.
+    """
+
+    def __init__(
+        self, session: PracticeSession, render: bool = False, realtime: bool = False
+    ):
+        """Initialize the simulation.
+
+        Args:
+            session (PracticeSession): The session to drive.
+            render (bool): Load every shown note image (without Tk).
+            realtime (bool): Deliver messages at their delta times instead of as fast as possible.
+        """
+        super().__init__(session, renderer=self.load_pixels if render else None)
+        self.render: bool = render
+        self.realtime: bool = realtime
+        self.latencies_ns: list[int] = []
+
+    @staticmethod
+    def load_pixels(note_name: str) -> object:
+        """Load the decoded image of a note, as the prefetcher does.
+
+        Args:
+            note_name (str): The name of the note.
+
+        Returns:
+            object: The note image.
+        """
+        # Only needed here, and it pulls in Tk through PIL.ImageTk
+        from note_image import NoteImageManager
+
+        return NoteImageManager.get_note_pixels(note_name)
+
+    def _process(
+        self, message: list[int], delta_time: float, arrival_time: int
+    ) -> None:
+        """Evaluate one message and record its processing latency.
+
+        Args:
+            message (list[int]): The MIDI message bytes.
+            delta_time (float): The driver's delta time in seconds.
+            arrival_time (int): When the message was received, on the engine's clock.
+        """
+        super()._process(message, delta_time, arrival_time)
+        self.latencies_ns.append(self.clock() - arrival_time)
+
+    def run(self, events: Iterator[tuple[float, list[int]]]) -> float:
+        """Feed messages through the input path until the source is exhausted.
+
+        Args:
+            events (Iterator[tuple[float, list[int]]]): Delta times and MIDI messages.
+
+        Returns:
+            float: The elapsed wall-clock time in seconds.
+        """
+        return super().run(events, self.realtime)
+
+    def latency_percentiles(
+        self, percentiles: tuple[float, ...] = (50, 90, 99, 100)
+    ) -> list[float]:
+        """Get percentiles of the per-message processing latency.
+
+        Args:
+            percentiles (tuple[float, ...]): The percentiles to compute.
+
+        Returns:
+            list[float]: The latencies in microseconds.
+        """
+        if not self.latencies_ns:
+            return [0.0] * len(percentiles)
+        return list(np.percentile(np.array(self.latencies_ns), percentiles) / 1000)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Get the peak resident set size of the process, where the platform reports it.
+
+    Returns:
+        Optional[float]: The peak RSS in MiB, or None if unavailable.
+    """
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def create_store(store: str, log_mode: str, output_file: str) -> ResultStore:
+    """Create the result store to log simulated results to.
+
+    Args:
+        store (str): "csv" or "sqlite".
+        log_mode (str): "sync" or "background", for the CSV store.
+        output_file (str): The CSV or database file.
+
+    Returns:
+        ResultStore: The store.
+    """
+    if store == "sqlite":
+        from sqlite_store import SQLiteResultStore
+
+        return SQLiteResultStore(output_file)
+    if log_mode == "background":
+        return BackgroundCSVLogger(output_file)
+    return CSVLogger(output_file)
+
+
+def main() -> None:
+    """Command line entry point for headless load simulation."""
+    parser = argparse.ArgumentParser(
+        description="Drive the trainer logic without Tk or a MIDI port and report throughput."
+    )
+    subparsers = parser.add_subparsers(dest="source", required=True)
+    synthetic = subparsers.add_parser("synthetic", help="generate played notes")
+    synthetic.add_argument("--events", type=int, default=100000)
+    synthetic.add_argument(
+        "--rate", type=float, default=1000.0, help="notes per second"
+    )
+    synthetic.add_argument(
+        "--accuracy", type=float, default=0.8, help="share of correct notes"
+    )
+    synthetic.add_argument(
+        "--jitter", type=float, default=0.0, help="std. deviation between notes (s)"
+    )
+    synthetic.add_argument("--seed", type=int, default=None)
+    replay = subparsers.add_parser("replay", help="replay a Standard MIDI File")
+    replay.add_argument("midi_file")
+    for subparser in (synthetic, replay):
+        subparser.add_argument(
+            "--realtime",
+            action="store_true",
+            help="deliver notes at their times instead of as fast as possible",
+        )
+        subparser.add_argument(
+            "--render", action="store_true", help="load the image of every shown note"
+        )
+        subparser.add_argument("--store", choices=("csv", "sqlite"), default="csv")
+        subparser.add_argument(
+            "--log-mode", choices=("sync", "background"), default=Config.LOG_MODE
+        )
+        subparser.add_argument(
+            "--output", help="results file (default: a temporary file)"
+        )
+        subparser.add_argument(
+            "--trace-memory",
+            action="store_true",
+            help="report Python allocations with tracemalloc (slows the run down)",
+        )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        output_file = args.output or os.path.join(
+            scratch_dir, "results.db" if args.store == "sqlite" else "results.csv"
+        )
+        session = PracticeSession(create_store(args.store, args.log_mode, output_file))
+        simulation = Simulation(session, render=args.render, realtime=args.realtime)
+        if args.source == "synthetic":
+            player = SyntheticPlayer(
+                args.rate, args.accuracy, args.jitter, random.Random(args.seed)
+            )
+            events = player.events(session, args.events)
+        else:
+            events = replay_events(args.midi_file)
+
+        if args.trace_memory:
+            tracemalloc.start()
+        elapsed = simulation.run(events)
+        close_start = time.perf_counter()
+        session.logger.close()
+        close_time = time.perf_counter() - close_start
+        traced_peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+        tracemalloc.stop()
+
+    p50, p90, p99, maximum = simulation.latency_percentiles()
+    print(
+        f"Events: {simulation.event_count} ({simulation.answer_count} answers, "
+        f"{simulation.correct_count} correct) in {elapsed:.3f}s"
+    )
+    print(f"Throughput: {simulation.event_count / max(elapsed, 1e-9):.0f} events/s")
+    print(
+        f"Processing latency (us): p50 {p50:.1f}, p90 {p90:.1f}, p99 {p99:.1f}, max {maximum:.1f}"
+    )
+    transition = metrics.histogram("transition")
+    print(
+        f"Note transition (ms): p50 {transition.quantile(0.5) * 1000:.3f}, "
+        f"p99 {transition.quantile(0.99) * 1000:.3f}"
+    )
+    print(f"Draining the result store on close: {close_time * 1000:.1f} ms")
+    if traced_peak is not None:
+        print(f"Peak traced Python memory: {traced_peak / (1024 * 1024):.1f} MiB")
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"Peak RSS: {rss:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import argparse
+import csv
+import sqlite3
+import threading
+from typing import Iterator, Optional
+
+from config import Config
+from logger import ResultStore
+from note_index import NoteIndex
+
+
+class SQLiteResultStore(ResultStore):
+    """Result store backed by an SQLite database in WAL mode.
+
+    Results are kept in typed columns with indexes on the timestamp and the
+    tested note, so per-note and time-range queries do not scan the history.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            tested_note TEXT NOT NULL,
+            guessed_note TEXT NOT NULL,
+            time_taken REAL NOT NULL,
+            display_latency REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_timestamp
+            ON results (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_results_tested_note
+            ON results (tested_note, timestamp);
+    """
+    INSERT = (
+        "INSERT INTO results "
+        "(timestamp, session_id, tested_note, guessed_note, time_taken, display_latency) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+    IMPORT_BATCH_SIZE = 10000
+
+    def __init__(self, database_file: str):
+        """Open (and if needed create) the results database.
+
+        Args:
+            database_file (str): The path to the SQLite database file.
+        """
+        self.database_file: str = database_file
+        # Results arrive on the MIDI thread, so the connection is shared behind a lock
+        self._connection: sqlite3.Connection = sqlite3.connect(
+            database_file, check_same_thread=False
+        )
+        self._lock: threading.Lock = threading.Lock()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(self.SCHEMA)
+        self._migrate_schema()
+
+    def _migrate_schema(self) -> None:
+        """Add columns introduced after a database was created."""
+        columns = {
+            row[1] for row in self._connection.execute("PRAGMA table_info(results)")
+        }
+        if "display_latency" not in columns:
+            with self._connection:
+                self._connection.execute(
+                    "ALTER TABLE results ADD COLUMN display_latency REAL"
+                )
+
+    def log_result(
+        self,
+        session_id: str,
+        tested_note: str,
+        guessed_note: str | int,
+        time_taken: float,
+        timestamp: str,
+        display_latency: Optional[float] = None,
+    ) -> None:
+        """Insert the result of a note test.
+
+        Args:
+            session_id (str): The session ID.
+            tested_note (str): The tested note.
+            guessed_note (str | int): The guessed note, as a name or MIDI number.
+            time_taken (float): The time taken to guess the note, from the moment it was displayed.
+            timestamp (str): The timestamp of the result.
+            display_latency (Optional[float]): The time between requesting and displaying the note.
+        """
+        if isinstance(guessed_note, int):
+            guessed_note = NoteIndex.display_name(guessed_note)
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    self.INSERT,
+                    (
+                        timestamp,
+                        session_id,
+                        tested_note,
+                        guessed_note,
+                        time_taken,
+                        display_latency,
+                    ),
+                )
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to log result to {self.database_file}") from e
+
+    def query(
+        self,
+        tested_note: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> list[tuple[str, str, str, str, float]]:
+        """Fetch results for a tested note and/or a time range, using the indexes.
+
+        Args:
+            tested_note (Optional[str]): Only return results for this tested note.
+            start (Optional[str]): Only return results at or after this timestamp.
+            end (Optional[str]): Only return results before this timestamp.
+
+        Returns:
+            list[tuple[str, str, str, str, float]]: The matching results in time order.
+        """
+        conditions: list[str] = []
+        parameters: list[str] = []
+        if tested_note is not None:
+            conditions.append("tested_note = ?")
+            parameters.append(tested_note)
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            parameters.append(start)
+        if end is not None:
+            conditions.append("timestamp < ?")
+            parameters.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT timestamp, session_id, tested_note, guessed_note, time_taken "
+                f"FROM results {where} ORDER BY timestamp",
+                parameters,
+            ).fetchall()
+
+    def read_results(self) -> Iterator[tuple[str, str, float]]:
+        """Stream the stored results up to the newest one, on a separate connection.
+
+        Returns:
+            Iterator[tuple[str, str, float]]: Tested note, guessed note and time taken.
+        """
+        with self._lock:
+            last_id = self._connection.execute(
+                "SELECT MAX(id) FROM results"
+            ).fetchone()[0]
+        return self._read_rows(last_id or 0)
+
+    def _read_rows(self, last_id: int) -> Iterator[tuple[str, str, float]]:
+        """Fetch results up to an ID without holding the store's lock.
+
+        Args:
+            last_id (int): The ID of the newest result to return.
+
+        Yields:
+            tuple[str, str, float]: Tested note, guessed note and time taken.
+        """
+        if last_id == 0:
+            return
+        # WAL mode lets this connection read while results are being written
+        connection = sqlite3.connect(self.database_file)
+        try:
+            yield from connection.execute(
+                "SELECT tested_note, guessed_note, time_taken FROM results "
+                "WHERE id <= ? ORDER BY id",
+                (last_id,),
+            )
+        finally:
+            connection.close()
+
+    def import_csv(self, csv_file: str, append: bool = False) -> int:
+        """Bulk-import results from a CSV file written by CSVLogger.
+
+        Rows are inserted in batches inside a single transaction. Results carry
+        no unique key, so importing into a database that already has results
+        would duplicate them if the same CSV was imported before; that takes
+        an explicit append.
+
+        Args:
+            csv_file (str): The path to the results CSV file.
+            append (bool): Import even if the database already has results.
+
+        Returns:
+            int: The number of imported rows.
+
+        Raises:
+            ValueError: If the database has results and append is not set.
+        """
+        imported = 0
+        with open(csv_file, newline="") as csvfile, self._lock, self._connection:
+            if not append:
+                existing = self._connection.execute(
+                    "SELECT COUNT(*) FROM results"
+                ).fetchone()[0]
+                if existing:
+                    raise ValueError(
+                        f"{self.database_file} already has {existing} results; "
+                        "importing again would duplicate them"
+                    )
+            reader = csv.reader(csvfile)
+            next(reader, None)  # Skip the header
+            batch: list[tuple[str, str, str, str, float, Optional[float]]] = []
+            for row in reader:
+                if len(row) < 5:
+                    continue
+                timestamp, session_id, tested_note, guessed_note, time_taken = row[:5]
+                display_latency = row[5] if len(row) > 5 else ""
+                try:
+                    batch.append(
+                        (
+                            timestamp,
+                            session_id,
+                            tested_note,
+                            guessed_note,
+                            float(time_taken),
+                            float(display_latency) if display_latency else None,
+                        )
+                    )
+                except ValueError:
+                    continue
+                if len(batch) >= self.IMPORT_BATCH_SIZE:
+                    self._connection.executemany(self.INSERT, batch)
+                    imported += len(batch)
+                    batch = []
+            if batch:
+                self._connection.executemany(self.INSERT, batch)
+                imported += len(batch)
+        return imported
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def main() -> None:
+    """Command line entry point for managing the SQLite results database."""
+    parser = argparse.ArgumentParser(description="Manage the SQLite results database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser(
+        "migrate", help="bulk-import an existing results CSV into the database"
+    )
+    migrate.add_argument("csv_file", nargs="?", default=Config.OUTPUT_CSV)
+    migrate.add_argument("database_file", nargs="?", default=Config.OUTPUT_DB)
+    migrate.add_argument(
+        "--append",
+        action="store_true",
+        help="import even if the database already has results",
+    )
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        store = SQLiteResultStore(args.database_file)
+        try:
+            imported = store.import_csv(args.csv_file, args.append)
+        except ValueError as e:
+            parser.error(f"{e} (pass --append to import anyway)")
+        finally:
+            store.close()
+        print(
+            f"Imported {imported} results from {args.csv_file} into {args.database_file}"
+        )
+
+
+if __name__ == "__main__":
+    main()
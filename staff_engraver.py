@@ -0,0 +1,282 @@
+import re
+
+from PIL import Image, ImageDraw
+
+
+class StaffEngraver:
+    """Draw a single quarter note on a five-line staff with Pillow primitives."""
+
+    STEPS = "CDEFGAB"
+    NOTE_PATTERN = re.compile(r"^([A-G])(#|b|-)?(-?\d)$")
+    # Diatonic index of the bottom staff line (E4 for treble, G2 for bass)
+    TREBLE_BOTTOM_LINE = 4 * 7 + 2
+    BASS_BOTTOM_LINE = 2 * 7 + 4
+    MIDDLE_C_MIDI = 60
+
+    def __init__(self, line_spacing: int = 12, supersample: int = 3):
+        """Initialize the engraver.
+
+        Args:
+            line_spacing (int): The distance between staff lines in output pixels.
+            supersample (int): The drawing scale factor used for anti-aliasing.
+        """
+        self.line_spacing: int = line_spacing
+        self.supersample: int = supersample
+
+    @staticmethod
+    def parse_note_name(note_name: str) -> tuple[int, int, int]:
+        """Parse a note name into its diatonic index, alteration and MIDI number.
+
+        Args:
+            note_name (str): The name of the note, e.g. "C#4" or "Bb3".
+
+        Returns:
+            tuple[int, int, int]: The diatonic index (octave * 7 + step), the
+                alteration in semitones and the MIDI number.
+        """
+        match = StaffEngraver.NOTE_PATTERN.match(note_name)
+        if not match:
+            raise ValueError(f"Invalid note name: {note_name}")
+        letter, accidental, octave = match.groups()
+        step = StaffEngraver.STEPS.index(letter)
+        alteration = {"#": 1, "b": -1, "-": -1}.get(accidental, 0)
+        octave_number = int(octave)
+        semitone = (0, 2, 4, 5, 7, 9, 11)[step]
+        midi_number = (octave_number + 1) * 12 + semitone + alteration
+        return octave_number * 7 + step, alteration, midi_number
+
+    @staticmethod
+    def staff_position(note_name: str) -> tuple[str, int]:
+        """Get the clef and staff position of a note.
+
+        The position counts lines and spaces upwards from the bottom staff line,
+        so 0 is the bottom line, 1 the first space and 8 the top line.
+
+        Args:
+            note_name (str): The name of the note.
+
+        Returns:
+            tuple[str, int]: The clef ("treble" or "bass") and the staff position.
+        """
+        diatonic, _, midi_number = StaffEngraver.parse_note_name(note_name)
+        if midi_number >= StaffEngraver.MIDDLE_C_MIDI:
+            return "treble", diatonic - StaffEngraver.TREBLE_BOTTOM_LINE
+        return "bass", diatonic - StaffEngraver.BASS_BOTTOM_LINE
+
+    def render(self, note_name: str) -> Image.Image:
+        """Render a note on a staff.
+
+        Args:
+            note_name (str): The name of the note.
+
+        Returns:
+            Image.Image: The rendered note on a transparent background.
+        """
+        clef, position = self.staff_position(note_name)
+        _, alteration, _ = self.parse_note_name(note_name)
+
+        scale = self.supersample
+        space = self.line_spacing * scale
+        half = space / 2
+        stem_length = 3.5 * space
+        stem_up = position < 4
+
+        # Vertical extent in staff positions, including clef, stem and margins
+        top_position = max(12, position + (7 if stem_up else 0) + 2)
+        bottom_position = min(-4, position - (0 if stem_up else 7) - 2)
+        width = int(9 * space)
+        height = int((top_position - bottom_position) * half)
+
+        def y_of(pos: float) -> float:
+            return (top_position - pos) * half
+
+        image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        ink = (0, 0, 0, 255)
+        thin = max(1, scale)
+        thick = max(2, int(space * 0.45))
+
+        # Staff lines
+        staff_left, staff_right = int(0.3 * space), width - int(0.3 * space)
+        for line in range(0, 9, 2):
+            y = y_of(line)
+            draw.line([(staff_left, y), (staff_right, y)], fill=ink, width=thin)
+
+        # Clef
+        clef_x = staff_left + space
+        if clef == "treble":
+            clef_right = self._draw_treble_clef(draw, clef_x, y_of, space, ink, thin)
+        else:
+            clef_right = self._draw_bass_clef(draw, clef_x, y_of, space, ink, thin)
+
+        # Notehead position
+        head_x = int(5.5 * space)
+        head_y = y_of(position)
+        head_w = 1.3 * space
+        head_h = space
+
+        # Ledger lines
+        ledger_left = head_x - head_w / 2 - 0.4 * space
+        ledger_right = head_x + head_w / 2 + 0.4 * space
+        for line in range(-2, position - 1, -2):
+            y = y_of(line)
+            draw.line([(ledger_left, y), (ledger_right, y)], fill=ink, width=thin * 2)
+        for line in range(10, position + 1, 2):
+            y = y_of(line)
+            draw.line([(ledger_left, y), (ledger_right, y)], fill=ink, width=thin * 2)
+
+        # Accidental, moved right if it would touch the clef (e.g. the bass clef dots)
+        accidental_left = clef_right + 0.3 * space
+        if alteration > 0:
+            sharp_x = max(head_x - head_w - 0.3 * space, accidental_left + 0.6 * space)
+            self._draw_sharp(draw, sharp_x, head_y, space, ink, thin, thick)
+        elif alteration < 0:
+            flat_x = max(head_x - head_w - 0.2 * space, accidental_left + 0.5 * space)
+            self._draw_flat(draw, flat_x, head_y, space, ink, thin)
+
+        # Notehead and stem
+        draw.ellipse(
+            [
+                (head_x - head_w / 2, head_y - head_h / 2),
+                (head_x + head_w / 2, head_y + head_h / 2),
+            ],
+            fill=ink,
+        )
+        if stem_up:
+            stem_x = head_x + head_w / 2 - thin
+            draw.line(
+                [(stem_x, head_y), (stem_x, head_y - stem_length)],
+                fill=ink,
+                width=thin * 2,
+            )
+        else:
+            stem_x = head_x - head_w / 2 + thin
+            draw.line(
+                [(stem_x, head_y), (stem_x, head_y + stem_length)],
+                fill=ink,
+                width=thin * 2,
+            )
+
+        if scale > 1:
+            image = image.resize(
+                (width // scale, height // scale), Image.Resampling.LANCZOS
+            )
+        return image
+
+    @staticmethod
+    def _draw_treble_clef(draw, x, y_of, space, ink, thin) -> float:
+        """Draw a simplified G clef curling around the second staff line and return its right edge."""
+        width = thin * 2
+        g_line = y_of(2)
+        # Inner curl around the G line
+        draw.arc(
+            [
+                (x - 0.7 * space, g_line - 0.7 * space),
+                (x + 0.7 * space, g_line + 0.9 * space),
+            ],
+            start=180,
+            end=90,
+            fill=ink,
+            width=width,
+        )
+        draw.arc(
+            [
+                (x - 0.9 * space, g_line - 1.6 * space),
+                (x + 0.9 * space, g_line + 0.9 * space),
+            ],
+            start=90,
+            end=180,
+            fill=ink,
+            width=width,
+        )
+        # Upper loop and spine
+        draw.arc(
+            [(x - 0.5 * space, y_of(10.5)), (x + 0.5 * space, y_of(7.5))],
+            start=180,
+            end=0,
+            fill=ink,
+            width=width,
+        )
+        draw.line(
+            [(x + 0.5 * space, y_of(9)), (x - 0.9 * space, y_of(1))],
+            fill=ink,
+            width=width,
+        )
+        draw.line([(x, y_of(8)), (x, y_of(-2))], fill=ink, width=width)
+        # Tail
+        draw.arc(
+            [(x - 0.8 * space, y_of(-1.2)), (x, y_of(-2.8))],
+            start=0,
+            end=180,
+            fill=ink,
+            width=width,
+        )
+        draw.ellipse(
+            [(x - 0.8 * space, y_of(-1.6)), (x - 0.4 * space, y_of(-2.2))], fill=ink
+        )
+        return x + 0.9 * space + thin
+
+    @staticmethod
+    def _draw_bass_clef(draw, x, y_of, space, ink, thin) -> float:
+        """Draw a simplified F clef with its dots around the fourth staff line and return its right edge."""
+        f_line = y_of(6)
+        dot = 0.22 * space
+        draw.ellipse(
+            [
+                (x - 0.5 * space - dot * 1.5, f_line - dot * 1.5),
+                (x - 0.5 * space + dot * 1.5, f_line + dot * 1.5),
+            ],
+            fill=ink,
+        )
+        draw.arc(
+            [(x - 0.5 * space, y_of(7.2)), (x + 1.1 * space, y_of(4.2))],
+            start=180,
+            end=90,
+            fill=ink,
+            width=thin * 3,
+        )
+        draw.line(
+            [(x + 1.05 * space, y_of(5.4)), (x - 0.6 * space, y_of(0.8))],
+            fill=ink,
+            width=thin * 3,
+        )
+        dots_x = x + 1.6 * space
+        for pos in (7, 5):
+            y = y_of(pos)
+            draw.ellipse([(dots_x - dot, y - dot), (dots_x + dot, y + dot)], fill=ink)
+        return dots_x + dot
+
+    @staticmethod
+    def _draw_sharp(draw, x, y, space, ink, thin, thick) -> None:
+        """Draw a sharp sign centred on (x, y), 1.2 spaces wide."""
+        for dx in (-0.25 * space, 0.25 * space):
+            draw.line(
+                [(x + dx, y - 1.4 * space), (x + dx, y + 1.4 * space)],
+                fill=ink,
+                width=thin * 2,
+            )
+        for dy in (-0.5 * space, 0.5 * space):
+            draw.line(
+                [
+                    (x - 0.6 * space, y + dy + 0.2 * space),
+                    (x + 0.6 * space, y + dy - 0.2 * space),
+                ],
+                fill=ink,
+                width=thick,
+            )
+
+    @staticmethod
+    def _draw_flat(draw, x, y, space, ink, thin) -> None:
+        """Draw a flat sign whose bowl sits on (x, y), reaching 0.5 spaces to the left."""
+        draw.line(
+            [(x - 0.3 * space, y - 1.8 * space), (x - 0.3 * space, y + 0.5 * space)],
+            fill=ink,
+            width=thin * 2,
+        )
+        draw.arc(
+            [(x - 0.5 * space, y - 0.5 * space), (x + 0.4 * space, y + 0.5 * space)],
+            start=270,
+            end=90,
+            fill=ink,
+            width=thin * 3,
+        )
@@ -0,0 +1,54 @@
+import sys
+import time
+
+start_time = time.perf_counter()
+
+import tkinter as tk
+from trainer import NoteTrainer
+
+# How long to wait for the first note before reporting a failure
+FIRST_NOTE_TIMEOUT: float = 30.0  # seconds
+
+
+def main() -> None:
+    """Report import time, time to first window and time to first note shown."""
+    import_time = time.perf_counter() - start_time
+    music21_at_import = "music21" in sys.modules
+
+    root = tk.Tk()
+    app = NoteTrainer(root)
+    root.update()
+    window_time = time.perf_counter() - start_time
+
+    failure = None
+    deadline = time.perf_counter() + FIRST_NOTE_TIMEOUT
+    while not app.note_label.cget("image"):
+        # The note label shows an error instead of an image if the note could not be prepared
+        if app.note_label.cget("text").startswith("Error"):
+            failure = app.note_label.cget("text")
+            break
+        if time.perf_counter() > deadline:
+            failure = f"No note shown within {FIRST_NOTE_TIMEOUT:.0f}s"
+            break
+        root.update()
+        time.sleep(0.005)
+    note_time = time.perf_counter() - start_time
+
+    print(f"Import time:           {import_time * 1000:8.1f} ms")
+    print(f"Time to first window:  {window_time * 1000:8.1f} ms")
+    if failure is not None:
+        print(f"Time to first note:    failed: {failure}")
+        app._on_close()
+        sys.exit(1)
+    print(f"Time to first note:    {note_time * 1000:8.1f} ms")
+    print(f"music21 loaded at import: {'yes' if music21_at_import else 'no'}")
+    print(
+        f"music21 loaded by first note: {'yes' if 'music21' in sys.modules else 'no'}"
+    )
+
+    # Stop the logger and metrics threads, writing what they still hold
+    app._on_close()
+
+
+if __name__ == "__main__":
+    main()
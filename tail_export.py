@@ -0,0 +1,302 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+from typing import IO, Callable, Iterator, Optional
+
+from config import Config
+from note_index import NoteIndex
+from note_stats import NoteStatistics
+
+
+class ResultsTail:
+    """Read only the rows appended to a results CSV since the last run.
+
+    The byte offset and row count already processed are kept in a checkpoint
+    file together with the aggregates built from them, so every run parses
+    only the new rows. They are read in bounded blocks, so memory use does not
+    grow with the backlog, and the offset advances with every complete block.
+    A partly written last line is left for the next run.
+
+    The checkpoint also records the file's identity (device and inode, where
+    the file system has them) and a hash of its first bytes. If the file
+    shrinks below the offset (truncation), or its identity or first bytes
+    change (rotation, or a rewrite such as a header upgrade), the offset and
+    aggregates are reset and the file is read from the start, so the
+    aggregates always describe the current file.
+    """
+
+    FINGERPRINT_BYTES: int = 1024
+
+    def __init__(
+        self,
+        csv_file: str,
+        checkpoint_file: Optional[str] = None,
+        block_size: int = Config.TAIL_BLOCK_SIZE,
+    ):
+        """Initialize the reader from its checkpoint, if there is one.
+
+        Args:
+            csv_file (str): The results CSV written by CSVLogger.
+            checkpoint_file (Optional[str]): Where progress is saved; defaults to a file next to the CSV.
+            block_size (int): The number of bytes read and parsed at a time.
+        """
+        self.csv_file: str = csv_file
+        self.block_size: int = block_size
+        self.checkpoint_file: str = checkpoint_file or os.path.join(
+            os.path.dirname(csv_file), "results_tail.json"
+        )
+        self.offset: int = 0
+        self.rows: int = 0
+        self.file_id: Optional[list[int]] = None
+        self.fingerprint: str = ""
+        self.fingerprint_length: int = 0
+        self.stats: NoteStatistics = NoteStatistics()
+        # Whether the last read started over because the file was truncated or rotated
+        self.restarted: bool = False
+        self._load_checkpoint()
+
+    def _load_checkpoint(self) -> None:
+        """Restore the progress and aggregates of the previous run."""
+        if not os.path.isfile(self.checkpoint_file):
+            return
+        try:
+            with open(self.checkpoint_file) as checkpoint:
+                state = json.load(checkpoint)
+            if state.get("csv_file") != os.path.abspath(self.csv_file):
+                return  # A checkpoint of another file
+            self.offset = state["offset"]
+            self.rows = state["rows"]
+            self.file_id = state["file_id"]
+            self.fingerprint = state["fingerprint"]
+            self.fingerprint_length = state["fingerprint_length"]
+            self.stats = NoteStatistics.from_dict(state["stats"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable checkpoint {self.checkpoint_file}: {e}")
+            self._reset()
+
+    def save_checkpoint(self) -> None:
+        """Save the progress and aggregates, replacing the checkpoint atomically."""
+        state = {
+            "csv_file": os.path.abspath(self.csv_file),
+            "offset": self.offset,
+            "rows": self.rows,
+            "file_id": self.file_id,
+            "fingerprint": self.fingerprint,
+            "fingerprint_length": self.fingerprint_length,
+            "stats": self.stats.to_dict(),
+        }
+        temporary_file = f"{self.checkpoint_file}.tmp"
+        with open(temporary_file, "w") as checkpoint:
+            json.dump(state, checkpoint)
+        os.replace(temporary_file, self.checkpoint_file)
+
+    def _reset(self) -> None:
+        """Forget all progress, so that the file is read from the start."""
+        self.offset = 0
+        self.rows = 0
+        self.file_id = None
+        self.fingerprint = ""
+        self.fingerprint_length = 0
+        self.stats = NoteStatistics()
+
+    @staticmethod
+    def _identity(stat: os.stat_result) -> Optional[list[int]]:
+        """Get the identity of a file, if the file system provides one.
+
+        Args:
+            stat (os.stat_result): The file's status.
+
+        Returns:
+            Optional[list[int]]: Device and inode, or None where the inode is always 0.
+        """
+        return [stat.st_dev, stat.st_ino] if stat.st_ino else None
+
+    def _is_same_file(self, csv_file: IO[bytes], stat: os.stat_result) -> bool:
+        """Check that the file is the one the checkpoint was made for, and not shorter.
+
+        Args:
+            csv_file (IO[bytes]): The open file.
+            stat (os.stat_result): The file's status.
+
+        Returns:
+            bool: False if the file was truncated, rotated or rewritten.
+        """
+        if stat.st_size < self.offset:
+            return False
+        identity = self._identity(stat)
+        if (
+            self.file_id is not None
+            and identity is not None
+            and identity != self.file_id
+        ):
+            return False
+        csv_file.seek(0)
+        prefix = csv_file.read(self.fingerprint_length)
+        return hashlib.sha256(prefix).hexdigest() == self.fingerprint
+
+    def read_new(self) -> list[list[str]]:
+        """Parse the complete rows appended since the last read.
+
+        Returns:
+            list[list[str]]: The new rows, without the header.
+        """
+        return list(self.iter_new())
+
+    def iter_new(self) -> Iterator[list[str]]:
+        """Stream the complete rows appended since the last read, block by block.
+
+        The offset and row count advance once all rows of a block are consumed.
+
+        Returns:
+            Iterator[list[str]]: The new rows, without the header.
+        """
+        self.restarted = False
+        if not os.path.isfile(self.csv_file):
+            if self.offset:
+                self._reset()
+                self.restarted = True
+            return
+        with open(self.csv_file, "rb") as csv_file:
+            stat = os.fstat(csv_file.fileno())
+            if self.offset and not self._is_same_file(csv_file, stat):
+                self._reset()
+                self.restarted = True
+            self.file_id = self._identity(stat)
+            csv_file.seek(self.offset)
+            pending = b""
+            while True:
+                block = csv_file.read(self.block_size)
+                if not block:
+                    break  # A partly written last line is left for the next run
+                pending += block
+                # A line longer than a block is completed by the next one
+                end = pending.rfind(b"\n") + 1
+                if not end:
+                    continue
+                complete, pending = pending[:end], pending[end:]
+                rows = list(csv.reader(io.StringIO(complete.decode(), newline="")))
+                if self.offset == 0 and rows:
+                    rows = rows[1:]  # The header
+                rows = [row for row in rows if row]
+                yield from rows
+                self.offset += len(complete)
+                self.rows += len(rows)
+                if self.fingerprint_length < self.FINGERPRINT_BYTES:
+                    position = csv_file.tell()
+                    csv_file.seek(0)
+                    prefix = csv_file.read(min(self.offset, self.FINGERPRINT_BYTES))
+                    self.fingerprint = hashlib.sha256(prefix).hexdigest()
+                    self.fingerprint_length = len(prefix)
+                    csv_file.seek(position)
+
+    def update(self, on_row: Optional[Callable[[list[str]], None]] = None) -> int:
+        """Add the new rows to the aggregates and save the checkpoint.
+
+        Args:
+            on_row (Optional[Callable[[list[str]], None]]): Called with every valid new row.
+
+        Returns:
+            int: The number of new rows.
+        """
+        new_rows = 0
+        for row in self.iter_new():
+            new_rows += 1
+            if len(row) < 5:
+                continue
+            try:
+                time_taken = float(row[4])
+            except ValueError:
+                continue
+            self.stats.record(row[2], row[2] == row[3], time_taken)
+            if on_row is not None:
+                on_row(row)
+        self.save_checkpoint()
+        return new_rows
+
+    def export(self, summary_file: str) -> None:
+        """Write the per-note aggregates as a small CSV, replacing it atomically.
+
+        Args:
+            summary_file (str): The summary CSV to write.
+        """
+        notes = [
+            note_name
+            for note_name in NoteIndex.TESTED_NOTES
+            if note_name in self.stats.notes
+        ] + sorted(set(self.stats.notes) - set(NoteIndex.TESTED_NOTES))
+        temporary_file = f"{summary_file}.tmp"
+        with open(temporary_file, "w", newline="") as summary:
+            writer = csv.writer(summary)
+            writer.writerow(
+                [
+                    "Tested Note",
+                    "Attempts",
+                    "Correct",
+                    "Accuracy",
+                    "Mean Time (s)",
+                    "P50 Time (s)",
+                    "P90 Time (s)",
+                ]
+            )
+            for note_name in notes:
+                attempts, correct, accuracy, p50, p90 = self.stats.summary(note_name)
+                writer.writerow(
+                    [
+                        note_name,
+                        attempts,
+                        correct,
+                        f"{accuracy:.4f}",
+                        f"{self.stats.notes[note_name].mean:.3f}",
+                        f"{p50:.3f}",
+                        f"{p90:.3f}",
+                    ]
+                )
+        os.replace(temporary_file, summary_file)
+
+
+def main() -> None:
+    """Command line entry point for incremental export of new results."""
+    parser = argparse.ArgumentParser(
+        description="Aggregate the rows appended to the results CSV since the last run."
+    )
+    parser.add_argument("csv_file", nargs="?", default=Config.OUTPUT_CSV)
+    parser.add_argument(
+        "--checkpoint", help="checkpoint file (default: next to the CSV)"
+    )
+    parser.add_argument(
+        "--summary", help="per-note summary CSV to write (default: next to the CSV)"
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="SECONDS",
+        help="keep running and export at this interval",
+    )
+    args = parser.parse_args()
+
+    tail = ResultsTail(args.csv_file, args.checkpoint)
+    summary_file = args.summary or os.path.join(
+        os.path.dirname(args.csv_file), "results_summary.csv"
+    )
+    while True:
+        start_time = time.perf_counter()
+        new_rows = tail.update()
+        tail.export(summary_file)
+        restarted = (
+            " (file was truncated or rotated, started over)" if tail.restarted else ""
+        )
+        print(
+            f"{new_rows} new rows, {tail.rows} in total, exported in "
+            f"{(time.perf_counter() - start_time) * 1000:.1f} ms{restarted}"
+        )
+        if args.watch is None:
+            return
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
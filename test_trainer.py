@@ -1,78 +1,206 @@
 from unittest.mock import patch, MagicMock
 from config import Config
+from analytics import ResultsHistory
+from benchmark import compare, measure
+from frame_scheduler import FrameScheduler
+from image_cache import PhotoImageCache, PixelCache
+from logger import BackgroundCSVLogger, CSVLogger, ResultStore
+from metrics import Metrics, MetricsExporter
+from midi_file import StandardMidiFile
+from midi_manager import MidiClock, MidiPortManager
+from multi_station import MultiStationTrainer
+from note_atlas import NoteAtlas
 from note_image import NoteImageManager
+from note_index import NoteIndex
+from note_stats import NoteStatistics
+from practice_engine import PracticeEngine
+from practice_session import PracticeSession
+from prefetch import NotePrefetcher
+from render_scheduler import RenderScheduler
+from results_server import RecentResults, RecordingStore, ResultsServer
+from scan_results import ResultsScanner
+from scheduler import AdaptiveNoteScheduler, FenwickTree
+from simulate import Simulation, SyntheticPlayer, replay_events
+from sqlite_store import SQLiteResultStore
+from staff_engraver import StaffEngraver
+from tail_export import ResultsTail
+from timer import Timer
 from trainer import NoteTrainer
-from tkinter import Tk, PhotoImage, OptionMenu
+from PIL import Image
+import functools
+import json
 import os
+import pytest
 import random
+import statistics
+import threading
 import time
+import urllib.request
 
 
+class FakeWidget:
+    """Stand-in for a Tk widget, variable or root window that keeps its options.
+
+    Methods without an effect on the tests (pack, after, title, ...) are mocks.
+    """
+
+    def __init__(self, *args, **options):
+        self.options: dict = {"text": "", "image": "", **options}
+        self.value: str = ""
+
+    def config(self, **options) -> None:
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, option: str):
+        return self.options.get(option, "")
+
+    def set(self, value: str) -> None:
+        self.value = value
+
+    def get(self) -> str:
+        return self.value
+
+    def __getattr__(self, name: str) -> MagicMock:
+        method = MagicMock(name=name)
+        setattr(self, name, method)
+        return method
+
+
+class FakeMenu:
+    """Stand-in for the menu of an OptionMenu; only the labels are kept."""
+
+    def __init__(self, labels):
+        self.labels: list[str] = list(labels)
+
+    def add_command(self, label: str, command=None) -> None:
+        self.labels.append(label)
+
+    def delete(self, first: int, last=None) -> None:
+        end = len(self.labels) if last == "end" else (last or first) + 1
+        del self.labels[first:end]
+
+
+def fake_option_menu(master, variable, *values) -> FakeWidget:
+    """Create a fake OptionMenu whose menu holds the values."""
+    option_menu = FakeWidget()
+    option_menu.children = {"menu": FakeMenu(values)}
+    return option_menu
+
+
+def fake_tk() -> MagicMock:
+    """Get a stand-in for the tkinter module whose widgets keep their options."""
+    module = MagicMock()
+    for widget in ("Label", "Frame", "Listbox", "Scrollbar", "Button", "StringVar"):
+        setattr(module, widget, MagicMock(side_effect=FakeWidget))
+    module.OptionMenu = MagicMock(side_effect=fake_option_menu)
+    module.END = "end"
+    return module
+
+
+def headless(test):
+    """Run a view test without a display.
+
+    The views get fake tkinter widgets, results go to an in-memory store,
+    metrics are not exported and the note cache counts as warm.
+    """
+
+    @functools.wraps(test)
+    def run(*args, **kwargs):
+        with (
+            patch("trainer.tk", fake_tk()),
+            patch("multi_station.tk", fake_tk()),
+            patch("trainer.messagebox"),
+            patch("trainer.create_result_store", ListResultStore),
+            patch.object(Config, "METRICS_ENABLED", False),
+            patch("trainer.NoteImageManager.get_missing_notes", return_value=[]),
+            patch("note_image.NoteImageManager.get_note_pixels"),
+        ):
+            return test(*args, **kwargs)
+
+    return run
+
+
+class ListResultStore(ResultStore):
+    """Result store that keeps the logged results in a list."""
+
+    def __init__(self):
+        self.results: list[tuple] = []
+
+    def log_result(self, *result) -> None:
+        self.results.append(result)
+
+
+@headless
 @patch("trainer.MidiPortManager")
 @patch("trainer.NoteImageManager.render_note_image")
 def test_Can_Update_Midi_Port_Dropdown(
     mock_render_note_image: MagicMock, MockMidiPortManager: MagicMock
 ) -> None:
     """Test if the MIDI port dropdown menu updates correctly."""
-    root: Tk = Tk()
-    mock_render_note_image.return_value = PhotoImage()
+    root = FakeWidget()
+    mock_render_note_image.return_value = MagicMock()
     mock_midi_manager = MockMidiPortManager.return_value
-    mock_midi_manager.get_ports.return_value = ["MIDI Device 1", "MIDI Device 2"]
+    mock_midi_manager.get_ports.return_value = ["MIDI Device 1"]
 
     app = NoteTrainer(root)
-    app.midi_manager = mock_midi_manager
-    app.available_ports = mock_midi_manager.get_ports()
-
-    # Simulate UI update
-    app.port_var.set("MIDI Device 1")
-    app.port_menu = OptionMenu(app.master, app.port_var, *app.available_ports)
-    app.port_menu.pack()
+    menu = app.port_menu.children["menu"]
+    assert menu.labels == ["MIDI Device 1"]
 
-    # Check if the OptionMenu contains the correct values
-    menu = app.port_menu["menu"]
-    menu_items = [menu.entrycget(i, "label") for i in range(menu.index("end") + 1)]
-    assert menu_items == ["MIDI Device 1", "MIDI Device 2"]
-
-    # Check if the selected value is correct
-    assert app.port_var.get() == "MIDI Device 1"
+    # Simulate ports being plugged in and unplugged
+    app.port_events.extend([("added", "MIDI Device 2")])
+    app._process_port_events()
+    assert menu.labels == ["MIDI Device 1", "MIDI Device 2"]
+    app.port_events.extend([("removed", "MIDI Device 1")])
+    app._process_port_events()
+    assert menu.labels == ["MIDI Device 2"]
 
-    root.destroy()
+    # The selected port falls back to the remaining one
+    assert app.port_var.get() == "MIDI Device 2"
 
 
+@headless
 @patch("trainer.MidiPortManager")
 @patch("trainer.NoteImageManager.render_note_image")
 def test_Can_React_To_Midi_Connection(
     mock_render_note_image: MagicMock, MockMidiPortManager: MagicMock
 ) -> None:
-    """Test if the application reacts correctly to MIDI connection changes."""
-    root: Tk = Tk()
-    mock_render_note_image.return_value = PhotoImage()
+    """Test if the application reacts correctly to port watcher events."""
+    root = FakeWidget()
+    mock_render_note_image.return_value = MagicMock()
     mock_midi_manager = MockMidiPortManager.return_value
-    mock_midi_manager.get_ports.side_effect = [
-        [],
-        ["MIDI Device 1"],
-        [],
-        ["MIDI Device 1"],
-        [],
-    ]
-    mock_midi_manager.is_port_open.side_effect = [False, True, False]
-    mock_midi_manager.has_ports_changed.return_value = True
+    mock_midi_manager.get_ports.return_value = []
+    mock_midi_manager.is_port_open.return_value = False
 
     app = NoteTrainer(root)
-    app.midi_manager = mock_midi_manager
-
-    # Test each state
-    app._monitor_connection()
+    mock_midi_manager.watch.assert_called_once()
     assert "Disconnected" in app.status_label.cget("text")
 
-    app._monitor_connection()
-    assert "Connected" in app.status_label.cget("text")
+    # A device is plugged in and opened
+    mock_midi_manager.is_port_open.return_value = True
+    app.port_events.extend([("added", "MIDI Device 1")])
+    app._process_port_events()
+    app.frame_scheduler.run_frame()
+    assert app.status_label.cget("text") == "Status: Connected"
+    assert app.available_ports == ["MIDI Device 1"]
+    assert app.port_var.get() == "MIDI Device 1"
+    mock_midi_manager.select_port.assert_called_with(
+        "MIDI Device 1", app._midi_callback
+    )
 
-    app._monitor_connection()
+    # The device is unplugged
+    mock_midi_manager.is_port_open.return_value = False
+    app.port_events.extend(
+        [("removed", "MIDI Device 1"), ("disconnected", "MIDI Device 1")]
+    )
+    app._process_port_events()
+    app.frame_scheduler.run_frame()
     assert "Disconnected" in app.status_label.cget("text")
-    root.destroy()
+    assert app.available_ports == []
 
 
+@headless
 @patch("tkinter.OptionMenu", new=MagicMock())
 @patch("trainer.MidiPortManager")
 @patch("trainer.NoteImageManager.render_note_image")
@@ -80,107 +208,985 @@ def test_Can_Configure_Window(
     mock_render_note_image: MagicMock, MockMidiPortManager: MagicMock
 ) -> None:
     """Test window configuration settings."""
-    root: Tk = Tk()
-    mock_render_note_image.return_value = PhotoImage()
+    root = FakeWidget()
+    mock_render_note_image.return_value = MagicMock()
     mock_midi_manager = MockMidiPortManager.return_value
 
     app = NoteTrainer(root)
     app.midi_manager = mock_midi_manager
 
-    assert not app.master.resizable()[0]  # width not resizable
-    assert not app.master.resizable()[1]  # height not resizable
-    root.destroy()
+    root.resizable.assert_called_once_with(False, False)  # not resizable
+    root.protocol.assert_called_once_with("WM_DELETE_WINDOW", app._on_close)
 
 
+@headless
 @patch("trainer.MidiPortManager")
 @patch("trainer.NoteImageManager.render_note_image")
 def test_Can_Initialize_Midi_Manager(
     mock_render_note_image: MagicMock, MockMidiPortManager: MagicMock
 ) -> None:
     """Test MIDI manager initialization and port setup."""
-    root: Tk = Tk()
-    mock_render_note_image.return_value = PhotoImage()
+    root = FakeWidget()
+    mock_render_note_image.return_value = MagicMock()
     mock_midi_manager = MockMidiPortManager.return_value
     mock_midi_manager.get_ports.return_value = ["MIDI Device 1", "MIDI Device 2"]
 
     app = NoteTrainer(root)
 
     # Check if the OptionMenu contains the correct values
-    menu = app.port_menu["menu"]
-    menu_items = [menu.entrycget(i, "label") for i in range(menu.index("end") + 1)]
-    assert menu_items == ["MIDI Device 1", "MIDI Device 2"]
+    assert app.port_menu.children["menu"].labels == ["MIDI Device 1", "MIDI Device 2"]
 
     # Check if the selected value is correct
     assert app.port_var.get() == "MIDI Device 1"  # Should default to first port
-    assert app.port_menu.cget("text") == "MIDI Device 1"  # Should be set in UI
+    mock_midi_manager.select_port.assert_called_once_with(
+        "MIDI Device 1", app._midi_callback
+    )
+
+
+def test_Can_Handle_Midi_Callback_Correct_Note() -> None:
+    """Test handling of a MIDI message for a correct note."""
+    now = [10**9]
+    session = PracticeSession(ListResultStore(), timer=Timer(lambda: now[0]))
+    answers = []
+    engine = PracticeEngine(
+        session, on_answer=lambda *answer: answers.append(answer), advance=False
+    )
+    tested_note = random.choice(NoteIndex.TESTED_NOTES)
+    engine.show_note(tested_note)
+    midi_note = NoteIndex.NAME_TO_MIDI[tested_note]
 
-    root.destroy()
+    now[0] += 500_000_000
+    engine.receive([0x90, midi_note, 127], 0.01)
+    engine.process_events()
 
+    assert answers == [(midi_note, tested_note, True, 0.5)]
+    assert session.attempts == 0 and session.current_note is None
 
+
+def test_Can_Handle_Midi_Callback_Incorrect_Note() -> None:
+    """Test handling of a MIDI message for an incorrect note."""
+    now = [10**9]
+    session = PracticeSession(ListResultStore(), timer=Timer(lambda: now[0]))
+    answers = []
+    engine = PracticeEngine(
+        session, on_answer=lambda *answer: answers.append(answer), advance=False
+    )
+    tested_note = random.choice(NoteIndex.TESTED_NOTES)
+    engine.show_note(tested_note)
+    incorrect_midi_note = (NoteIndex.NAME_TO_MIDI[tested_note] + 1) % 128
+
+    now[0] += 500_000_000
+    engine.receive([0x90, incorrect_midi_note, 127], 0.01)
+    engine.process_events()
+
+    assert answers == [(incorrect_midi_note, tested_note, False, 0.5)]
+    assert session.attempts == 1 and session.current_note == tested_note
+
+
+@headless
 @patch("trainer.MidiPortManager")
 @patch("trainer.NoteImageManager.render_note_image")
-def test_Can_Handle_Midi_Callback_Correct_Note(
+def test_Can_Update_Time_Label(
     mock_render_note_image: MagicMock, MockMidiPortManager: MagicMock
 ) -> None:
-    """Test handling of MIDI callback for a correct note."""
-    root: Tk = Tk()
-    mock_render_note_image.return_value = PhotoImage()
-    mock_midi_manager = MockMidiPortManager.return_value
+    """Test if the time label shows the time since the note was shown."""
+    now = [10**9]
+    app = NoteTrainer(FakeWidget())
+    app.session.timer = Timer(lambda: now[0])
+    app.engine.show_note("C4")
 
-    app = NoteTrainer(root)
-    app.midi_manager = mock_midi_manager
-    app.current_note = random.choice(list(Config.TESTED_NOTES.keys()))
-    midi_note = Config.TESTED_NOTES[app.current_note]
+    now[0] += 100_000_000
+    app._update_time_label()
+    assert app.time_label.cget("text") == "Time Taken: 0.10s"
 
-    app._midi_callback(([0x90, midi_note, 127], 0.01))
+    # Frames that would not change the text leave the label alone
+    app.time_label.config = MagicMock()
+    now[0] += 1_000_000
+    app._update_time_label()
+    app.time_label.config.assert_not_called()
+    now[0] += 10_000_000
+    app._update_time_label()
+    app.time_label.config.assert_called_once_with(text="Time Taken: 0.11s")
 
-    assert "Correct" in app.correct_note_label.cget("text")
-    assert app.attempts == 0
 
-    root.destroy()
+def test_Can_Order_Batch_Pages(tmp_path) -> None:
+    """Test that batch render pages are returned in numeric page order."""
+    for page in ["_batch-10.png", "_batch-02.png", "_batch-01.png", "C4.png"]:
+        (tmp_path / page).write_bytes(b"")
 
+    with patch.object(NoteImageManager, "TEMP_DIR", str(tmp_path)):
+        pages = NoteImageManager._find_batch_pages()
 
+    assert [os.path.basename(page) for page in pages] == [
+        "_batch-01.png",
+        "_batch-02.png",
+        "_batch-10.png",
+    ]
+
+
+def test_Can_Round_Trip_Note_Atlas(tmp_path) -> None:
+    """Test that notes packed into an atlas are cut back out unchanged."""
+    images = {
+        "C4": Image.new("RGBA", (30, 40), (0, 0, 0, 255)),
+        "D4": Image.new("RGBA", (25, 60), (255, 0, 0, 128)),
+    }
+    pixels_path = str(tmp_path / "atlas.raw")
+    index_path = str(tmp_path / "atlas.json")
+    NoteAtlas.pack(images).save(pixels_path, index_path)
+
+    atlas = NoteAtlas.load(pixels_path, index_path)
+
+    assert "C4" in atlas and "E4" not in atlas
+    for note_name, image in images.items():
+        assert atlas.get_note_image(note_name).tobytes() == image.tobytes()
+    atlas.close()
+
+
+def test_Can_Build_Note_Atlas_In_Cache_Dir(tmp_path) -> None:
+    """Test that the atlas is written to and loaded from the note image cache directory."""
+    Image.new("RGBA", (30, 40), (0, 0, 0, 255)).save(tmp_path / "C4.png")
+
+    with patch.object(NoteImageManager, "TEMP_DIR", str(tmp_path)), patch.multiple(
+        NoteImageManager, _atlas=None, _atlas_loaded=False
+    ):
+        NoteAtlas.build(str(tmp_path), ["C4", "D4"]).close()
+        atlas = NoteImageManager.get_atlas()
+
+    assert sorted(os.listdir(tmp_path)) == [
+        "C4.png",
+        "note_atlas.json",
+        "note_atlas.raw",
+    ]
+    assert atlas is not None and "C4" in atlas and "D4" not in atlas
+    atlas.close()
+
+
+def test_Can_Place_Notes_On_Staff() -> None:
+    """Test that the built-in engraver places notes on the right clef and line."""
+    assert StaffEngraver.staff_position("E4") == ("treble", 0)
+    assert StaffEngraver.staff_position("F5") == ("treble", 8)
+    assert StaffEngraver.staff_position("C4") == ("treble", -2)
+    assert StaffEngraver.staff_position("C#4") == ("treble", -2)
+    assert StaffEngraver.staff_position("B3") == ("bass", 9)
+    assert StaffEngraver.staff_position("G2") == ("bass", 0)
+    assert StaffEngraver.parse_note_name("A0")[2] == 21
+    assert StaffEngraver.parse_note_name("C8")[2] == 108
+
+
+def test_Can_Render_All_Notes_With_Pillow_Engraver() -> None:
+    """Test that the built-in engraver renders every playable note."""
+    engraver = StaffEngraver()
+    for note_name in NoteIndex.PLAYABLE_NOTES:
+        image = engraver.render(note_name)
+        assert image.mode == "RGBA"
+        assert image.width > 0 and image.height > 0
+
+
+def test_Can_Keep_Sharps_Clear_Of_The_Bass_Clef() -> None:
+    """Test that sharps next to the bass clef dots are drawn right of the clef."""
+    engraver = StaffEngraver()
+    space = engraver.line_spacing * engraver.supersample
+    draw_bass_clef = StaffEngraver._draw_bass_clef
+    clef_right, sharp_left = [], []
+
+    def record_clef(*args) -> float:
+        clef_right.append(draw_bass_clef(*args))
+        return clef_right[-1]
+
+    def record_sharp(draw, x, *args) -> None:
+        # The sharp is 1.2 spaces wide, centred on x
+        sharp_left.append(x - 0.6 * space)
+
+    with patch.object(
+        StaffEngraver, "_draw_bass_clef", side_effect=record_clef
+    ), patch.object(StaffEngraver, "_draw_sharp", side_effect=record_sharp):
+        for note_name in ("F#3", "G#3"):
+            engraver.render(note_name)
+
+    assert len(sharp_left) == 2
+    for clef_edge, sharp_edge in zip(clef_right, sharp_left):
+        assert sharp_edge > clef_edge
+
+
+@headless
 @patch("trainer.MidiPortManager")
+@patch("trainer.NoteImageManager.regenerate_missing_notes")
+@patch("trainer.NoteImageManager.get_missing_notes")
 @patch("trainer.NoteImageManager.render_note_image")
-def test_Can_Handle_Midi_Callback_Incorrect_Note(
-    mock_render_note_image: MagicMock, MockMidiPortManager: MagicMock
+def test_Can_Show_Window_Before_Cache_Warm_Up(
+    mock_render_note_image: MagicMock,
+    mock_get_missing_notes: MagicMock,
+    mock_regenerate_missing_notes: MagicMock,
+    MockMidiPortManager: MagicMock,
 ) -> None:
-    """Test handling of MIDI callback for an incorrect note."""
-    root: Tk = Tk()
-    mock_render_note_image.return_value = PhotoImage()
-    mock_midi_manager = MockMidiPortManager.return_value
+    """Test that the UI and the first note are shown while missing notes render in the background."""
+    root = FakeWidget()
+    mock_render_note_image.return_value = MagicMock()
+    mock_get_missing_notes.return_value = ["C4"]
+    release = threading.Event()
+    mock_regenerate_missing_notes.side_effect = lambda progress: release.wait(5)
 
     app = NoteTrainer(root)
-    app.midi_manager = mock_midi_manager
-    app.current_note = random.choice(list(Config.TESTED_NOTES.keys()))
-    incorrect_midi_note = (Config.TESTED_NOTES[app.current_note] + 1) % 128
 
-    app._midi_callback(([0x90, incorrect_midi_note, 127], 0.01))
+    assert app.port_menu is not None
+    assert "Preparing" in app.progress_label.cget("text")
 
-    assert "Correct" not in app.correct_note_label.cget("text")
-    assert app.attempts == 1
+    # The first note only waits for its own image
+    deadline = time.monotonic() + 5
+    while app.session.current_note is None and time.monotonic() < deadline:
+        app.frame_scheduler.run_frame()
+        time.sleep(0.01)
+    assert app.session.current_note is not None and app.session.timer.is_running()
+    assert not app.warm_up_done.is_set()
 
-    root.destroy()
+    release.set()
+    assert app.warm_up_done.wait(5)
+    app.frame_scheduler.run_frame()
+    assert app.progress_label.cget("text") == ""
 
 
-@patch("trainer.MidiPortManager")
-@patch("trainer.NoteImageManager.render_note_image")
-def test_Can_Update_Time_Label(
-    mock_render_note_image: MagicMock, MockMidiPortManager: MagicMock
+def test_Can_Look_Up_Notes_In_Both_Directions() -> None:
+    """Test the note index tables generated from the configured ranges."""
+    assert len(NoteIndex.MIDI_TO_NAME) == 128
+    assert len(NoteIndex.PLAYABLE_NOTES) == 88
+    assert NoteIndex.PLAYABLE_NOTES[0] == "A0" and NoteIndex.PLAYABLE_NOTES[-1] == "C8"
+    assert NoteIndex.TESTED_NOTES[0] == "C2" and NoteIndex.TESTED_NOTES[-1] == "C6"
+    for name, midi_number in NoteIndex.NAME_TO_MIDI.items():
+        assert NoteIndex.MIDI_TO_NAME[midi_number] == name
+    assert NoteIndex.MIDI_TO_NAME[60] == "C4"
+    assert NoteIndex.MIDI_TO_NAME[20] is None
+    assert NoteIndex.display_name(20) == "Note20"
+    assert NoteIndex.is_tested(36) and NoteIndex.is_tested(84)
+    assert not NoteIndex.is_tested(35) and not NoteIndex.is_tested(85)
+    assert NoteIndex.TESTED_MASK == sum(1 << n for n in range(36, 85))
+
+
+def test_Can_Drain_Background_Logger_On_Close(tmp_path) -> None:
+    """Test that queued results are batched and fully written on close."""
+    output_file = str(tmp_path / "results.csv")
+    logger = BackgroundCSVLogger(output_file, batch_size=100, flush_interval=60.0)
+
+    for midi_number in range(60, 65):
+        logger.log_result("session", "C4", midi_number, 0.5, "2024-01-01 00:00:00")
+    logger.close()
+
+    with open(output_file) as csvfile:
+        lines = csvfile.read().splitlines()
+    assert lines[0] == (
+        "Timestamp,Session ID,Tested Note,Guessed Note,Time Taken (s),Display Latency (s)"
+    )
+    assert [line.split(",")[3] for line in lines[1:]] == [
+        "C4",
+        "C#4",
+        "D4",
+        "D#4",
+        "E4",
+    ]
+
+
+def test_Can_Bound_Pending_Results_While_Writes_Fail(tmp_path) -> None:
+    """Failed writes are retried at the flush interval and pending rows stay bounded."""
+    logger = BackgroundCSVLogger(
+        str(tmp_path / "results.csv"), batch_size=2, flush_interval=0.05, queue_size=5
+    )
+    with patch.object(logger, "_write_rows", return_value=False) as mock_write_rows:
+        for _ in range(20):
+            logger.log_result("session", "C4", 60, 0.5, "2024-01-01 00:00:00")
+        time.sleep(0.2)
+        logger.close()
+
+    # One attempt per flush interval and a last one on close, not one per row
+    assert mock_write_rows.call_count <= 7
+    assert logger.unwritten_rows == 5
+    assert logger.dropped_rows == 15
+
+
+def test_Can_Migrate_Csv_Results_To_Sqlite(tmp_path) -> None:
+    """Test that CSV results import into SQLite and can be queried by note and time."""
+    csv_file = str(tmp_path / "results.csv")
+    logger = CSVLogger(csv_file)
+    logger.log_result("a", "C4", 60, 0.5, "2024-01-01 10:00:00")
+    logger.log_result("a", "C4", 62, 0.75, "2024-01-02 10:00:00")
+    logger.log_result("b", "D4", 62, 1.0, "2024-01-03 10:00:00")
+
+    store = SQLiteResultStore(str(tmp_path / "results.db"))
+    assert store.import_csv(csv_file) == 3
+    # A second migration of the same CSV must not duplicate the results
+    with pytest.raises(ValueError):
+        store.import_csv(csv_file)
+    store.log_result("c", "C4", 61, 0.25, "2024-01-04 10:00:00")
+
+    assert [row[3] for row in store.query(tested_note="C4")] == ["C4", "D4", "C#4"]
+    assert store.query(start="2024-01-02", end="2024-01-04") == [
+        ("2024-01-02 10:00:00", "a", "C4", "D4", 0.75),
+        ("2024-01-03 10:00:00", "b", "D4", "D4", 1.0),
+    ]
+    store.close()
+
+
+def test_Can_Aggregate_Results_History(tmp_path) -> None:
+    """Test the vectorized per-note, confusion and trend aggregates."""
+    csv_file = str(tmp_path / "results.csv")
+    logger = CSVLogger(csv_file)
+    logger.log_result("s1", "C4", 62, 1.0, "2024-01-01 10:00:00")
+    logger.log_result("s1", "C4", 60, 2.0, "2024-01-01 10:00:05")
+    logger.log_result("s2", "C4", 60, 4.0, "2024-01-02 09:00:00")
+    logger.log_result("s3", "D4", 62, 0.5, "2024-01-02 09:01:00")
+
+    history = ResultsHistory.load(csv_file)
+
+    assert len(history) == 4
+    assert history.note_accuracy() == {"C4": (3, 2, 2 / 3), "D4": (1, 1, 1.0)}
+    assert history.latency_percentiles((0, 50, 100)) == {
+        "C4": (2.0, 3.0, 4.0),
+        "D4": (0.5, 0.5, 0.5),
+    }
+    assert history.confusion_counts() == {
+        ("C4", "C4"): 2,
+        ("C4", "D4"): 1,
+        ("D4", "D4"): 1,
+    }
+    assert history.daily_trend() == [
+        ("2024-01-01", 2, 0.5, 1.5),
+        ("2024-01-02", 2, 1.0, 2.25),
+    ]
+    assert [session[:2] for session in history.session_trend()] == [
+        ("s1", 2),
+        ("s2", 1),
+        ("s3", 1),
+    ]
+
+
+def test_Can_Find_Weighted_Index_In_Fenwick_Tree() -> None:
+    """Test that Fenwick tree lookups match a linear scan of cumulative weights."""
+    tree = FenwickTree(5)
+    for index, weight in enumerate([1.0, 0.0, 2.0, 0.5, 1.5]):
+        tree.set(index, weight)
+
+    assert tree.total() == 5.0
+    assert [
+        tree.find(target) for target in [0.0, 0.99, 1.0, 2.99, 3.0, 3.49, 3.5, 4.99]
+    ] == [0, 0, 2, 2, 3, 3, 4, 4]
+
+    tree.set(2, 0.0)
+    assert tree.total() == 3.0
+    assert tree.find(1.0) == 3
+
+
+def test_Can_Favour_Notes_With_Errors_In_Scheduler() -> None:
+    """Test that the adaptive scheduler shows frequently missed notes more often."""
+    scheduler = AdaptiveNoteScheduler(("C4", "D4", "E4"), rng=random.Random(42))
+    for _ in range(10):
+        scheduler.record("D4", False, 5.0)
+        scheduler.record("C4", True, 0.5)
+
+    draws = [scheduler.next_note() for _ in range(3000)]
+
+    assert scheduler.weight("D4") > scheduler.weight("E4") > scheduler.weight("C4")
+    assert draws.count("D4") > draws.count("E4") > draws.count("C4")
+
+
+def test_Can_Timestamp_Midi_Events_From_Driver_Deltas() -> None:
+    """Test that MIDI event times follow driver deltas, not delayed arrival times."""
+    clock = MidiClock()
+
+    assert clock.stamp(0.0, 100_000_000_000) == 100_000_000_000
+    # Arrived 0.3s late because the UI was busy; the driver delta says 0.5s later
+    assert clock.stamp(0.5, 100_800_000_000) == 100_500_000_000
+    # A message with less delay than the first one moves the offset back
+    assert clock.stamp(0.25, 100_700_000_000) == 100_700_000_000
+
+
+@patch("midi_manager.rtmidi")
+def test_Can_Reset_Midi_Clock_When_Port_Reconnects(mock_rtmidi: MagicMock) -> None:
+    """After a gap and a reconnect, stamps follow the driver's new timeline."""
+    mock_midi_in = mock_rtmidi.MidiIn.return_value
+    mock_midi_in.get_ports.return_value = ["Piano"]
+    mock_midi_in.is_port_open.return_value = False
+    clock = MidiClock()
+    manager = MidiPortManager(clock)
+    manager.select_port("Piano", MagicMock())
+    assert clock.stamp(0.0, 100_000_000_000) == 100_000_000_000
+    assert clock.stamp(0.5, 100_500_000_000) == 100_500_000_000
+
+    # Unplugged for a minute; rtmidi starts over with delta 0 when the port reopens
+    mock_midi_in.is_port_open.return_value = True
+    mock_midi_in.get_ports.return_value = []
+    manager.poll_ports()
+    mock_midi_in.is_port_open.return_value = False
+    mock_midi_in.get_ports.return_value = ["Piano"]
+    assert ("connected", "Piano") in manager.poll_ports()
+    assert clock.stamp(0.0, 161_000_000_000) == 161_000_000_000
+    assert clock.stamp(0.25, 161_250_000_000) == 161_250_000_000
+
+
+def test_Can_Separate_Display_Latency_From_Reaction_Time() -> None:
+    """Test that the reaction time starts when the note is shown, not when requested."""
+    timer = Timer()
+    timer.request()
+    time.sleep(0.05)
+    timer.start()
+
+    assert timer.display_latency() >= 0.05
+    assert timer.elapsed_until(timer.start_ns + 250_000_000) == 0.25
+    assert timer.elapsed_until(timer.start_ns - 1) == 0.0
+
+
+def test_Can_Upgrade_Csv_Headers_With_Display_Latency(tmp_path) -> None:
+    """Test that an older results file gains the display latency column."""
+    output_file = tmp_path / "results.csv"
+    output_file.write_text(
+        "Timestamp,Session ID,Tested Note,Guessed Note,Time Taken (s)\n"
+        "2024-01-01 10:00:00,a,C4,C4,0.500\n"
+    )
+
+    logger = CSVLogger(str(output_file))
+    logger.log_result("b", "D4", 62, 0.25, "2024-01-01 10:00:01", 0.012)
+
+    assert output_file.read_text().splitlines() == [
+        "Timestamp,Session ID,Tested Note,Guessed Note,Time Taken (s),Display Latency (s)",
+        "2024-01-01 10:00:00,a,C4,C4,0.500,",
+        "2024-01-01 10:00:01,b,D4,D4,0.250,0.012",
+    ]
+
+    # The background logger upgrades the file on its writer thread
+    output_file.write_text(
+        "Timestamp,Session ID,Tested Note,Guessed Note,Time Taken (s)\n"
+        "2024-01-01 10:00:00,a,C4,C4,0.500\n"
+    )
+    logger = BackgroundCSVLogger(str(output_file))
+    logger.log_result("b", "D4", 62, 0.25, "2024-01-01 10:00:01", 0.012)
+    logger.close()
+    assert output_file.read_text().splitlines()[1:] == [
+        "2024-01-01 10:00:00,a,C4,C4,0.500,",
+        "2024-01-01 10:00:01,b,D4,D4,0.250,0.012",
+    ]
+
+
+def test_Can_Export_Stage_Metrics(tmp_path) -> None:
+    """Stage latencies are bucketed and exported in the Prometheus text format."""
+    registry = Metrics()
+    for milliseconds in range(1, 101):
+        registry.observe("note_lookup", milliseconds / 1000)
+    histogram = registry.histogram("note_lookup")
+    assert histogram.count == 100
+    assert 0.025 <= histogram.quantile(0.5) <= 0.05
+    assert histogram.quantile(1.0) == 0.1
+
+    output_file = tmp_path / "trainer_metrics.prom"
+    MetricsExporter(registry, str(output_file), "prometheus").export()
+    text = output_file.read_text()
+    assert 'trainer_stage_seconds_bucket{stage="note_lookup",le="0.01"} 10' in text
+    assert 'trainer_stage_seconds_count{stage="note_lookup"} 100' in text
+
+    # An unexpected error does not stop the exporter thread
+    registry = MagicMock()
+    registry.to_prometheus.side_effect = [RuntimeError("changed size")] + [
+        "# ok\n"
+    ] * 100
+    exporter = MetricsExporter(registry, str(output_file), "prometheus", interval=0.01)
+    exporter.start()
+    deadline = time.monotonic() + 5
+    while registry.to_prometheus.call_count < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    exporter.stop()
+    assert output_file.read_text() == "# ok\n"
+
+
+@patch("midi_manager.rtmidi")
+def test_Can_Diff_Midi_Ports_And_Reconnect(mock_rtmidi: MagicMock) -> None:
+    """Each poll enumerates once and reports only added and removed ports."""
+    mock_midi_in = mock_rtmidi.MidiIn.return_value
+    mock_midi_in.get_ports.return_value = ["Piano", "Synth"]
+    mock_midi_in.is_port_open.return_value = False
+    manager = MidiPortManager()
+    callback = MagicMock()
+    manager.select_port("Synth", callback)
+    mock_midi_in.open_port.assert_called_with(1)
+
+    # Nothing changed, so nothing is reported
+    mock_midi_in.is_port_open.return_value = True
+    mock_midi_in.get_ports.reset_mock()
+    assert manager.poll_ports() == []
+    mock_midi_in.get_ports.assert_called_once()
+
+    # The selected port vanishes while open
+    mock_midi_in.get_ports.return_value = ["Piano"]
+    assert manager.poll_ports() == [("removed", "Synth"), ("disconnected", "Synth")]
+    mock_midi_in.close_port.assert_called()
+
+    # It comes back and is reopened at its new index
+    mock_midi_in.is_port_open.return_value = False
+    mock_midi_in.get_ports.return_value = ["Synth", "Piano"]
+    assert manager.poll_ports() == [("added", "Synth"), ("connected", "Synth")]
+    mock_midi_in.open_port.assert_called_with(0)
+    mock_midi_in.set_callback.assert_called_with(callback)
+
+
+def test_Can_Coalesce_Ui_Updates_Per_Frame() -> None:
+    """Updates posted from any thread are applied once per key, on one timer."""
+    master = MagicMock()
+    frame_scheduler = FrameScheduler(master, frame_rate=60)
+    applied = []
+    frame_scheduler.every_frame(lambda: applied.append("frame"))
+    frame_scheduler.start()
+    frame_scheduler.start()
+    master.after.assert_called_once_with(17, frame_scheduler._tick)
+    applied.clear()
+
+    worker = threading.Thread(
+        target=lambda: [
+            frame_scheduler.post("time", applied.append, f"time {i}")
+            for i in range(100)
+        ]
+    )
+    worker.start()
+    worker.join()
+    frame_scheduler.post("result", applied.append, "result")
+    frame_scheduler.run_frame()
+    assert applied == ["time 99", "result", "frame"]
+
+    frame_scheduler.run_frame()
+    assert applied == ["time 99", "result", "frame", "frame"]
+
+
+def test_Can_Replay_Standard_Midi_File(tmp_path) -> None:
+    """Note-ons written to a MIDI file come back with their times and tempo applied."""
+    midi_path = str(tmp_path / "replay.mid")
+    StandardMidiFile.write(midi_path, [(0.0, 60), (0.5, 62), (1.25, 64)], 400000)
+
+    note_ons = [
+        (round(seconds, 3), message)
+        for seconds, message in StandardMidiFile.read(midi_path)
+        if message[0] == 0x90
+    ]
+    assert note_ons == [
+        (0.0, [0x90, 60, 100]),
+        (0.5, [0x90, 62, 100]),
+        (1.25, [0x90, 64, 100]),
+    ]
+    assert [round(delta, 3) for delta, _ in replay_events(midi_path)][:3] == [
+        0.0,
+        0.001,
+        0.499,
+    ]
+
+
+def test_Can_Simulate_Session_Without_Tk(tmp_path) -> None:
+    """A synthetic player drives the session headlessly and every answer is logged."""
+    output_file = tmp_path / "results.csv"
+    session = PracticeSession(CSVLogger(str(output_file)))
+    simulation = Simulation(session)
+    player = SyntheticPlayer(rate=1000, accuracy=0.5, jitter=0.0, rng=random.Random(3))
+
+    simulation.run(player.events(session, 200))
+    session.logger.close()
+
+    assert simulation.event_count == 200
+    assert simulation.answer_count == 200
+    assert 50 < simulation.correct_count < 150
+    assert session.current_note is not None
+    assert len(output_file.read_text().splitlines()) == 201
+
+
+def test_Can_Flag_Benchmark_Regressions() -> None:
+    """Benchmarks slower than the baseline by more than the threshold are flagged."""
+    calls = []
+    assert measure(lambda: calls.append(1), 10, repeat=3) >= 0
+    assert len(calls) == 30
+
+    regressions = compare(
+        {"fast": 1.0e-6, "slow": 1.5e-6, "new": 2.0e-6},
+        {"fast": 1.1e-6, "slow": 1.0e-6},
+        threshold=0.2,
+    )
+    assert regressions == ["slow"]
+
+
+@headless
+@patch("multi_station.create_result_store")
+@patch("multi_station.MidiInputPool")
+@patch("multi_station.NoteImageManager.regenerate_missing_notes")
+@patch("multi_station.NoteImageManager.get_missing_notes")
+def test_Can_Train_Several_Stations_At_Once(
+    mock_get_missing_notes: MagicMock,
+    mock_regenerate_missing_notes: MagicMock,
+    MockMidiInputPool: MagicMock,
+    mock_create_result_store: MagicMock,
 ) -> None:
-    """Test if the time label updates correctly."""
-    root: Tk = Tk()
-    mock_render_note_image.return_value = PhotoImage()
-    mock_midi_manager = MockMidiPortManager.return_value
+    """Each port gets its own station and session; results share one store."""
+    root = FakeWidget()
+    # Keep the warm-up running so that no rendered note replaces the test notes
+    mock_get_missing_notes.return_value = ["C4"]
+    release = threading.Event()
+    mock_regenerate_missing_notes.side_effect = lambda: release.wait(5)
+    mock_inputs = MockMidiInputPool.return_value
+    mock_inputs.get_ports.return_value = ["Piano 1", "Piano 2", "Synth"]
+    store = mock_create_result_store.return_value
 
-    app = NoteTrainer(root)
-    app.midi_manager = mock_midi_manager
-    app.timer.start()
+    app = MultiStationTrainer(root, ["Piano"])
 
-    time.sleep(0.1)
-    app._update_time_label()
+    assert [station.port for station in app.stations] == ["Piano 1", "Piano 2"]
+    assert mock_inputs.open_port.call_count == 2
+    assert mock_inputs.open_port.call_args_list[1].args[2] == 1
+
+    first, second = app.stations
+    first.session.show_note("C4")
+    second.session.show_note("D4")
+    app._midi_callback(([0x90, 60, 100], 0.01), 0)
+    app._midi_callback(([0x90, 60, 100], 0.01), 1)
+    app._process_midi_events()
+    app.frame_scheduler.run_frame()
+
+    assert first.session.attempts == 0 and first.session.current_note is None
+    assert second.session.attempts == 1 and second.session.current_note == "D4"
+    assert "Correct" in first.result_label.cget("text")
+    assert store.log_result.call_count == 2
+
+    release.set()
+    app._on_close()
+    mock_inputs.close_all.assert_called_once()
+    store.close.assert_called_once()
+
+
+def test_Can_Cache_Note_Pixels_Within_Budget() -> None:
+    """Pixels round-trip exactly, stay within the byte budget and are counted."""
+    engraver = StaffEngraver()
+    image = engraver.render("C#4")
+    entry_bytes = sum(len(part) for part in PixelCache.compact(image))
+    assert entry_bytes < len(image.tobytes()) / 3
+
+    cache = PixelCache(max_bytes=2 * entry_bytes)
+    assert cache.get("C#4") is None
+    cache.put("C#4", image)
+    cached = cache.get("C#4")
+    assert cached.mode == image.mode and cached.tobytes() == image.tobytes()
+
+    cache.put("D4", engraver.render("D4"))
+    cache.put("E4", engraver.render("E4"))
+    assert "C#4" not in cache
+    stats = cache.stats()
+    assert stats["resident_bytes"] <= 2 * entry_bytes
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+
+    photo_image = MagicMock()
+    photo_image.width.return_value, photo_image.height.return_value = 10, 20
+    loader = MagicMock(return_value=photo_image)
+    photo_cache = PhotoImageCache(loader, max_entries=1)
+    assert photo_cache.get("C4") is photo_cache.get("C4")
+    photo_cache.get("D4")
+    assert loader.call_count == 2
+    assert photo_cache.stats() == {
+        "entries": 1,
+        "resident_bytes": 800,
+        "hits": 1,
+        "misses": 2,
+        "evictions": 1,
+    }
+
+    # PhotoImages must only be touched by the Tk thread
+    errors: list[Exception] = []
+
+    def get_from_other_thread() -> None:
+        try:
+            photo_cache.get("C4")
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=get_from_other_thread)
+    thread.start()
+    thread.join()
+    assert len(errors) == 1
+
+
+@patch("prefetch.NoteImageManager.get_note_pixels")
+def test_Can_Prefetch_Next_Notes(mock_get_note_pixels: MagicMock) -> None:
+    """Upcoming notes are decoded and prepared before they are asked for."""
+    jobs: list = []
+    posted: list = []
+    executor = MagicMock()
+    executor.submit.side_effect = jobs.append
+    session = PracticeSession(MagicMock())
+    on_ready = MagicMock()
+    prefetcher = NotePrefetcher(
+        session,
+        executor,
+        lambda key, callback, *args: posted.append((key, callback, args)),
+        lambda note_name: f"image of {note_name}",
+        on_ready,
+        depth=2,
+    )
+
+    assert prefetcher.take() is None
+    assert len(jobs) == 2
+    mock_get_note_pixels.side_effect = [None, OSError("unreadable")]
+    for job in jobs:
+        job()
+    assert len({key for key, _, _ in posted}) == 2
+    for _, callback, args in posted:
+        callback(*args)
+    assert on_ready.call_count == 2 and prefetcher.in_flight == 0
+
+    note_name, image, error = prefetcher.take()
+    assert image == f"image of {note_name}" and error is None
+    assert isinstance(prefetcher.take()[2], OSError)
+    assert len(jobs) == 4
+
+    # A failed note selection is posted too, so it is no longer in flight
+    session.next_note = MagicMock(side_effect=ValueError("no notes"))
+    jobs[2]()
+    posted[-1][1](*posted[-1][2])
+    assert prefetcher.in_flight == 1
+    note_name, image, error = prefetcher.take()
+    assert note_name is None and image is None and isinstance(error, ValueError)
+
+
+def test_Can_Merge_And_Prioritize_Render_Jobs() -> None:
+    """Duplicate requests share one render and display requests jump the queue."""
+    release = threading.Event()
+    rendered: list[str] = []
+
+    def render(note_name: str) -> None:
+        if note_name == "C4":
+            release.wait(5)  # Keep the only worker busy while the queue fills
+        rendered.append(note_name)
+
+    scheduler = RenderScheduler(render, lambda note_name: False, max_workers=1)
+    first = scheduler.request("C4")
+    assert scheduler.request("C4") is first
+    warm_up = [
+        scheduler.request(note_name, RenderScheduler.WARM_UP)
+        for note_name in ("D4", "E4", "F4")
+    ]
+    display = scheduler.request("G4")
+    assert scheduler.request("F4") is warm_up[2]  # Moved up to display priority
+
+    release.set()
+    for future in [first, display, *warm_up]:
+        future.result(timeout=5)
+    assert rendered == ["C4", "G4", "F4", "D4", "E4"]
+    scheduler.shutdown()
+
+
+def test_Can_Keep_Live_Note_Statistics(tmp_path) -> None:
+    """Stats are seeded from the stored results and updated with every answer."""
+    logger = CSVLogger(str(tmp_path / "results.csv"))
+    rng = random.Random(7)
+    times = [rng.uniform(0.3, 3.0) for _ in range(500)]
+    for time_taken in times:
+        logger.log_result("01J", "C4", "C4", time_taken, "2024-01-01 10:00:00")
+    logger.log_result("01J", "C4", "D4", 1.0, "2024-01-01 10:00:00")
+    results = logger.read_results()
+    # Written after the read was requested, so only counted live
+    logger.log_result("01J", "E4", "E4", 1.0, "2024-01-01 10:00:00")
+
+    stats = NoteStatistics()
+    stats.record("E4", False, 2.0)
+    assert stats.load(results) == 501
+    stats.record("C4", True, 1.5)
+
+    attempts, correct, accuracy, p50, p90 = stats.summary("C4")
+    recorded = sorted([round(t, 3) for t in times] + [1.5])
+    assert (attempts, correct) == (502, 501)
+    assert accuracy == 501 / 502
+    assert abs(p50 - recorded[250]) <= 0.02 * recorded[250]
+    assert abs(p90 - recorded[450]) <= 0.02 * recorded[450]
+    assert abs(stats.notes["C4"].mean - statistics.mean(recorded)) < 1e-9
+    assert abs(stats.notes["C4"].variance - statistics.variance(recorded)) < 1e-9
+    assert stats.summary("E4")[:2] == (1, 0)
+    assert stats.summary("G4") is None
+
+
+def test_Can_Tail_Results_From_Checkpoint(tmp_path) -> None:
+    """Only appended rows are parsed; truncation and rotation start over."""
+    results_file = str(tmp_path / "results.csv")
+    checkpoint_file = str(tmp_path / "tail.json")
+    logger = CSVLogger(results_file)
+    for midi_note in (60, 60, 62):
+        logger.log_result("01J", "C4", midi_note, 1.0, "2024-01-01 10:00:00")
+
+    tail = ResultsTail(results_file, checkpoint_file)
+    assert tail.update() == 3
+    assert tail.stats.summary("C4")[:2] == (3, 2)
+
+    # A row that is still being written is left for the next run
+    logger.log_result("01J", "D4", 62, 2.0, "2024-01-01 10:00:01")
+    with open(results_file, "a", newline="") as results:
+        results.write("2024-01-01 10:00:02,01J,E4,E")
+    tail = ResultsTail(results_file, checkpoint_file)
+    assert tail.rows == 3 and tail.update() == 1
+    with open(results_file, "a", newline="") as results:
+        results.write("4,2.500,\r\n")
+    assert tail.read_new() == [["2024-01-01 10:00:02", "01J", "E4", "E4", "2.500", ""]]
+    assert tail.rows == 5
+
+    # Rotation: a new file with the same header replaces the old one
+    os.replace(results_file, str(tmp_path / "results.1.csv"))
+    logger = CSVLogger(results_file)
+    logger.log_result("01J", "G4", 67, 1.0, "2024-01-02 10:00:00")
+    assert tail.update() == 1 and tail.restarted
+    assert tail.rows == 1 and set(tail.stats.notes) == {"G4"}
+
+    # Truncation: the file is emptied in place
+    open(results_file, "w").close()
+    assert tail.update() == 0 and tail.restarted and tail.rows == 0
+
+
+def test_Can_Tail_Results_In_Bounded_Blocks(tmp_path) -> None:
+    """Rows are streamed block by block, also when a line is longer than a block."""
+    results_file = str(tmp_path / "results.csv")
+    logger = CSVLogger(results_file)
+    for index in range(50):
+        logger.log_result(f"01J{index}", "C4", 60, 1.0, "2024-01-01 10:00:00")
+
+    tail = ResultsTail(results_file, str(tmp_path / "tail.json"), block_size=16)
+    rows = tail.iter_new()
+    assert next(rows)[1] == "01J0"
+    # Only complete blocks are counted until the rest is consumed
+    assert tail.offset < os.path.getsize(results_file)
+    assert len(list(rows)) == 49
+    assert tail.offset == os.path.getsize(results_file) and tail.rows == 50
+
+    tail = ResultsTail(results_file, str(tmp_path / "tail.json"), block_size=16)
+    assert tail.update() == 50 and tail.stats.summary("C4")[:2] == (50, 50)
+
+
+def test_Can_Scan_Results_In_Parallel_Chunks(tmp_path) -> None:
+    """Chunked parallel scanning gives the same aggregates as a serial read."""
+    results_file = str(tmp_path / "results.csv")
+    logger = CSVLogger(results_file)
+    rng = random.Random(7)
+    for _ in range(2000):
+        tested_note = rng.choice(NoteIndex.TESTED_NOTES)
+        midi_note = (
+            NoteIndex.NAME_TO_MIDI[tested_note]
+            if rng.random() < 0.8
+            else rng.randrange(21, 109)
+        )
+        time_taken = round(rng.lognormvariate(0, 0.5), 3)
+        logger.log_result(
+            "01J", tested_note, midi_note, time_taken, "2024-01-01 10:00:00"
+        )
+    serial = NoteStatistics()
+    serial.load(logger.read_results())
+
+    # Small chunks, so that rows are split over many workers' chunks
+    scanner = ResultsScanner(results_file, workers=2, chunk_size=4096)
+    field_count, chunks = scanner.chunks()
+    assert field_count == 6 and len(chunks) > 10
+    assert chunks[-1][1] == os.path.getsize(results_file)
+    scanned = scanner.scan()
+    assert scanner.rows == 2000 and set(scanned.notes) == set(serial.notes)
+    for note_name, stats in serial.notes.items():
+        assert scanned.summary(note_name) == serial.summary(note_name)
+        assert abs(scanned.notes[note_name].mean - stats.mean) < 1e-9
+        assert abs(scanned.notes[note_name].variance - stats.variance) < 1e-9
+
+
+def test_Can_Serve_Live_Aggregates_On_Localhost(tmp_path) -> None:
+    """Results logged by a session show up on the local endpoint right away."""
+    stats = NoteStatistics()
+    recent = RecentResults(max_results=2)
+    store = RecordingStore(CSVLogger(str(tmp_path / "results.csv")), recent)
+    session = PracticeSession(store, stats=stats)
+    server = ResultsServer(stats, recent, registry=Metrics(), port=0)
+    server.start()
+    try:
+        for midi_note in (62, 60):
+            session.show_note("C4")
+            session.answer(midi_note, time.perf_counter_ns())
+        session.show_note("D4")
+        session.answer(62, time.perf_counter_ns())
+
+        base_url = f"http://127.0.0.1:{server.port}"
+        with urllib.request.urlopen(f"{base_url}/results?recent=5") as response:
+            results = json.load(response)
+        assert results["attempts"] == 3 and results["correct"] == 2
+        assert results["notes"]["C4"]["attempts"] == 2
+        assert results["notes"]["C4"]["accuracy"] == 0.5
+        assert set(results["notes"]["C4"]) >= {"p50", "p90", "p99"}
+        # The newest first, and only as many as are kept
+        assert [r["tested_note"] for r in results["recent"]] == ["D4", "C4"]
+        assert results["recent"][1]["guessed_note"] == "C4"
+
+        with urllib.request.urlopen(f"{base_url}/metrics") as response:
+            text = response.read().decode()
+        assert 'trainer_note_attempts_total{note="C4"} 2' in text
+        assert 'trainer_note_reaction_seconds_count{note="D4"} 1' in text
+    finally:
+        server.stop()
+        store.close()
+
+    with pytest.raises(ValueError):
+        ResultsServer(stats, recent, host="0.0.0.0")
+
+
+def test_Can_Run_Practice_Engine_With_Injected_Clock() -> None:
+    """The engine evaluates answers on its injected clock and advances without a view."""
+    now = [10**9]
+    store = ListResultStore()
+    session = PracticeSession(store, timer=Timer(lambda: now[0]))
+    shown, answers = [], []
+    engine = PracticeEngine(
+        session,
+        renderer=lambda note_name: f"image of {note_name}",
+        on_note=lambda note_name, image: shown.append((note_name, image)),
+        on_answer=lambda *answer: answers.append(answer),
+    )
+
+    first_note = engine.show_next_note()
+    assert shown == [(first_note, f"image of {first_note}")]
+    midi_note = NoteIndex.NAME_TO_MIDI[first_note]
+
+    # A wrong note after 0.75 s, the right one 0.25 s later by the driver's clock
+    now[0] += 750_000_000
+    engine.receive([0x90, midi_note + 1, 100])
+    now[0] += 250_000_000
+    engine.receive([0x90, midi_note, 100], 0.25)
+    engine.receive([0x80, midi_note, 0], 0.0)  # Note-off, not an answer
+    assert engine.process_events() == 3
+
+    assert answers == [
+        (midi_note + 1, first_note, False, 0.75),
+        (midi_note, first_note, True, 1.0),
+    ]
+    assert (engine.event_count, engine.answer_count, engine.correct_count) == (3, 2, 1)
+    assert [result[3] for result in store.results] == [0.75, 1.0]
+    # The next note is shown right after the correct answer
+    assert len(shown) == 2 and session.current_note == shown[1][0]
+
+
+def test_Can_Ignore_Chord_Notes_Played_Before_The_Next_Note() -> None:
+    """A chord drained at once answers the shown note only, not the next one too."""
+    now = [10**9]
+    store = ListResultStore()
+    session = PracticeSession(store, timer=Timer(lambda: now[0]))
+    answers = []
+    engine = PracticeEngine(session, on_answer=lambda *answer: answers.append(answer))
+    engine.show_note("C4")
+
+    now[0] += 500_000_000
+    engine.receive([0x90, 60, 100], 0.0)
+    now[0] += 2_000_000
+    engine.receive([0x90, 62, 100], 0.002)
+    # Both keys are drained in the same frame, after they arrived
+    now[0] += 10_000_000
+    assert engine.process_events() == 2
+
+    assert answers == [(60, "C4", True, 0.5)]
+    assert len(store.results) == 1
+    assert session.attempts == 0 and session.timer.is_running()
+
+
+def test_Can_Process_Engine_Events_At_High_Throughput() -> None:
+    """Thousands of played notes go through the engine in a fraction of a second."""
+    store = ListResultStore()
+    session = PracticeSession(store)
+    engine = PracticeEngine(session)
+    player = SyntheticPlayer(rate=1000, accuracy=0.8, jitter=0.0, rng=random.Random(5))
 
-    elapsed_time = float(app.time_label.cget("text").split(": ")[1][:-1])
-    assert elapsed_time >= 0.1
+    elapsed = engine.run(player.events(session, 5000))
 
-    root.destroy()
+    assert engine.event_count == 5000 and len(store.results) == 5000
+    assert 3500 < engine.correct_count < 4500
+    assert elapsed < 0.5, f"{5000 / elapsed:.0f} events/s"
@@ -1,14 +1,50 @@
 import time
+from typing import Callable
 
 
 class Timer:
-    def __init__(self):
-        """Initialize the Timer with no start time."""
-        self.start_time: float | None = None
+    """Reaction timer on the monotonic high-resolution clock, or an injected one.
+
+    A note is first requested, then displayed. The time between the two is the
+    display latency (selection, rendering and drawing). The reaction time is
+    measured from the moment the note was displayed.
+    """
+
+    def __init__(self, clock: Callable[[], int] = time.perf_counter_ns):
+        """Initialize the Timer with no request or start time.
+
+        Args:
+            clock (Callable[[], int]): Returns the current time in nanoseconds; MIDI
+                event times must be on the same clock.
+        """
+        self.clock: Callable[[], int] = clock
+        self.requested_ns: int | None = None
+        self.start_ns: int | None = None
+
+    def now_ns(self) -> int:
+        """Get the current time on the timer's clock.
+
+        Returns:
+            int: The current time in nanoseconds.
+        """
+        return self.clock()
+
+    def request(self) -> None:
+        """Record that a new note was requested. The timer stays stopped until it is shown."""
+        self.requested_ns = self.clock()
+        self.start_ns = None
 
     def start(self) -> None:
         """Start the timer by recording the current time."""
-        self.start_time = time.time()
+        self.start_ns = self.clock()
+
+    def is_running(self) -> bool:
+        """Check whether the timer has been started.
+
+        Returns:
+            bool: True if the timer is running, False otherwise.
+        """
+        return self.start_ns is not None
 
     def stop(self) -> float:
         """Stop the timer and return the elapsed time.
@@ -16,4 +52,27 @@ class Timer:
         Returns:
             float: The elapsed time in seconds since the timer started.
         """
-        return 0.0 if self.start_time is None else time.time() - self.start_time
+        return self.elapsed_until(self.clock())
+
+    def elapsed_until(self, end_ns: int) -> float:
+        """Get the time between the timer's start and a given moment.
+
+        Args:
+            end_ns (int): The moment, on the timer's clock.
+
+        Returns:
+            float: The elapsed time in seconds, never negative.
+        """
+        if self.start_ns is None:
+            return 0.0
+        return max(0, end_ns - self.start_ns) / 1e9
+
+    def display_latency(self) -> float:
+        """Get the time between the note being requested and being displayed.
+
+        Returns:
+            float: The display latency in seconds, or 0.0 if unknown.
+        """
+        if self.requested_ns is None or self.start_ns is None:
+            return 0.0
+        return max(0, self.start_ns - self.requested_ns) / 1e9
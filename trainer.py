@@ -1,14 +1,23 @@
 import tkinter as tk
 from tkinter import messagebox
-import random
 from config import Config
+from frame_scheduler import FrameScheduler
+from image_cache import PhotoImageCache
 from midi_manager import MidiPortManager
 from note_image import NoteImageManager
-from logger import CSVLogger
-from timer import Timer
-from ulid import ulid
+from PIL import ImageTk
+from note_index import NoteIndex
+from note_stats import NoteStatistics
+from logger import create_result_store
+from metrics import MetricsExporter, metrics
+from practice_engine import PracticeEngine
+from practice_session import PracticeSession
+from prefetch import NotePrefetcher
+from results_server import RecentResults, RecordingStore, ResultsServer
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 import os
+import threading
 import time
 from typing import Optional
 
@@ -19,29 +28,129 @@ class NoteTrainer:
         self.master.title("Note Reading Trainer (rtmidi)")
         self.master.geometry("800x600")
         self.master.resizable(False, False)  # Make the UI unresizable
-        self.midi_manager: MidiPortManager = MidiPortManager()
-        self.logger: CSVLogger = CSVLogger(Config.OUTPUT_CSV)
-        self.timer: Timer = Timer()
-        self.total_time: float = 0.0
-        self.attempts: int = 0
+        self.master.protocol("WM_DELETE_WINDOW", self._on_close)
+        # Per-note history, seeded from the stored results and updated with every answer
+        self.note_stats: NoteStatistics = NoteStatistics()
+        store = create_result_store()
+        self.results_server: Optional[ResultsServer] = None
+        if Config.RESULTS_SERVER_ENABLED:
+            # Dashboards query the live aggregates instead of pulling the results CSV
+            recent_results = RecentResults()
+            store = RecordingStore(store, recent_results)
+            self.results_server = ResultsServer(self.note_stats, recent_results)
+            try:
+                self.results_server.start()
+            except OSError as e:
+                print(f"Failed to start the results server: {e}")
+                self.results_server = None
+        # The practice logic; this class only draws it and feeds it MIDI messages
+        self.engine: PracticeEngine = PracticeEngine(
+            PracticeSession(store, stats=self.note_stats),
+            on_answer=self._show_answer,
+            advance=False,  # The next note comes from the prefetcher
+        )
+        self.session: PracticeSession = self.engine.session
+        # Opening a port resets the engine's MIDI clock to the driver's new timeline
+        self.midi_manager: MidiPortManager = MidiPortManager(self.engine.midi_clock)
         self.available_ports: list[str] = []
         self.status_label: Optional[tk.Label] = None
         self.last_connection_state: Optional[bool] = None
         self.selected_port: Optional[str] = None
-        self.session_id: Optional[str] = None
         self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
             max_workers=os.cpu_count()
         )
-        self._clean_up_and_regenerate_notes()
+        self.warm_up_done: threading.Event = threading.Event()
+        # Filled by the port watcher thread, drained on the Tk thread
+        self.port_events: deque[tuple[str, str]] = deque()
+        self.metrics_exporter: Optional[MetricsExporter] = None
+        if Config.METRICS_ENABLED:
+            self.metrics_exporter = MetricsExporter(metrics)
+            self.metrics_exporter.start()
+        # The only place widgets are updated from; other threads post to it
+        self.frame_scheduler: FrameScheduler = FrameScheduler(self.master)
+        self.frame_scheduler.every_frame(self._update_time_label)
+        # PhotoImages are only created on the Tk thread, from the shared pixel cache
+        self.photo_cache: PhotoImageCache = PhotoImageCache(
+            lambda note_name: NoteImageManager.render_note_image(note_name, self.master)
+        )
+        metrics.register_cache("photos", self.photo_cache.stats)
+        self.prefetcher: NotePrefetcher = NotePrefetcher(
+            self.session,
+            self.executor,
+            self.frame_scheduler.post,
+            self.photo_cache.get,
+            self._on_note_prefetched,
+        )
+        # A note was requested before one was prepared; it is shown once one is
+        self.waiting_for_note: bool = False
         self._initialize_ui()
+        self.note_stats.load_in_background(
+            self.session.logger.read_results(),
+            lambda: self.frame_scheduler.post("stats", self._refresh_stats_panel),
+        )
         self._select_initial_device()
-        self._populate_cache()
+        self._update_connection_status()
+        self.midi_manager.watch(self.port_events.extend)
+        self._start_cache_warm_up()
+        self._drain_midi_queue()
+        self.frame_scheduler.start()
+
+    def _on_close(self) -> None:
+        """Drain pending results and close the window."""
+        self.midi_manager.stop_watching()
+        self.frame_scheduler.stop()
+        self.session.logger.close()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        if self.results_server is not None:
+            self.results_server.stop()
+        self.executor.shutdown(wait=False)
+        self.master.destroy()
+
+    def _start_cache_warm_up(self) -> None:
+        """Show the first note as soon as its image is ready and warm up the rest of the cache.
+
+        A note that is not cached yet is rendered on its own, ahead of the
+        background warm-up, so the first note does not wait for the whole cache.
+        """
+        if NoteImageManager.get_missing_notes():
+            self.progress_label.config(text="Preparing note images...")
+            threading.Thread(
+                target=self._clean_up_and_regenerate_notes, daemon=True
+            ).start()
+        else:
+            self.warm_up_done.set()
         self._show_random_note()
 
     def _clean_up_and_regenerate_notes(self) -> None:
         """Clean up old MusicXML files and regenerate missing note images."""
-        NoteImageManager.clean_up_musicxml_files()
-        NoteImageManager.regenerate_missing_notes()
+        try:
+            NoteImageManager.clean_up_musicxml_files()
+            NoteImageManager.regenerate_missing_notes(
+                progress=self._on_warm_up_progress
+            )
+        except Exception as e:
+            print(f"Failed to regenerate note images: {e}")
+        finally:
+            self.frame_scheduler.post("progress", self._finish_cache_warm_up)
+            self.warm_up_done.set()
+
+    def _on_warm_up_progress(self, done: int, total: int) -> None:
+        """Show cache warm-up progress. Called from the warm-up thread.
+
+        Args:
+            done (int): The number of rendered notes.
+            total (int): The number of notes to render.
+        """
+        self.frame_scheduler.post(
+            "progress",
+            self.progress_label.config,
+            text=f"Preparing note images... {done}/{total}",
+        )
+
+    def _finish_cache_warm_up(self) -> None:
+        """Clear the warm-up progress."""
+        self.progress_label.config(text="")
 
     def _initialize_ui(self) -> None:
         """Initialize the user interface components."""
@@ -68,22 +177,71 @@ class NoteTrainer:
         self.note_label.pack(expand=True)
 
         self.time_label: tk.Label = tk.Label(self.master, text="Time Taken: 0.000s")
+        # The text last set on the time label, so that unchanged frames skip the Tk call
+        self.time_text: str = "Time Taken: 0.000s"
         self.time_label.pack(pady=5)
         self.correct_note_label: tk.Label = tk.Label(self.master, text="")
         self.correct_note_label.pack(pady=5)
         self.status_label = tk.Label(self.master, text="Status: Disconnected", fg="red")
         self.status_label.pack(pady=5)
+        self.progress_label: tk.Label = tk.Label(self.master, text="")
+        self.progress_label.pack(pady=5)
+        stats_frame = tk.Frame(self.master)
+        stats_frame.pack(pady=5)
+        self.stats_list: tk.Listbox = tk.Listbox(
+            stats_frame, height=6, width=48, font=("Courier", 10)
+        )
+        stats_scrollbar = tk.Scrollbar(stats_frame, command=self.stats_list.yview)
+        self.stats_list.config(yscrollcommand=stats_scrollbar.set)
+        self.stats_list.pack(side="left")
+        stats_scrollbar.pack(side="right", fill="y")
+        self._refresh_stats_panel()
         tk.Button(self.master, text="Next Note", command=self._show_random_note).pack(
             pady=10
         )
-        self._monitor_connection()
+
+    def _refresh_stats_panel(self) -> None:
+        """Fill the stats panel with a row for every tested note."""
+        self.stats_list.delete(0, tk.END)
+        for note_name in NoteIndex.TESTED_NOTES:
+            self.stats_list.insert(tk.END, self._format_stats_row(note_name))
+
+    def _update_stats_row(self, note_name: str) -> None:
+        """Update the stats panel row of one note.
+
+        Args:
+            note_name (str): The tested note.
+        """
+        index = NoteIndex.TESTED_NOTES.index(note_name)
+        self.stats_list.delete(index)
+        self.stats_list.insert(index, self._format_stats_row(note_name))
+
+    def _format_stats_row(self, note_name: str) -> str:
+        """Format the accuracy and reaction times of a note for the stats panel.
+
+        Args:
+            note_name (str): The tested note.
+
+        Returns:
+            str: The row text.
+        """
+        summary = self.note_stats.summary(note_name)
+        if summary is None:
+            return f"{note_name:>4}  no attempts"
+        attempts, correct, accuracy, p50, p90 = summary
+        return (
+            f"{note_name:>4}  {correct:>5}/{attempts:<5} {accuracy:4.0%}  "
+            f"p50 {p50:5.2f}s  p90 {p90:5.2f}s"
+        )
 
     def _update_time_label(self) -> None:
-        """Update the time label with the elapsed time since the timer started."""
-        if self.timer.start_time is not None:
-            elapsed_time = time.time() - self.timer.start_time
-            self.time_label.config(text=f"Time Taken: {elapsed_time:.2f}s")
-        self.master.after(10, self._update_time_label)
+        """Update the time label with the elapsed time since the timer started. Runs every frame."""
+        if not self.session.timer.is_running():
+            return
+        time_text = f"Time Taken: {self.session.timer.stop():.2f}s"
+        if time_text != self.time_text:
+            self.time_label.config(text=time_text)
+            self.time_text = time_text
 
     def _select_initial_device(self) -> None:
         """Select the initial MIDI device from the available ports."""
@@ -103,147 +261,171 @@ class NoteTrainer:
             port (str): The name of the selected MIDI port.
         """
         try:
-            idx = self.available_ports.index(port)
-            self.midi_manager.open_port(idx, self._midi_callback)
+            self.midi_manager.select_port(port, self._midi_callback)
             self.selected_port = port
         except ValueError:
             messagebox.showerror("Error", "Selected port not found in list.")
 
     def _midi_callback(self, event: list[int], data: Optional[object] = None) -> None:
-        """Handle incoming MIDI messages and process note-on events.
+        """Queue an incoming MIDI message for the Tk thread. Runs on the rtmidi thread.
 
         Args:
-            event (list[int]): The MIDI event data.
+            event (list[int]): The MIDI message and the driver's delta time in seconds.
             data (Optional[object]): Additional data. Must be defined for the rtmidi_in.setCallback callback.
         """
         if not event or len(event) < 1:
             return
-        message = event[0]
-        if (message[0] & 0xF0) == 0x90 and message[2] > 0:  # Note-On event
-            midi_note = message[1]
-            # Look up in full note range
-            guessed_note = next(
-                (
-                    key
-                    for key, value in Config.NOTE_TO_MIDI.items()
-                    if value == midi_note
-                ),
-                f"Note{midi_note}",  # Show actual note number instead of Unknown
+        arrival_time = time.perf_counter_ns()
+        self.engine.receive(event[0], event[1] if len(event) > 1 else 0.0)
+        metrics.observe_since("midi_callback", arrival_time)
+
+    def _drain_midi_queue(self) -> None:
+        """Process queued MIDI messages and port events, and schedule the next drain."""
+        self._process_midi_events()
+        if self.port_events:
+            self._process_port_events()
+        self.master.after(Config.MIDI_POLL_INTERVAL_MS, self._drain_midi_queue)
+
+    def _process_midi_events(self) -> None:
+        """Process all MIDI messages queued since the last drain, in arrival order."""
+        self.engine.process_events()
+
+    def _show_answer(
+        self, midi_note: int, tested_note: str, is_correct: bool, time_taken: float
+    ) -> None:
+        """Show the outcome of an answer and move on after a correct one.
+
+        Args:
+            midi_note (int): The MIDI number of the played note.
+            tested_note (str): The note that was on screen.
+            is_correct (bool): Whether the played note was correct.
+            time_taken (float): The reaction time in seconds.
+        """
+        self.frame_scheduler.post(
+            f"stats:{tested_note}", self._update_stats_row, tested_note
+        )
+        if is_correct:
+            self.frame_scheduler.post(
+                "result",
+                self.correct_note_label.config,
+                text=f"Correct: {tested_note} in {time_taken:.3f}s",
+                fg="green",
             )
-            time_taken = self.timer.stop()
-            self.total_time += time_taken
-            self.attempts += 1
-            # Validate against tested range
-            is_correct = Config.TESTED_NOTES.get(self.current_note) == midi_note
-
-            if self.session_id is None:
-                self.session_id = str(ulid())
-
-            # Log the result, including the guessed note
-            self.logger.log_result(
-                self.session_id,
-                self.current_note,
-                guessed_note,
-                time_taken,  # Log time_taken in seconds
-                self._get_timestamp(),
+            print(f"Correct! Played note matches: {tested_note}")
+            self._show_random_note()
+        else:
+            self.frame_scheduler.post("result", self.correct_note_label.config, text="")
+            print(
+                f"Incorrect. Played {midi_note}, Expected {NoteIndex.NAME_TO_MIDI.get(tested_note)}"
             )
 
-            if is_correct:
-                self.correct_note_label.config(
-                    text=f"Correct: {self.current_note} in {time_taken:.3f}s",
-                    fg="green",
-                )
-                print(f"Correct! Played note matches: {self.current_note}")
-                self.total_time = 0.0  # Reset total time for the next note
-                self.attempts = 0
-                self.session_id = None  # Reset session ID for the next note
-                self._show_random_note()
-            else:
-                self.correct_note_label.config(
-                    text="",
-                )
-                self.total_time += time_taken  # Update total time for incorrect note
-                print(
-                    f"Incorrect. Played {midi_note}, Expected {Config.NOTE_TO_MIDI.get(self.current_note)}"
-                )
-
-    def _monitor_connection(self) -> None:
-        """Monitor the MIDI connection status and update the UI accordingly."""
-        current_ports = self.midi_manager.get_ports()
-        current_state = bool(current_ports and self.midi_manager.is_port_open())
-
-        if self.midi_manager.has_ports_changed():
-            self.available_ports = current_ports
-            self._update_port_menu()
-
-            # Automatically reconnect if the previously selected port is reconnected
-            if self.selected_port in self.available_ports:
-                self._on_select_midi_port(self.selected_port)
-            elif self.available_ports:  # Select the first available port
-                self._select_initial_device()
-            else:  # No ports available
-                self.status_label.config(text="Status: Disconnected", fg="red")
+    def _process_port_events(self) -> None:
+        """Apply the port watcher's add/remove events to the menu and the connection status."""
+        while self.port_events:
+            kind, port = self.port_events.popleft()
+            if kind == "added" and port not in self.available_ports:
+                self._add_port_to_menu(port)
+                # Automatically connect when the first port appears
+                if self.selected_port is None:
+                    self._select_initial_device()
+                elif port == self.selected_port:
+                    self.port_var.set(port)
+            elif kind == "removed" and port in self.available_ports:
+                self._remove_port_from_menu(port)
+                # Fall back to another port; the watcher reconnects the selected port if it returns
+                if port == self.selected_port and self.available_ports:
+                    self._select_initial_device()
+        self._update_connection_status()
+
+    def _add_port_to_menu(self, port: str) -> None:
+        """Add a MIDI port to the port selection menu.
+
+        Args:
+            port (str): The name of the added port.
+        """
+        menu = self.port_menu.children["menu"]
+        if not self.available_ports:
+            menu.delete(0, "end")  # Remove the "No Ports Available" placeholder
+        self.available_ports.append(port)
+        menu.add_command(
+            label=port, command=lambda value=port: self.port_var.set(value)
+        )
+
+    def _remove_port_from_menu(self, port: str) -> None:
+        """Remove a MIDI port from the port selection menu.
 
+        Args:
+            port (str): The name of the removed port.
+        """
+        menu = self.port_menu.children["menu"]
+        menu.delete(self.available_ports.index(port))
+        self.available_ports.remove(port)
+        if not self.available_ports:
+            self.port_var.set("No Ports Available")
+
+    def _update_connection_status(self) -> None:
+        """Show whether the selected MIDI port is connected."""
+        current_state = bool(self.available_ports and self.midi_manager.is_port_open())
         if current_state != self.last_connection_state:
-            self.status_label.config(
+            self.frame_scheduler.post(
+                "status",
+                self.status_label.config,
                 text="Status: Connected" if current_state else "Status: Disconnected",
                 fg="green" if current_state else "red",
             )
             self.last_connection_state = current_state
 
-        self.master.after(500, self._monitor_connection)
+    def _on_note_prefetched(self) -> None:
+        """Show a prepared note if the trainer is waiting for one."""
+        if self.waiting_for_note:
+            self._show_prefetched_note()
 
-    def _update_port_menu(self) -> None:
-        """Update the MIDI port selection menu with the current available ports."""
-        menu = self.port_menu.children["menu"]
-        menu.delete(0, "end")
-        for port in self.available_ports:
-            menu.add_command(
-                label=port, command=lambda value=port: self.port_var.set(value)
-            )
-        self.port_var.set(
-            self.selected_port
-            if self.selected_port in self.available_ports
-            else "No Ports Available"
-        )
+    def _show_prefetched_note(self) -> None:
+        """Swap in the next prepared note, or wait until one has been prepared."""
+        prepared = self.prefetcher.take()
+        if prepared is None:
+            return
+        note_name, _, error = prepared
+        if note_name is None:
+            # No note could be selected; show why and keep waiting for the next one
+            self.note_label.config(image="", text=f"Error selecting note: {error}")
+            return
+        self.waiting_for_note = False
+        self._display_note(*prepared)
 
-    def _populate_cache(self) -> None:
-        """Populate the cache with rendered note images."""
-        for note in Config.NOTE_TO_MIDI.keys():
-            image_path = NoteImageManager.get_image_path(note)
-            if not os.path.isfile(image_path):
-                self.executor.submit(NoteImageManager.render_note_image, note)
-
-    def _show_random_note_thread(self) -> None:
-        """Show a random note image in a separate thread."""
-        # Select from tested notes only
-        self.current_note = random.choice(list(Config.TESTED_NOTES.keys()))
-        try:
-            image = NoteImageManager.render_note_image(self.current_note)
-            self.original_image = image  # Store original image
+    def _display_note(
+        self,
+        note_name: str,
+        image: Optional[ImageTk.PhotoImage],
+        error: Optional[Exception] = None,
+    ) -> None:
+        """Show a prepared note and start the reaction timer once it has been drawn.
+
+        Args:
+            note_name (str): The name of the note.
+            image (Optional[ImageTk.PhotoImage]): The note image.
+            error (Optional[Exception]): The error raised while preparing the image, if any.
+        """
+        display_start = time.perf_counter_ns()
+        if error is not None:
             self.note_label.config(
-                image=image, text="" if image else f"No image for {self.current_note}"
+                text=f"Error displaying note: {note_name} because {error}"
             )
-            self.note_label.image = image
-        except Exception as e:
+        else:
+            self.original_image = image  # Store original image
             self.note_label.config(
-                text=f"Error displaying note: {self.current_note} because {e}"
+                image=image, text="" if image else f"No image for {note_name}"
             )
-        self.timer.start()
-        self.time_label.config(text="Time Taken: 0.000s")
-        self._update_time_label()
+            self.note_label.image = image
+        self.time_text = "Time Taken: 0.000s"
+        self.time_label.config(text=self.time_text)
+        # Let Tk finish drawing before the reaction time starts
+        self.master.update_idletasks()
+        self.engine.show_note(note_name)
+        metrics.observe_since("display", display_start)
 
     def _show_random_note(self) -> None:
-        """Start the timer and show a random note image."""
-        self.timer.start()
-        self.executor.submit(self._show_random_note_thread)
-
-    def _get_timestamp(self) -> str:
-        """Get the current timestamp as a formatted string.
-
-        Returns:
-            str: The current timestamp in 'YYYY-MM-DD HH:MM:SS' format.
-        """
-        from datetime import datetime
-
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        """Request a new note and show the next prepared one; the timer starts once it is displayed."""
+        self.session.request_note()
+        self.waiting_for_note = True
+        self._show_prefetched_note()